@@ -0,0 +1,139 @@
+"""
+Circuit breaker for LLM calls.
+Trips on high error rate or latency so callers fail fast and fall back to
+degraded serving instead of holding a worker for the full timeout.
+"""
+import asyncio
+import time
+from collections import deque
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class LLMUnavailableError(RuntimeError):
+    """The LLM could not produce a response (timeout or open circuit)"""
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the LLM while the circuit is open"""
+
+class CircuitBreaker:
+    """
+    Closed → open → half-open state machine over a rolling window of calls.
+
+    - closed: calls pass; the window tracks failures and slow calls
+    - open: calls fail immediately with CircuitOpenError until the cooldown ends
+    - half_open: a limited number of probe calls pass; a success closes the
+      circuit, a failure re-opens it for another cooldown
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = self.CLOSED
+        self._window = deque(maxlen=settings.LLM_BREAKER_WINDOW)  # (ok, slow) per call
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.stats = {
+            "opened": 0,
+            "rejected": 0,
+            "timeouts": 0
+        }
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one call through the breaker, with LLM_TIMEOUT_SECONDS as a hard limit"""
+        self._before_call()
+        probing = self.state == self.HALF_OPEN
+        if probing:
+            self._probes_in_flight += 1
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(), timeout=settings.LLM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self._on_failure()
+            raise LLMUnavailableError(f"{self.name} call timed out after {settings.LLM_TIMEOUT_SECONDS}s")
+        except Exception:
+            self._on_failure()
+            raise
+        finally:
+            if probing:
+                self._probes_in_flight -= 1
+
+        self._on_success(time.perf_counter() - started)
+        return result
+
+    def _before_call(self) -> None:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < settings.LLM_BREAKER_COOLDOWN_SECONDS:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self.state = self.HALF_OPEN
+
+        if self.state == self.HALF_OPEN and self._probes_in_flight >= settings.LLM_BREAKER_HALF_OPEN_PROBES:
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is half-open, probe in flight")
+
+    def _on_success(self, latency: float) -> None:
+        slow = latency >= settings.LLM_BREAKER_SLOW_CALL_SECONDS
+        if self.state == self.HALF_OPEN:
+            if slow:
+                self._trip()
+            else:
+                self._reset()
+            return
+
+        self._window.append((True, slow))
+        self._evaluate()
+
+    def _on_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+
+        self._window.append((False, False))
+        self._evaluate()
+
+    def _evaluate(self) -> None:
+        """Trip when the window's error or slow-call rate crosses its threshold"""
+        if self.state != self.CLOSED or len(self._window) < settings.LLM_BREAKER_MIN_CALLS:
+            return
+
+        calls = len(self._window)
+        error_rate = sum(1 for ok, _ in self._window if not ok) / calls
+        slow_rate = sum(1 for _, slow in self._window if slow) / calls
+
+        if error_rate >= settings.LLM_BREAKER_ERROR_RATE or slow_rate >= settings.LLM_BREAKER_SLOW_RATE:
+            self._trip()
+
+    def _trip(self) -> None:
+        if self.state != self.OPEN:
+            self.stats["opened"] += 1
+            print(f"⚠️ {self.name} circuit opened, serving degraded responses")
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def _reset(self) -> None:
+        print(f"✅ {self.name} circuit closed, full service restored")
+        self.state = self.CLOSED
+        self._window.clear()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected (cooldown not yet elapsed)"""
+        return (
+            self.state == self.OPEN
+            and time.monotonic() - self._opened_at < settings.LLM_BREAKER_COOLDOWN_SECONDS
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = len(self._window)
+        return {
+            **self.stats,
+            "state": self.state,
+            "window_calls": calls,
+            "window_error_rate": round(sum(1 for ok, _ in self._window if not ok) / calls, 4) if calls else 0.0,
+            "window_slow_rate": round(sum(1 for _, slow in self._window if slow) / calls, 4) if calls else 0.0
+        }
@@ -0,0 +1,163 @@
+"""
+Context caching for static prompt prefixes.
+The instruction preambles in app/ai/prompts are identical on every call;
+they're uploaded once as cached content and each request then sends only
+its short suffix. Handles are refreshed shortly before they expire.
+"""
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+from app.core.config import settings
+from typing import Any, Callable, Dict, Optional
+
+def join_prompt(prefix: str, suffix: str) -> str:
+    """The full prompt text a prefix/suffix pair stands for"""
+    return f"{prefix}\n\n{suffix}" if suffix else prefix
+
+class CachedPrefix:
+    """One cached prefix: the provider handle, and a model bound to it"""
+
+    def __init__(self, handle: Any, model: Any, expires_at: float):
+        self.handle = handle
+        self.model = model
+        self.expires_at = expires_at
+        self.hits = 0
+
+class GeminiContextBackend:
+    """Gemini cached content (google-generativeai >= 0.7, `caching` module)"""
+
+    name = "gemini"
+
+    def __init__(self):
+        from google.generativeai import caching  # ImportError on older SDKs
+        self._caching = caching
+
+    def create(self, prefix: str, ttl: int) -> CachedPrefix:
+        import google.generativeai as genai
+        handle = self._caching.CachedContent.create(
+            model=f"models/{settings.GEMINI_MODEL}",
+            contents=[prefix],
+            ttl=timedelta(seconds=ttl)
+        )
+        model = genai.GenerativeModel.from_cached_content(cached_content=handle)
+        return CachedPrefix(handle, model, time.time() + ttl)
+
+    def refresh(self, entry: CachedPrefix, ttl: int) -> None:
+        entry.handle.update(ttl=timedelta(seconds=ttl))
+        entry.expires_at = time.time() + ttl
+
+class _PrefixedModel:
+    """Model stand-in that prepends its prefix locally"""
+
+    def __init__(self, get_model: Callable[[], Any], prefix: str):
+        self._get_model = get_model
+        self._prefix = prefix
+
+    async def generate_content_async(self, suffix: str, **kwargs):
+        return await self._get_model().generate_content_async(join_prompt(self._prefix, suffix), **kwargs)
+
+class LocalContextBackend:
+    """
+    Local stand-in with the same handle lifecycle (create, expire, refresh)
+    that still sends the full prompt; for tests and development.
+    """
+
+    name = "local"
+
+    def __init__(self, get_model: Callable[[], Any]):
+        self._get_model = get_model
+
+    def create(self, prefix: str, ttl: int) -> CachedPrefix:
+        handle = f"local/{hashlib.sha256(prefix.encode()).hexdigest()[:16]}"
+        return CachedPrefix(handle, _PrefixedModel(self._get_model, prefix), time.time() + ttl)
+
+    def refresh(self, entry: CachedPrefix, ttl: int) -> None:
+        entry.expires_at = time.time() + ttl
+
+class ContextCache:
+    """
+    Prefix -> cached content handle, created on first use.
+
+    A prefix the provider refuses to cache (e.g. below its minimum token
+    count) is sent inline, and creation isn't retried for one TTL. Any
+    failure falls back to the full prompt rather than failing the call.
+    """
+
+    def __init__(self, get_model: Callable[[], Any], backend: Optional[str] = None):
+        self._get_model = get_model
+        self.backend_name = backend or settings.LLM_CONTEXT_CACHE_BACKEND
+        self._backend = None
+        self._entries: Dict[str, CachedPrefix] = {}
+        self._refused: Dict[str, float] = {}  # prefix key -> retry after
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {
+            "hits": 0,
+            "created": 0,
+            "refreshed": 0,
+            "inline": 0,
+            "errors": 0,
+            "prefix_chars_saved": 0
+        }
+
+    @property
+    def backend(self):
+        """Lazy-create the backend; None when context caching is off or unsupported"""
+        if self._backend is None and self.backend_name != "off":
+            if self.backend_name == "local":
+                self._backend = LocalContextBackend(self._get_model)
+            else:
+                try:
+                    self._backend = GeminiContextBackend()
+                except ImportError:
+                    print("⚠️ Installed google-generativeai has no context caching; prefixes are sent inline")
+                    self.backend_name = "off"
+        return self._backend
+
+    async def model_for(self, prefix: str) -> Optional[Any]:
+        """
+        A model bound to the cached prefix (send it only the suffix), or
+        None to send the full prompt to the plain model.
+        """
+        backend = self._backend
+        if backend is None and self.backend_name != "off":
+            # First use imports the SDK's caching module
+            backend = await asyncio.to_thread(lambda: self.backend)
+        key = hashlib.sha256(prefix.encode()).hexdigest()
+        if backend is None or self._refused.get(key, 0) > time.time():
+            self.stats["inline"] += 1
+            return None
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            ttl = settings.LLM_CONTEXT_CACHE_TTL
+            try:
+                if entry is None or entry.expires_at <= time.time():
+                    entry = await asyncio.to_thread(backend.create, prefix, ttl)
+                    self._entries[key] = entry
+                    self.stats["created"] += 1
+                elif entry.expires_at - time.time() < settings.LLM_CONTEXT_CACHE_REFRESH_MARGIN:
+                    await asyncio.to_thread(backend.refresh, entry, ttl)
+                    self.stats["refreshed"] += 1
+            except Exception as e:
+                print(f"⚠️ Context cache unavailable for prefix {key[:12]}: {e}")
+                self._entries.pop(key, None)
+                self._refused[key] = time.time() + ttl
+                self.stats["errors"] += 1
+                self.stats["inline"] += 1
+                return None
+
+        entry.hits += 1
+        self.stats["hits"] += 1
+        if backend.name != "local":
+            self.stats["prefix_chars_saved"] += len(prefix)
+        return entry.model
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": self.backend_name,
+            "entries": len(self._entries),
+            "refused": sum(1 for retry_after in self._refused.values() if retry_after > time.time())
+        }
@@ -0,0 +1,270 @@
+"""
+Local static analysis of coding submissions.
+Computes quality metrics from the syntax tree (complexity, nesting, loop
+depth as a Big-O estimate, unused variables, anti-patterns) in a few
+milliseconds, so passing submissions don't need an LLM code review.
+"""
+import ast
+from typing import Any, Callable, Dict, List, Optional
+
+# language -> analyzer(code) -> analysis; see register_analyzer
+ANALYZERS: Dict[str, Callable[[str], Dict[str, Any]]] = {}
+
+def register_analyzer(language: str):
+    """Decorator registering the analyzer for a language"""
+    def decorator(analyzer: Callable[[str], Dict[str, Any]]):
+        ANALYZERS[language] = analyzer
+        return analyzer
+    return decorator
+
+def analyze_code(code: str, language: str) -> Optional[Dict[str, Any]]:
+    """
+    Analysis of a submission, or None when the language has no analyzer.
+
+    Returns:
+        {"metrics", "issues", "code_quality_score", "efficiency_notes"};
+        each issue is shaped like an evaluation mistake
+    """
+    analyzer = ANALYZERS.get((language or "").lower())
+    return analyzer(code) if analyzer else None
+
+# ============= SCORING =============
+
+COMPLEXITY_LIMIT = 10
+NESTING_LIMIT = 3
+
+def _score(metrics: Dict[str, Any], issues: List[Dict[str, Any]]) -> int:
+    """100 minus penalties for complexity, nesting, loop depth and issues"""
+    score = 100
+    score -= 3 * max(0, metrics["cyclomatic_complexity"] - COMPLEXITY_LIMIT)
+    score -= 5 * max(0, metrics["max_nesting_depth"] - NESTING_LIMIT)
+    score -= 10 * max(0, metrics["max_loop_depth"] - 1)
+    score -= sum(8 if issue["mistake_type"] == "major" else 3 for issue in issues)
+    return max(0, min(100, score))
+
+def _big_o(loop_depth: int, sorts: bool) -> str:
+    if loop_depth == 0:
+        return "O(n log n)" if sorts else "O(1)"
+    if loop_depth == 1:
+        return "O(n log n)" if sorts else "O(n)"
+    return f"O(n^{loop_depth})"
+
+def _issue(kind: str, line: int, description: str, suggestion: str, severity: str = "minor") -> Dict[str, Any]:
+    return {
+        "mistake_type": severity,
+        "description": f"Line {line}: {description}",
+        "concept_gap": kind,
+        "suggestion": suggestion
+    }
+
+# ============= PYTHON =============
+
+DECISION_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert, ast.comprehension)
+BLOCK_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try)
+LOOP_NODES = (ast.For, ast.AsyncFor, ast.While, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+SORT_CALLS = {"sorted", "sort", "heapify", "nlargest", "nsmallest"}
+
+class _PythonVisitor(ast.NodeVisitor):
+    """One pass over the tree collecting metrics and anti-patterns"""
+
+    def __init__(self):
+        self.complexity: Dict[str, int] = {"<module>": 1}
+        self.scope = "<module>"
+        self.depth = 0
+        self.loop_depth = 0
+        self.max_depth = 0
+        self.max_loop_depth = 0
+        self.sorts = False
+        self.recursive: List[str] = []
+        self.issues: List[Dict[str, Any]] = []
+
+    def generic_visit(self, node):
+        if isinstance(node, DECISION_NODES):
+            self.complexity[self.scope] += 1
+        elif isinstance(node, ast.BoolOp):
+            self.complexity[self.scope] += len(node.values) - 1
+
+        is_block = isinstance(node, BLOCK_NODES)
+        is_loop = len(node.generators) if hasattr(node, "generators") else isinstance(node, LOOP_NODES)
+        self.depth += is_block
+        self.loop_depth += is_loop
+        self.max_depth = max(self.max_depth, self.depth)
+        self.max_loop_depth = max(self.max_loop_depth, self.loop_depth)
+        super().generic_visit(node)
+        self.depth -= is_block
+        self.loop_depth -= is_loop
+
+    def visit_FunctionDef(self, node):
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                self.issues.append(_issue(
+                    "Mutable default arguments", node.lineno,
+                    f"`{node.name}` has a mutable default argument, shared between calls",
+                    "Default to None and create the list/dict inside the function."
+                ))
+
+        outer = (self.scope, self.depth, self.loop_depth)
+        self.scope = node.name
+        self.complexity[node.name] = 1
+        self.depth = self.loop_depth = 0
+        if any(isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == node.name for n in ast.walk(node)):
+            self.recursive.append(node.name)
+        self.generic_visit(node)
+        self.scope, self.depth, self.loop_depth = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_For(self, node):
+        call = node.iter
+        if (
+            isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id == "range"
+            and len(call.args) == 1 and isinstance(call.args[0], ast.Call)
+            and isinstance(call.args[0].func, ast.Name) and call.args[0].func.id == "len"
+        ):
+            self.issues.append(_issue(
+                "Idiomatic iteration", node.lineno,
+                "loops over range(len(...)) to index a sequence",
+                "Iterate over the sequence directly, or use enumerate() when the index is needed."
+            ))
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node):
+        if node.type is None:
+            self.issues.append(_issue(
+                "Error handling", node.lineno,
+                "bare `except:` also catches KeyboardInterrupt and SystemExit",
+                "Catch the specific exception you expect (e.g. `except ValueError:`)."
+            ))
+        elif len(node.body) == 1 and isinstance(node.body[0], ast.Pass):
+            self.issues.append(_issue(
+                "Error handling", node.lineno,
+                "exception is silently swallowed",
+                "Handle the error or let it propagate instead of `pass`."
+            ))
+        self.generic_visit(node)
+
+    def visit_Compare(self, node):
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                self.issues.append(_issue(
+                    "Identity comparison", node.lineno,
+                    "compares to None with == / !=",
+                    "Use `is None` / `is not None`."
+                ))
+            elif isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and isinstance(right.value, bool):
+                self.issues.append(_issue(
+                    "Boolean expressions", node.lineno,
+                    "compares to True/False explicitly",
+                    "Use the condition directly (`if flag:` / `if not flag:`)."
+                ))
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = node.func.id if isinstance(node.func, ast.Name) else getattr(node.func, "attr", None)
+        if name in SORT_CALLS:
+            self.sorts = True
+        if isinstance(node.func, ast.Name) and name in ("eval", "exec"):
+            self.issues.append(_issue(
+                "Safe evaluation", node.lineno,
+                f"uses {name}() on dynamic input",
+                "Parse the input explicitly (int(), json.loads(), ast.literal_eval()).",
+                severity="major"
+            ))
+        self.generic_visit(node)
+
+    def visit_Global(self, node):
+        self.issues.append(_issue(
+            "Function design", node.lineno,
+            f"modifies global state ({', '.join(node.names)})",
+            "Pass values in as arguments and return results instead."
+        ))
+        self.generic_visit(node)
+
+def _scope_nodes(scope: ast.AST):
+    """Nodes of one scope, not descending into nested functions and lambdas"""
+    pending = list(ast.iter_child_nodes(scope))
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, SCOPE_NODES):
+            pending.extend(ast.iter_child_nodes(node))
+
+def _unused_variables(tree: ast.AST) -> List[Dict[str, Any]]:
+    """Names assigned in a function (or the module) but never read in it"""
+    issues = []
+    for scope in [tree] + [node for node in ast.walk(tree) if isinstance(node, SCOPE_NODES)]:
+        stored: Dict[str, int] = {}
+        loaded = set()
+        for node in _scope_nodes(scope):
+            if isinstance(node, SCOPE_NODES):
+                # Closures may read this scope's variables
+                loaded.update(n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load))
+            elif isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)):
+                # Loop variables are often deliberately unused
+                loaded.update(n.id for n in ast.walk(node.target) if isinstance(n, ast.Name))
+            elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+                loaded.add(node.target.id)
+            elif isinstance(node, ast.Name):
+                if isinstance(node.ctx, ast.Store):
+                    stored.setdefault(node.id, node.lineno)
+                else:
+                    loaded.add(node.id)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                loaded.update(node.names)
+
+        for name, line in sorted(stored.items(), key=lambda item: item[1]):
+            if name.startswith("_") or name in loaded or (scope is tree and name.isupper()):
+                continue
+            issues.append(_issue(
+                "Unused variables", line,
+                f"`{name}` is assigned but never used",
+                "Remove it, or name it `_` if the value is deliberately ignored."
+            ))
+    return issues
+
+@register_analyzer("python")
+def analyze_python(code: str) -> Dict[str, Any]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        issue = _issue("Syntax", e.lineno or 0, f"syntax error: {e.msg}", "Fix the syntax error before submitting.", severity="major")
+        return {
+            "metrics": {"syntax_error": True},
+            "issues": [issue],
+            "code_quality_score": 0,
+            "efficiency_notes": "The code does not parse, so its efficiency can't be estimated."
+        }
+
+    visitor = _PythonVisitor()
+    visitor.visit(tree)
+    issues = visitor.issues + _unused_variables(tree)
+
+    lines = [line for line in code.splitlines() if line.strip() and not line.strip().startswith("#")]
+    metrics = {
+        "syntax_error": False,
+        "lines_of_code": len(lines),
+        "functions": len(visitor.complexity) - 1,
+        "cyclomatic_complexity": max(visitor.complexity.values()),
+        "max_nesting_depth": visitor.max_depth,
+        "max_loop_depth": visitor.max_loop_depth,
+        "recursive_functions": visitor.recursive,
+        "estimated_time_complexity": _big_o(visitor.max_loop_depth, visitor.sorts)
+    }
+
+    loops = {0: "no loops", 1: "a single loop level"}.get(visitor.max_loop_depth, f"{visitor.max_loop_depth} nested loops")
+    notes = [f"Estimated time complexity {metrics['estimated_time_complexity']}"
+             f" ({loops}{', sorting' if visitor.sorts else ''})."]
+    if visitor.recursive:
+        notes.append(f"Recursive: {', '.join(visitor.recursive)}; check the recursion depth and repeated subproblems.")
+    if metrics["cyclomatic_complexity"] > COMPLEXITY_LIMIT:
+        notes.append(f"Cyclomatic complexity {metrics['cyclomatic_complexity']} is high; consider splitting the logic.")
+    if visitor.max_loop_depth >= 2:
+        notes.append("Nested loops may be avoidable with a hash map, sorting or two pointers.")
+
+    return {
+        "metrics": metrics,
+        "issues": issues,
+        "code_quality_score": _score(metrics, issues),
+        "efficiency_notes": " ".join(notes)
+    }
@@ -9,7 +9,7 @@ from app.ai.prompts.question_prompts import (
     get_coding_generation_prompt
 )
 from app.models.schemas import QuestionType, DifficultyLevel
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 class QuestionGenerator:
     """Generates questions using AI based on user context"""
@@ -43,22 +43,24 @@ class QuestionGenerator:
         
         # Select appropriate prompt based on question type
         if question_type == QuestionType.MCQ:
-            prompt = get_mcq_generation_prompt(
+            prefix, prompt = get_mcq_generation_prompt(
                 topic, subtopic, difficulty.value, user_context
             )
         elif question_type == QuestionType.SNIPPET:
-            prompt = get_snippet_generation_prompt(
+            prefix, prompt = get_snippet_generation_prompt(
                 topic, subtopic, difficulty.value, language
             )
         elif question_type == QuestionType.CODING:
-            prompt = get_coding_generation_prompt(
+            prefix, prompt = get_coding_generation_prompt(
                 topic, subtopic, difficulty.value, language
             )
         else:
             raise ValueError(f"Unknown question type: {question_type}")
         
         # Generate question using LLM
-        question_data = await self.llm.generate_json(prompt, temperature=0.8)
+        question_data = await self.llm.generate_json(
+            prompt, temperature=0.8, kind="question_generation", prefix=prefix
+        )
         
         # Add metadata
         question_data["topic"] = topic
@@ -88,6 +90,30 @@ class QuestionGenerator:
             Generated question
         """
         
+        difficulty, question_type = self.plan_adaptive_question(user_progress)
+        
+        # Generate question
+        return await self.generate_question(
+            topic=user_progress.get("topic_name", "Programming"),
+            subtopic=user_progress.get("subtopic_name", "Basics"),
+            difficulty=difficulty,
+            question_type=question_type,
+            user_context={
+                "questions_attempted": user_progress.get("questions_attempted", 0),
+                "accuracy": user_progress.get("accuracy", 0),
+                "weak_areas": user_progress.get("weak_areas", [])
+            }
+        )
+    
+    def plan_adaptive_question(
+        self,
+        user_progress: Dict[str, Any]
+    ) -> Tuple[DifficultyLevel, QuestionType]:
+        """
+        Decide difficulty and question type for the next adaptive question.
+        Pure function of the progress row, so callers can compare plans.
+        """
+        
         # Determine appropriate difficulty based on performance
         accuracy = user_progress.get("accuracy", 0)
         current_difficulty = user_progress.get("current_difficulty", "beginner")
@@ -110,18 +136,7 @@ class QuestionGenerator:
         # Determine question type (mix of MCQ, snippet, coding)
         question_type = self._select_question_type(questions_attempted)
         
-        # Generate question
-        return await self.generate_question(
-            topic=user_progress.get("topic_name", "Programming"),
-            subtopic=user_progress.get("subtopic_name", "Basics"),
-            difficulty=difficulty,
-            question_type=question_type,
-            user_context={
-                "questions_attempted": questions_attempted,
-                "accuracy": accuracy,
-                "weak_areas": user_progress.get("weak_areas", [])
-            }
-        )
+        return difficulty, question_type
     
     def _increase_difficulty(self, current: str) -> DifficultyLevel:
         """Move to next difficulty level"""
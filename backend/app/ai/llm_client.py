@@ -2,17 +2,49 @@
 Gemini LLM client for AI-powered question generation and evaluation.
 Handles all interactions with Google's Gemini API.
 """
-import google.generativeai as genai
 from app.core.config import settings
+from app.services.cassette import Cassette
+from app.ai.circuit_breaker import CircuitBreaker
+from app.ai.context_cache import ContextCache, join_prompt
+from app.ai.response_cache import llm_response_cache
+from app.core.cache import cache
+from collections import deque
 from typing import Dict, Any, Optional
+import asyncio
 import json
+import random
+import time
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)"""
+    
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+    
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None when there are no samples"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank]
+    
+    def samples(self) -> list:
+        return list(self._samples)
+    
+    def __len__(self) -> int:
+        return len(self._samples)
 
 class GeminiClient:
     """Wrapper around Google Gemini API"""
     
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        # The SDK takes ~0.6s to import; it's loaded on first use (or by
+        # the startup warmup) rather than when app.main is imported
+        self._model = None
         
         # Generation config for consistent outputs
         self.generation_config = {
@@ -21,12 +53,55 @@ class GeminiClient:
             "top_k": 40,
             "max_output_tokens": 2048,
         }
+        
+        # Record/replay layer (pass-through unless CASSETTE_MODE is set)
+        self.cassette = Cassette("gemini")
+        
+        # Persistent response cache for deterministic prompt kinds
+        self.response_cache = llm_response_cache
+        self.shared_cache = cache.namespace("llm")
+        
+        # Static prompt prefixes uploaded once as cached content
+        self.context_cache = ContextCache(lambda: self.model)
+        
+        # Fails fast while Gemini is erroring or slow (see circuit_breaker.py)
+        self.breaker = CircuitBreaker("gemini")
+        
+        # Hedged requests: latency of completed calls, latency of primaries
+        # that finished, and estimated latency had no hedge been fired
+        self.latency = LatencyTracker()
+        self.completed_primary_latency = LatencyTracker()
+        self.primary_latency = LatencyTracker()
+        self.hedge_stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0
+        }
+    
+    @property
+    def model(self):
+        """Lazy-load the Gemini SDK and model"""
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        return self._model
+    
+    async def ping(self) -> None:
+        """
+        Cheapest round trip to Gemini (a token count: no generation quota);
+        also loads the SDK and opens the connection. Bypasses caches.
+        """
+        model = await asyncio.to_thread(lambda: self.model)
+        await model.count_tokens_async("ping")
     
     async def generate_content(
         self, 
         prompt: str, 
         temperature: float = 0.7,
-        json_mode: bool = False
+        json_mode: bool = False,
+        kind: str = "default",
+        prefix: Optional[str] = None
     ) -> str:
         """
         Generate content using Gemini.
@@ -35,6 +110,9 @@ class GeminiClient:
             prompt: The prompt to send to the model
             temperature: Controls randomness (0.0 = deterministic, 1.0 = creative)
             json_mode: If True, instructs model to return valid JSON
+            kind: Prompt kind, selects the response cache TTL (see LLM_CACHE_TTLS)
+            prefix: Static instruction preamble sent before the prompt; it is
+                context-cached, so only `prompt` is sent per call
         
         Returns:
             Generated text response
@@ -46,24 +124,188 @@ class GeminiClient:
             if json_mode:
                 prompt = f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON, no markdown or extra text."
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=config
+            full_prompt = join_prompt(prefix, prompt) if prefix else prompt
+            
+            cache_ttl = self.response_cache.ttl_for(kind, temperature)
+            if cache_ttl:
+                cache_key = self.response_cache.make_key(settings.GEMINI_MODEL, full_prompt, config)
+                # Shared layer first (other workers/hosts), then this host's disk cache
+                # (SQLite, so off the event loop)
+                cached = await self.shared_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+                if cached is not None:
+                    await self.shared_cache.set(cache_key, cached, cache_ttl)
+                    return cached
+            
+            text = await self.cassette.play(
+                {"model": settings.GEMINI_MODEL, "prompt": full_prompt, "config": config},
+                lambda: self.breaker.call(lambda: self._hedged_call(prompt, config, prefix))
             )
             
-            return response.text
+            if cache_ttl and self._is_cacheable(text, json_mode):
+                await asyncio.to_thread(self.response_cache.put, cache_key, kind, text, cache_ttl)
+                await self.shared_cache.set(cache_key, text, cache_ttl)
+            
+            return text
         
         except Exception as e:
             print(f"❌ Gemini API Error: {e}")
             raise
     
-    async def generate_json(self, prompt: str, temperature: float = 0.7) -> Dict[str, Any]:
+    async def _call_model(self, prompt: str, config: Dict[str, Any], prefix: Optional[str] = None) -> str:
+        """Single Gemini request; raises if the response has no usable text"""
+        model = self.model
+        if prefix:
+            cached_model = await self.context_cache.model_for(prefix)
+            if cached_model is not None:
+                model = cached_model
+            else:
+                prompt = join_prompt(prefix, prompt)
+        
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=config
+        )
+        return response.text
+    
+    async def _hedged_call(self, prompt: str, config: Dict[str, Any], prefix: Optional[str] = None) -> str:
+        """
+        Call Gemini, firing a duplicate request if the first one is slower
+        than the configured percentile of recent latency.
+        
+        The first valid response wins and the other request is cancelled.
+        Hedges are capped at LLM_HEDGE_BUDGET of all calls. A small share of
+        losing primaries (LLM_HEDGE_SHADOW_RATE) is left to finish so the
+        unhedged tail latency can still be measured.
+        """
+        started = time.perf_counter()
+        self.hedge_stats["calls"] += 1
+        primary = asyncio.create_task(self._call_model(prompt, config, prefix))
+        tasks = [primary]
+        winner: Optional[asyncio.Task] = None
+        
+        # Whatever ends this call (a winner, errors, or the caller being
+        # cancelled, e.g. by the breaker's timeout), no request is left running
+        # except a shadowed losing primary
+        try:
+            delay = self._hedge_delay()
+            if delay is None:
+                text = await primary
+                winner = primary
+                self._record_latency(started, primary_done=True)
+                return text
+            
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                text = primary.result()
+                winner = primary
+                self._record_latency(started, primary_done=True)
+                return text
+            
+            self.hedge_stats["hedged"] += 1
+            hedge = asyncio.create_task(self._call_model(prompt, config, prefix))
+            tasks.append(hedge)
+            
+            pending = {primary, hedge}
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is hedge:
+                            self.hedge_stats["hedge_wins"] += 1
+                        self._record_latency(started, primary_done=task is primary)
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            for task in tasks:
+                if task.done():
+                    continue
+                if winner is not None and task is primary and random.random() < settings.LLM_HEDGE_SHADOW_RATE:
+                    task.add_done_callback(lambda t: self._record_shadow(t, started))
+                else:
+                    task.cancel()
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this call must not hedge"""
+        if not settings.LLM_HEDGE_ENABLED:
+            return None
+        if len(self.latency) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        if self.hedge_stats["hedged"] >= settings.LLM_HEDGE_BUDGET * self.hedge_stats["calls"]:
+            return None
+        
+        threshold = self.latency.percentile(settings.LLM_HEDGE_PERCENTILE)
+        return max(threshold, settings.LLM_HEDGE_MIN_DELAY)
+    
+    def _record_latency(self, started: float, primary_done: bool) -> None:
+        elapsed = time.perf_counter() - started
+        self.latency.record(elapsed)
+        
+        if primary_done:
+            self.primary_latency.record(elapsed)
+            self.completed_primary_latency.record(elapsed)
+            return
+        
+        # The hedge won, so the cancelled primary would have taken longer than
+        # `elapsed`: estimate it from completed primaries that were that slow
+        slower = [x for x in self.completed_primary_latency.samples() if x > elapsed]
+        self.primary_latency.record(sorted(slower)[len(slower) // 2] if slower else elapsed)
+    
+    def _record_shadow(self, task: asyncio.Task, started: float) -> None:
+        """Record how long a losing primary took when left to finish"""
+        if not task.cancelled() and task.exception() is None:
+            self.completed_primary_latency.record(time.perf_counter() - started)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge rate, observed vs. unhedged tail latency and breaker state"""
+        calls = self.hedge_stats["calls"]
+        p99 = self.latency.percentile(99)
+        p99_primary = self.primary_latency.percentile(99)
+        return {
+            **self.hedge_stats,
+            "enabled": settings.LLM_HEDGE_ENABLED,
+            "hedge_rate": round(self.hedge_stats["hedged"] / calls, 4) if calls else 0.0,
+            "p50_latency": self.latency.percentile(50),
+            "p99_latency": p99,
+            "p99_unhedged_estimate": p99_primary,
+            "p99_improvement": round(p99_primary - p99, 4) if p99 is not None and p99_primary is not None else None,
+            "circuit_breaker": self.breaker.get_stats(),
+            "context_cache": self.context_cache.get_stats()
+        }
+    
+    async def generate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        kind: str = "default",
+        prefix: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Generate structured JSON output.
         Automatically parses and validates JSON response.
         """
-        response_text = await self.generate_content(prompt, temperature, json_mode=True)
-        
+        response_text = await self.generate_content(prompt, temperature, json_mode=True, kind=kind, prefix=prefix)
+        return self._parse_json(response_text)
+    
+    def _is_cacheable(self, text: str, json_mode: bool) -> bool:
+        """Never cache empty or, in JSON mode, unparseable responses"""
+        if not text:
+            return False
+        if not json_mode:
+            return True
+        try:
+            self._parse_json(text, log_errors=False)
+            return True
+        except ValueError:
+            return False
+    
+    def _parse_json(self, response_text: str, log_errors: bool = True) -> Dict[str, Any]:
+        """Parse a JSON response, stripping markdown code fences"""
         # Clean markdown code blocks if present
         response_text = response_text.strip()
         if response_text.startswith("```json"):
@@ -76,8 +318,9 @@ class GeminiClient:
         try:
             return json.loads(response_text.strip())
         except json.JSONDecodeError as e:
-            print(f"❌ JSON Parse Error: {e}")
-            print(f"Response: {response_text}")
+            if log_errors:
+                print(f"❌ JSON Parse Error: {e}")
+                print(f"Response: {response_text}")
             raise ValueError("Failed to parse JSON from LLM response")
     
     async def chat(self, messages: list[Dict[str, str]]) -> str:
@@ -1,32 +1,23 @@
 """
 Prompt templates for AI-powered answer evaluation and mistake analysis.
+
+Each builder returns (prefix, suffix): a static, cacheable instruction
+preamble and the per-answer details.
 """
+from typing import Tuple
 
-def get_mistake_analysis_prompt(
-    question: dict,
-    user_answer: str,
-    correct_answer: str,
-    is_correct: bool
-) -> str:
-    """
-    Analyze user's mistake and provide personalized feedback.
-    """
-    
-    if is_correct:
-        return f"""The user answered correctly. Provide brief positive reinforcement.
+CORRECT_ANSWER_PREFIX = """The user answered correctly. Provide brief positive reinforcement.
 
 Return JSON:
-{{
+{
     "mistakes": [],
     "recommended_action": "next_difficulty",
     "detailed_feedback": "Great job! You demonstrated solid understanding of this concept."
-}}"""
-    
-    return f"""You are an expert educator analyzing a student's mistake.
+}"""
 
-**Question**: {question.get('question_text')}
-**Correct Answer**: {correct_answer}
-**User's Answer**: {user_answer}
+MISTAKE_ANALYSIS_PREFIX = """You are an expert educator analyzing a student's mistake.
+
+The question, the correct answer and the user's answer are given at the end.
 
 Analyze the mistake and determine:
 1. **Mistake Type**: minor (small error), major (fundamental misunderstanding), or conceptual (lacks core concept)
@@ -38,41 +29,22 @@ Analyze the mistake and determine:
    - "next_difficulty": User is ready to move forward (if correct)
 
 Return ONLY valid JSON:
-{{
+{
     "mistakes": [
-        {{
+        {
             "mistake_type": "major",
             "description": "What the user did wrong",
             "concept_gap": "The underlying concept they're missing",
             "suggestion": "Specific advice to improve"
-        }}
+        }
     ],
     "recommended_action": "detailed_explanation",
     "detailed_feedback": "Personalized, encouraging feedback explaining the mistake and how to improve"
-}}"""
+}"""
 
+CODE_EVALUATION_PREFIX = """You are an expert code reviewer evaluating a student's solution.
 
-def get_code_evaluation_prompt(
-    question: dict,
-    user_code: str,
-    test_results: list
-) -> str:
-    """
-    Evaluate coding solution quality beyond just pass/fail.
-    """
-    
-    passed_tests = sum(1 for t in test_results if t.get('passed'))
-    total_tests = len(test_results)
-    
-    return f"""You are an expert code reviewer evaluating a student's solution.
-
-**Problem**: {question.get('question_text')}
-**User's Code**:
-```
-{user_code}
-```
-
-**Test Results**: {passed_tests}/{total_tests} tests passed
+The problem, the user's code and the test results are given at the end.
 
 Evaluate:
 1. Correctness (based on test results)
@@ -81,19 +53,58 @@ Evaluate:
 4. Mistakes and improvements
 
 Return ONLY valid JSON:
-{{
-    "is_correct": {str(passed_tests == total_tests).lower()},
+{
+    "is_correct": true only if all tests passed,
     "score": 85,
     "mistakes": [
-        {{
+        {
             "mistake_type": "minor",
             "description": "Issue found",
             "concept_gap": "What to learn",
             "suggestion": "How to fix"
-        }}
+        }
     ],
     "recommended_action": "more_practice",
     "detailed_feedback": "Comprehensive feedback on the solution",
     "code_quality_score": 80,
     "efficiency_notes": "Time/space complexity analysis"
-}}"""
+}"""
+
+def get_mistake_analysis_prompt(
+    question: dict,
+    user_answer: str,
+    correct_answer: str,
+    is_correct: bool
+) -> Tuple[str, str]:
+    """
+    Analyze user's mistake and provide personalized feedback.
+    """
+    
+    if is_correct:
+        return CORRECT_ANSWER_PREFIX, ""
+    
+    return MISTAKE_ANALYSIS_PREFIX, f"""**Question**: {question.get('question_text')}
+**Correct Answer**: {correct_answer}
+**User's Answer**: {user_answer}"""
+
+
+def get_code_evaluation_prompt(
+    question: dict,
+    user_code: str,
+    test_results: list
+) -> Tuple[str, str]:
+    """
+    Evaluate coding solution quality beyond just pass/fail.
+    """
+    
+    passed_tests = sum(1 for t in test_results if t.get('passed'))
+    total_tests = len(test_results)
+    skipped_tests = sum(1 for t in test_results if t.get('skipped'))
+    
+    return CODE_EVALUATION_PREFIX, f"""**Problem**: {question.get('question_text')}
+**User's Code**:
+```
+{user_code}
+```
+
+**Test Results**: {passed_tests}/{total_tests} tests passed{f" ({skipped_tests} not run after an earlier failure)" if skipped_tests else ""}"""
@@ -1,32 +1,18 @@
 """
 Prompt templates for AI question generation.
 These prompts guide the LLM to generate high-quality, educational questions.
+
+Each builder returns (prefix, suffix): the prefix is the static instruction
+preamble, identical on every call and cached by the LLM client; the suffix
+carries the few fields that vary per call.
 """
+from typing import Tuple
 
-def get_mcq_generation_prompt(
-    topic: str,
-    subtopic: str,
-    difficulty: str,
-    user_context: dict
-) -> str:
-    """
-    Generate prompt for MCQ question creation.
-    
-    Args:
-        topic: Main topic (e.g., "Arrays")
-        subtopic: Specific subtopic (e.g., "Two Pointer Technique")
-        difficulty: beginner/intermediate/advanced/expert
-        user_context: User's learning history and weak areas
-    """
-    
-    return f"""You are an expert educator creating a multiple-choice question for a skill-based learning platform.
+MCQ_GENERATION_PREFIX = """You are an expert educator creating a multiple-choice question for a skill-based learning platform.
 
-**Topic**: {topic}
-**Subtopic**: {subtopic}
-**Difficulty**: {difficulty}
-**User Context**: The learner has attempted {user_context.get('questions_attempted', 0)} questions with {user_context.get('accuracy', 0)}% accuracy.
+The topic, subtopic, difficulty and learner context are given at the end.
 
-Create a {difficulty}-level MCQ that:
+Create an MCQ at the requested difficulty that:
 1. Tests conceptual understanding, not just memorization
 2. Has 4 options with only ONE correct answer
 3. Includes plausible distractors (wrong answers that seem reasonable)
@@ -34,13 +20,13 @@ Create a {difficulty}-level MCQ that:
 5. Includes 2-3 progressive hints
 
 Return ONLY valid JSON in this exact format:
-{{
+{
     "question_text": "The question here",
     "options": [
-        {{"id": "a", "text": "Option A", "is_correct": false}},
-        {{"id": "b", "text": "Option B", "is_correct": true}},
-        {{"id": "c", "text": "Option C", "is_correct": false}},
-        {{"id": "d", "text": "Option D", "is_correct": false}}
+        {"id": "a", "text": "Option A", "is_correct": false},
+        {"id": "b", "text": "Option B", "is_correct": true},
+        {"id": "c", "text": "Option C", "is_correct": false},
+        {"id": "d", "text": "Option D", "is_correct": false}
     ],
     "explanation": "Detailed explanation of why B is correct and why others are wrong",
     "hints": [
@@ -49,80 +35,105 @@ Return ONLY valid JSON in this exact format:
         "Third hint - almost gives it away"
     ],
     "xp_reward": 50
-}}"""
+}"""
 
+SNIPPET_GENERATION_PREFIX = """You are an expert programming educator creating a code snippet analysis question.
 
-def get_snippet_generation_prompt(
-    topic: str,
-    subtopic: str,
-    difficulty: str,
-    language: str
-) -> str:
-    """Generate prompt for code snippet question (what does this code do?)"""
-    
-    return f"""You are an expert programming educator creating a code snippet analysis question.
-
-**Topic**: {topic}
-**Subtopic**: {subtopic}
-**Difficulty**: {difficulty}
-**Language**: {language}
+The topic, subtopic, difficulty and language are given at the end.
 
 Create a code snippet question that:
-1. Shows a short, meaningful code snippet (5-15 lines)
+1. Shows a short, meaningful code snippet (5-15 lines) in the requested language
 2. Asks what the code does or what it outputs
-3. Tests understanding of {subtopic} concepts
-4. Is appropriate for {difficulty} level
+3. Tests understanding of the subtopic's concepts
+4. Is appropriate for the requested difficulty level
 
 Return ONLY valid JSON:
-{{
+{
     "question_text": "What does this code output?",
     "code_snippet": "def example():\\n    # code here",
-    "language": "{language}",
+    "language": "the requested language",
     "options": [
-        {{"id": "a", "text": "Output A", "is_correct": false}},
-        {{"id": "b", "text": "Output B", "is_correct": true}},
-        {{"id": "c", "text": "Output C", "is_correct": false}},
-        {{"id": "d", "text": "Output D", "is_correct": false}}
+        {"id": "a", "text": "Output A", "is_correct": false},
+        {"id": "b", "text": "Output B", "is_correct": true},
+        {"id": "c", "text": "Output C", "is_correct": false},
+        {"id": "d", "text": "Output D", "is_correct": false}
     ],
     "explanation": "Step-by-step walkthrough of the code execution",
     "hints": ["Hint 1", "Hint 2"],
     "xp_reward": 75
-}}"""
+}"""
 
+CODING_GENERATION_PREFIX = """You are an expert programming educator creating a coding challenge.
 
-def get_coding_generation_prompt(
-    topic: str,
-    subtopic: str,
-    difficulty: str,
-    language: str
-) -> str:
-    """Generate prompt for coding challenge question"""
-    
-    return f"""You are an expert programming educator creating a coding challenge.
-
-**Topic**: {topic}
-**Subtopic**: {subtopic}
-**Difficulty**: {difficulty}
-**Language**: {language}
+The topic, subtopic, difficulty and language are given at the end.
 
 Create a coding problem that:
 1. Has a clear problem statement
 2. Includes input/output examples
 3. Has 3-5 test cases (including edge cases)
-4. Provides starter code template
-5. Is solvable in {difficulty} level
+4. Provides starter code template in the requested language
+5. Is solvable at the requested difficulty level
 
 Return ONLY valid JSON:
-{{
+{
     "question_text": "Problem description with examples",
-    "language": "{language}",
+    "language": "the requested language",
     "starter_code": "def solution():\\n    # Your code here\\n    pass",
     "test_cases": [
-        {{"input": "test input", "expected_output": "expected result", "is_hidden": false}},
-        {{"input": "edge case", "expected_output": "result", "is_hidden": true}}
+        {"input": "test input", "expected_output": "expected result", "is_hidden": false},
+        {"input": "edge case", "expected_output": "result", "is_hidden": true}
     ],
     "constraints": ["Time: O(n)", "Space: O(1)"],
     "explanation": "Approach and solution explanation",
     "hints": ["Hint 1", "Hint 2", "Hint 3"],
     "xp_reward": 150
-}}"""
+}"""
+
+def get_mcq_generation_prompt(
+    topic: str,
+    subtopic: str,
+    difficulty: str,
+    user_context: dict
+) -> Tuple[str, str]:
+    """
+    Generate prompt for MCQ question creation.
+    
+    Args:
+        topic: Main topic (e.g., "Arrays")
+        subtopic: Specific subtopic (e.g., "Two Pointer Technique")
+        difficulty: beginner/intermediate/advanced/expert
+        user_context: User's learning history and weak areas
+    """
+    
+    return MCQ_GENERATION_PREFIX, f"""**Topic**: {topic}
+**Subtopic**: {subtopic}
+**Difficulty**: {difficulty}
+**User Context**: The learner has attempted {user_context.get('questions_attempted', 0)} questions with {user_context.get('accuracy', 0)}% accuracy."""
+
+
+def get_snippet_generation_prompt(
+    topic: str,
+    subtopic: str,
+    difficulty: str,
+    language: str
+) -> Tuple[str, str]:
+    """Generate prompt for code snippet question (what does this code do?)"""
+    
+    return SNIPPET_GENERATION_PREFIX, f"""**Topic**: {topic}
+**Subtopic**: {subtopic}
+**Difficulty**: {difficulty}
+**Language**: {language}"""
+
+
+def get_coding_generation_prompt(
+    topic: str,
+    subtopic: str,
+    difficulty: str,
+    language: str
+) -> Tuple[str, str]:
+    """Generate prompt for coding challenge question"""
+    
+    return CODING_GENERATION_PREFIX, f"""**Topic**: {topic}
+**Subtopic**: {subtopic}
+**Difficulty**: {difficulty}
+**Language**: {language}"""
@@ -0,0 +1,149 @@
+"""
+Persistent on-disk cache for LLM responses.
+Keyed by model, prompt hash and generation config; survives restarts and
+is shared by workers on the same host (SQLite in WAL mode).
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from app.core.config import settings
+from typing import Dict, Any, Optional
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache with per-prompt-kind TTLs and LRU eviction.
+
+    Only kinds listed in LLM_CACHE_TTLS are cached, and never when the
+    sampling temperature exceeds LLM_CACHE_MAX_TEMPERATURE, so creative
+    generation prompts always reach the model.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "bytes_saved": 0,
+            "evictions": 0,
+            "expired": 0
+        }
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazy-open the database and create the schema"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses(last_access)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, prompt: str, config: Dict[str, Any]) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        config_part = json.dumps(config, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{model}\0{prompt_hash}\0{config_part}".encode()).hexdigest()
+
+    def ttl_for(self, kind: str, temperature: float) -> int:
+        """Seconds to cache this kind of prompt for; 0 means don't cache"""
+        if not settings.LLM_CACHE_ENABLED:
+            return 0
+        if temperature > settings.LLM_CACHE_MAX_TEMPERATURE:
+            return 0
+        return settings.LLM_CACHE_TTLS.get(kind, 0)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response, or None"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, size, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            response, size, expires_at = row
+            if expires_at < now:
+                self.conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self.conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += size
+            return response
+
+    def put(self, key: str, kind: str, response: str, ttl: int) -> None:
+        """Store a response, evicting least recently used entries over the size cap"""
+        now = time.time()
+        size = len(response.encode())
+        with self._lock:
+            previous = self.conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, kind, response, size, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, response, size, now, now + ttl, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict(target=int(self.max_bytes * 0.9))
+
+    def _evict(self, target: int) -> None:
+        """Delete expired entries, then least recently used ones, until under target bytes"""
+        cursor = self.conn.execute("DELETE FROM llm_responses WHERE expires_at < ?", (time.time(),))
+        self.stats["expired"] += cursor.rowcount
+        self._total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+
+        while self._total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT key, size FROM llm_responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self.conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats["evictions"] += 1
+                if self._total_bytes <= target:
+                    break
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        return {
+            **self.stats,
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+# Global LLM response cache instance
+llm_response_cache = LLMResponseCache()
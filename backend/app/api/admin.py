@@ -0,0 +1,275 @@
+"""
+Admin and operations API endpoints.
+Exposes internal service statistics for monitoring and tuning.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.ai.llm_client import gemini_client
+from app.ai.evaluators.answer_evaluator import answer_evaluator
+from app.ai.response_cache import llm_response_cache
+from app.core.cache import cache
+from app.core.rate_limit import rate_limiter
+from app.core.security import require_admin
+from app.core.responses import encoded_responses
+from app.db.supabase_client import supabase_client
+from app.services.prefetch_service import question_prefetcher
+from app.services.question_bank import question_bank
+from app.services.job_queue import job_queue
+from app.services.judge0_service import judge0_service
+from app.core.config import settings
+from app.models.schemas import PregenerateRequest, RecomputeRequest
+from app.services.curriculum_import import KINDS
+from app.services.export_service import FORMATS, ExportRequestError, stream_export, validate_export
+from app.services.analytics_service import attempt_store
+from app.services.idempotency_service import submission_deduplicator
+from app.services.recalibration import TABLES as RECOMPUTE_TABLES
+from typing import Optional
+
+# Every admin route reads or writes through the service-role client
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/stats/prefetch")
+async def get_prefetch_stats():
+    """
+    Adaptive question prefetch counters (hits, misses, wasted, stale).
+    """
+    return question_prefetcher.get_stats()
+
+@router.get("/stats/question-bank")
+async def get_question_bank_stats():
+    """
+    Question bank reuse counters (reused vs generated, exhausted lookups).
+    """
+    return question_bank.get_stats()
+
+@router.get("/stats/llm")
+async def get_llm_stats():
+    """
+    Gemini call latency, hedging statistics and circuit breaker state.
+    """
+    return gemini_client.get_stats()
+
+@router.get("/stats/llm-cache")
+async def get_llm_cache_stats():
+    """
+    Persistent LLM response cache hit rate, bytes saved and size.
+    """
+    return await asyncio.to_thread(llm_response_cache.get_stats)
+
+@router.get("/stats/cache")
+async def get_cache_stats():
+    """
+    Shared cache backend, hit rate and namespace versions.
+    """
+    return cache.get_stats()
+
+@router.get("/stats/responses")
+async def get_response_cache_stats():
+    """
+    Pre-encoded response body cache hit rate and size.
+    """
+    return encoded_responses.get_stats()
+
+@router.get("/stats/loaders")
+async def get_loader_stats():
+    """
+    Batched DB lookups per table: loads, memo hits and average batch size.
+    """
+    return {name: loader.get_stats() for name, loader in supabase_client.loaders.items()}
+
+@router.get("/stats/submissions")
+async def get_submission_stats():
+    """
+    Answer submissions evaluated vs. served from an earlier or concurrent
+    evaluation of the same submission.
+    """
+    return submission_deduplicator.get_stats()
+
+@router.get("/stats/code-review")
+async def get_code_review_stats():
+    """
+    Coding submissions reviewed by the local analyzer alone vs. sent to
+    the LLM (failing or borderline code).
+    """
+    return answer_evaluator.get_stats()
+
+@router.get("/stats/execution")
+async def get_execution_stats():
+    """
+    Test cases run in the Judge0 sandbox vs. skipped after a compile
+    error, an early failure or failing visible tests.
+    """
+    return judge0_service.get_stats()
+
+@router.get("/stats/rate-limits")
+async def get_rate_limit_stats():
+    """
+    Requests allowed and rejected by the rate limiter, per route class.
+    """
+    return rate_limiter.get_stats()
+
+@router.post("/cache/{namespace}/invalidate")
+async def invalidate_cache_namespace(namespace: str):
+    """
+    Drop every key in a shared cache namespace, on all workers.
+    """
+    await cache.invalidate(namespace)
+    return {"namespace": namespace, "version": await cache.version(namespace)}
+
+@router.post("/jobs/pregenerate")
+async def pregenerate_questions(request: PregenerateRequest):
+    """
+    Queue background generation of questions into the bank.
+    Re-submitting with the same idempotency_key returns the existing job.
+    """
+    job_id = await job_queue.enqueue(
+        "pregenerate_questions",
+        request.model_dump(mode="json"),
+        queue="generation",
+        idempotency_key=request.idempotency_key
+    )
+    return {"job_id": job_id}
+
+@router.post("/jobs/import")
+async def import_curriculum(request: Request):
+    """
+    Upload a JSONL/CSV file of courses, topics, subtopics or questions and
+    queue its import (see app/scripts/import_curriculum.py for the format).
+    
+    Multipart form: file, optional kind, optional dry_run. The form is
+    parsed here rather than declared as parameters, so the upload is only
+    read once the router's require_admin has accepted the request.
+    """
+    form = await request.form()
+    file = form.get("file")
+    if file is None or isinstance(file, str):
+        raise HTTPException(status_code=400, detail="Missing file upload")
+    kind = form.get("kind") or None
+    dry_run = str(form.get("dry_run", "false")).lower() in ("1", "true", "yes", "on")
+    
+    filename = os.path.basename(file.filename or "")
+    if not filename.endswith((".jsonl", ".ndjson", ".csv", ".jsonl.gz", ".ndjson.gz", ".csv.gz")):
+        raise HTTPException(status_code=400, detail="Expected a .jsonl, .ndjson or .csv file (optionally .gz)")
+    if kind is not None and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {kind}")
+    
+    # Disk writes go through a thread; the upload may be hundreds of MB
+    await asyncio.to_thread(os.makedirs, settings.IMPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.IMPORT_DIR, f"{uuid.uuid4()}-{filename}")
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(1024 * 1024):
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.remove, path)
+        raise
+    await asyncio.to_thread(f.close)
+    
+    job_id = await job_queue.enqueue(
+        "import_curriculum",
+        {"path": path, "kind": kind, "dry_run": dry_run}
+    )
+    return {"job_id": job_id, "path": path}
+
+@router.post("/jobs/recompute")
+async def recompute_progress(request: RecomputeRequest):
+    """
+    Queue a bulk recompute of accuracy, mastery (and optionally difficulty)
+    on user_progress and levels on user_profiles. A dry run reports counts
+    of the changes it would make.
+    """
+    unknown = [table for table in request.tables or [] if table not in RECOMPUTE_TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(unknown)}")
+    
+    job_id = await job_queue.enqueue("recompute_progress", request.model_dump())
+    return {"job_id": job_id}
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    course_id: Optional[str] = None
+):
+    """
+    Stream question_attempts, user_progress or user_profiles as NDJSON or
+    CSV, optionally filtered by date range [since, until) and course.
+    """
+    try:
+        validate_export(dataset, format, course_id)
+    except ExportRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        stream_export(dataset, format, since, until, course_id),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
+
+@router.get("/analytics/topic-accuracy")
+async def get_topic_accuracy(min_attempts: int = 5, bins: int = 10):
+    """
+    Distribution of learner accuracy per topic (mean, quartiles, histogram)
+    across every learner with at least min_attempts attempts in the topic.
+    """
+    await attempt_store.ensure_fresh()
+    return attempt_store.topic_accuracy(min_attempts=min_attempts, bins=max(bins, 1))
+
+@router.get("/analytics/difficulty-progression")
+async def get_difficulty_progression(topic_id: Optional[str] = None, max_steps: int = 50):
+    """
+    Mean question difficulty and accuracy by attempt number within a topic,
+    across all learners.
+    """
+    await attempt_store.ensure_fresh()
+    return attempt_store.difficulty_progression(topic_id=topic_id, max_steps=max(max_steps, 1))
+
+@router.get("/analytics/question-success")
+async def get_question_success(
+    topic_id: Optional[str] = None,
+    min_attempts: int = 10,
+    limit: int = 50,
+    hardest_first: bool = True
+):
+    """Per-question success rates, hardest first by default"""
+    await attempt_store.ensure_fresh()
+    return attempt_store.question_success(
+        topic_id=topic_id, min_attempts=min_attempts, limit=limit, hardest_first=hardest_first
+    )
+
+@router.post("/analytics/refresh")
+async def refresh_analytics():
+    """Pull attempts recorded since the last refresh into the analytics store"""
+    loaded = await attempt_store.refresh()
+    return {"loaded": loaded, **attempt_store.get_stats()}
+
+@router.get("/stats/analytics")
+async def get_analytics_stats():
+    """
+    Size and freshness of the in-memory attempt store.
+    """
+    return attempt_store.get_stats()
+
+@router.get("/jobs/stats")
+async def get_job_stats():
+    """
+    Queue depth and job latency per queue.
+    """
+    return await job_queue.get_stats()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a background job's status and result"""
+    job = await job_queue.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
@@ -2,40 +2,55 @@
 Course and curriculum API endpoints.
 Provides course catalog, topics, and subtopics.
 """
+import asyncio
 from fastapi import APIRouter, HTTPException
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, encoded_responses, project
 from app.db.supabase_client import supabase_client
 from app.models.schemas import Course
 from typing import List
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Course])
+# Catalog rows are immutable between curriculum imports, so these routes
+# serve pre-encoded bodies from the "catalog" namespace
+
+@router.get("/", response_model=List[Course], response_class=FastJSONResponse)
 async def get_courses():
     """
     Get all available courses.
     """
-    try:
+    async def load():
         courses = await supabase_client.get_courses()
-        return courses
+        return [project(course, Course) for course in courses]
+    
+    try:
+        return await encoded_responses.respond("catalog", "courses", load, settings.CATALOG_CACHE_TTL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{course_id}")
+@router.get("/{course_id}", response_class=FastJSONResponse)
 async def get_course(course_id: str):
     """
     Get specific course with topics.
     """
-    try:
-        course = await supabase_client.client.table("courses").select("*").eq("id", course_id).single().execute()
-        
-        if not course.data:
-            raise HTTPException(status_code=404, detail="Course not found")
-        
-        topics = await supabase_client.get_topics(course_id)
-        
+    async def load():
+        course, topics = await asyncio.gather(
+            supabase_client.get_course(course_id),
+            supabase_client.get_topics(course_id)
+        )
+        if not course:
+            return None
         return {
-            "course": course.data,
+            "course": course,
             "topics": topics
         }
+    
+    try:
+        response = await encoded_responses.respond("catalog", f"course:{course_id}", load, settings.CATALOG_CACHE_TTL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return response
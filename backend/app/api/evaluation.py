@@ -2,17 +2,24 @@
 Answer evaluation API endpoints.
 Handles answer submission, AI evaluation, and feedback generation.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
 from app.models.schemas import AnswerSubmission, EvaluationResult
 from app.ai.evaluators.answer_evaluator import answer_evaluator
 from app.services.progress_service import progress_service
+from app.services.prefetch_service import question_prefetcher
+from app.services.idempotency_service import SubmissionInProgress, submission_deduplicator, submission_key
 from app.db.supabase_client import supabase_client
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
 @router.post("/submit", response_model=dict)
-async def submit_answer(submission: AnswerSubmission):
+async def submit_answer(
+    submission: AnswerSubmission,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
     """
     Submit answer for evaluation.
     
@@ -21,7 +28,26 @@ async def submit_answer(submission: AnswerSubmission):
     2. Evaluate answer using AI
     3. Update user progress
     4. Return evaluation result with feedback
+    
+    Submissions are idempotent: a replay (same Idempotency-Key header or
+    idempotency_key field, or else the same user, question and answer)
+    within a few minutes returns the original result without evaluating
+    again or awarding XP twice.
     """
+    try:
+        result, duplicate = await submission_deduplicator.run(
+            submission_key(submission, idempotency_key),
+            lambda: _evaluate_submission(submission)
+        )
+    except SubmissionInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if duplicate:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def _evaluate_submission(submission: AnswerSubmission) -> dict:
+    """Evaluate once and record progress"""
     try:
         # 1. Get question
         question = await supabase_client.get_question(submission.question_id)
@@ -57,7 +83,14 @@ async def submit_answer(submission: AnswerSubmission):
             recommended_action=evaluation.get("recommended_action", "more_practice")
         )
         
-        # 5. Return comprehensive result
+        # 5. Speculatively generate the learner's next adaptive question
+        question_prefetcher.schedule(
+            submission.user_id,
+            question.get("topic_id"),
+            progress_update["progress"]
+        )
+        
+        # 6. Return comprehensive result
         return {
             "evaluation": evaluation,
             "progress": progress_update["progress"],
@@ -2,11 +2,22 @@
 Progress tracking API endpoints.
 Provides user progress, statistics, and learning analytics.
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from app.core.responses import FastJSONResponse
 from app.db.supabase_client import supabase_client
-from typing import List, Dict
+from app.services import leaderboard_service
+from typing import List, Dict, Optional
 
-router = APIRouter()
+# Progress payloads are plain dicts of DB rows; render them with orjson.
+# The heavy routes return FastJSONResponse directly, which also skips
+# FastAPI's jsonable_encoder pass over every row.
+router = APIRouter(default_response_class=FastJSONResponse)
+
+DASHBOARD_PROGRESS_COLUMNS = (
+    "topic_id, current_difficulty, questions_attempted, questions_correct, "
+    "accuracy, total_xp_earned, mastery_level, last_activity"
+)
 
 @router.get("/user/{user_id}")
 async def get_user_progress(user_id: str):
@@ -14,30 +25,86 @@ async def get_user_progress(user_id: str):
     Get comprehensive user progress across all topics.
     """
     try:
-        # Get user profile
-        profile = await supabase_client.get_user_profile(user_id)
-        
-        # Get progress for all topics
-        all_progress = await supabase_client.client.table("user_progress").select("*").eq("user_id", user_id).execute()
-        
-        # Get recent attempts
-        recent_attempts = await supabase_client.client.table("question_attempts").select("*").eq("user_id", user_id).order("attempted_at", desc=True).limit(10).execute()
+        # Profile, progress for all topics and recent attempts, concurrently
+        profile, all_progress, (recent_attempts, _) = await asyncio.gather(
+            supabase_client.get_user_profile(user_id),
+            supabase_client.get_all_progress(user_id),
+            supabase_client.get_attempts_page(user_id, limit=10)
+        )
         
         return {
             "profile": profile,
-            "topic_progress": all_progress.data,
-            "recent_attempts": recent_attempts.data,
-            "total_questions": sum(p.get("questions_attempted", 0) for p in all_progress.data),
-            "overall_accuracy": sum(p.get("accuracy", 0) for p in all_progress.data) / len(all_progress.data) if all_progress.data else 0
+            "topic_progress": all_progress,
+            "recent_attempts": recent_attempts,
+            "total_questions": sum(p.get("questions_attempted", 0) for p in all_progress),
+            "overall_accuracy": sum(p.get("accuracy", 0) for p in all_progress) / len(all_progress) if all_progress else 0
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def build_dashboard(user_id: str) -> Optional[Dict]:
+    """
+    Everything the dashboard shows, or None if the user doesn't exist.
+    
+    The queries run concurrently, so latency is that of the slowest one.
+    Stats are derived from per-topic progress rows rather than by scanning
+    the attempt history.
+    """
+    profile, topic_progress, (recent_attempts, _), rank = await asyncio.gather(
+        supabase_client.get_user_profile(user_id),
+        supabase_client.get_all_progress(user_id, columns=DASHBOARD_PROGRESS_COLUMNS),
+        supabase_client.get_attempts_page(user_id, limit=5),
+        supabase_client.get_user_rank(user_id)
+    )
+    
+    if not profile:
+        return None
+    
+    attempted = sum(p.get("questions_attempted") or 0 for p in topic_progress)
+    correct = sum(p.get("questions_correct") or 0 for p in topic_progress)
+    
+    return {
+        "profile": {key: profile.get(key) for key in ("id", "full_name", "level", "xp", "streak", "last_activity_date")},
+        "topic_progress": topic_progress,
+        "recent_attempts": recent_attempts,
+        "stats": {
+            "total_attempts": attempted,
+            "correct_attempts": correct,
+            "accuracy": round(correct / attempted * 100, 2) if attempted else 0,
+            "total_xp_earned": sum(p.get("total_xp_earned") or 0 for p in topic_progress),
+            "topics_started": len(topic_progress)
+        },
+        "leaderboard": rank
+    }
+
+@router.get("/dashboard/{user_id}")
+async def get_dashboard(user_id: str):
+    """
+    Get everything the dashboard shows (profile, topic progress, recent
+    attempts, stats and leaderboard position) in one call.
+    """
+    try:
+        dashboard = await build_dashboard(user_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return FastJSONResponse(dashboard)
+
 @router.get("/topic/{user_id}/{topic_id}")
-async def get_topic_progress(user_id: str, topic_id: str):
+async def get_topic_progress(
+    user_id: str,
+    topic_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    include_mistakes: bool = False
+):
     """
-    Get detailed progress for a specific topic.
+    Get detailed progress for a specific topic, with one page of attempts.
+    Pass the returned next_cursor to get the following page.
     """
     try:
         progress = await supabase_client.get_user_progress(user_id, topic_id)
@@ -48,15 +115,54 @@ async def get_topic_progress(user_id: str, topic_id: str):
                 "progress": None
             }
         
-        # Get attempts for this topic
-        attempts = await supabase_client.client.table("question_attempts").select("*").eq("user_id", user_id).eq("topic_id", topic_id).order("attempted_at", desc=True).execute()
+        # Get a page of attempts for this topic
+        attempts, next_cursor = await supabase_client.get_attempts_page(
+            user_id,
+            topic_id=topic_id,
+            cursor=cursor,
+            limit=limit,
+            include_mistakes=include_mistakes
+        )
         
-        return {
+        return FastJSONResponse({
             "progress": progress,
-            "attempts": attempts.data,
-            "total_attempts": len(attempts.data)
-        }
+            "attempts": attempts,
+            "next_cursor": next_cursor,
+            "total_attempts": progress.get("questions_attempted", 0)
+        })
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/attempts/{user_id}")
+async def get_attempt_history(
+    user_id: str,
+    topic_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    include_mistakes: bool = False
+):
+    """
+    Get a user's attempt history, newest first, one page at a time.
+    """
+    try:
+        attempts, next_cursor = await supabase_client.get_attempts_page(
+            user_id,
+            topic_id=topic_id,
+            cursor=cursor,
+            limit=limit,
+            include_mistakes=include_mistakes
+        )
+        
+        return FastJSONResponse({
+            "attempts": attempts,
+            "next_cursor": next_cursor
+        })
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -66,47 +172,73 @@ async def get_leaderboard(limit: int = 10):
     Get top users by XP (leaderboard).
     """
     try:
-        leaderboard = await supabase_client.client.table("user_profiles").select("id, full_name, level, xp, streak").order("xp", desc=True).limit(limit).execute()
+        leaderboard = await supabase_client.get_leaderboard(limit)
         
         return {
-            "leaderboard": leaderboard.data
+            "leaderboard": leaderboard
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/leaderboard/{window}")
+async def get_window_leaderboard(
+    window: str,
+    course_id: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Get top users by XP earned in the current day or week (window: daily |
+    weekly), overall or for one course. offset=1 gives the previous window.
+    """
+    try:
+        return await leaderboard_service.get_board(window, course_id, limit, offset)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/leaderboard/{window}/rank/{user_id}")
+async def get_window_rank(
+    window: str,
+    user_id: str,
+    course_id: Optional[str] = None,
+    offset: int = Query(0, ge=0)
+):
+    """
+    Get a user's position on a daily or weekly leaderboard.
+    """
+    try:
+        return await leaderboard_service.get_rank(user_id, window, course_id, offset)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/stats/{user_id}")
 async def get_user_stats(user_id: str):
     """
     Get detailed statistics and analytics for user.
     """
     try:
-        # Get all attempts
-        attempts = await supabase_client.client.table("question_attempts").select("*").eq("user_id", user_id).execute()
-        
-        # Calculate stats
-        total_attempts = len(attempts.data)
-        correct_attempts = sum(1 for a in attempts.data if a.get("is_correct"))
-        total_xp = sum(a.get("xp_earned", 0) for a in attempts.data)
-        
-        # Mistake analysis
-        all_mistakes = []
-        for attempt in attempts.data:
-            all_mistakes.extend(attempt.get("mistakes", []))
-        
-        # Group by mistake type
-        mistake_counts = {}
-        for mistake in all_mistakes:
-            mistake_type = mistake.get("mistake_type", "unknown")
-            mistake_counts[mistake_type] = mistake_counts.get(mistake_type, 0) + 1
+        # Aggregated in the database; only the recent attempts are fetched
+        stats, (recent_activity, _) = await asyncio.gather(
+            supabase_client.get_user_attempt_stats(user_id),
+            supabase_client.get_attempts_page(user_id, limit=7)
+        )
+        total_attempts = stats["total_attempts"]
+        correct_attempts = stats["correct_attempts"]
         
         return {
             "total_attempts": total_attempts,
             "correct_attempts": correct_attempts,
             "accuracy": (correct_attempts / total_attempts * 100) if total_attempts > 0 else 0,
-            "total_xp_earned": total_xp,
-            "mistake_breakdown": mistake_counts,
-            "recent_activity": attempts.data[-7:] if len(attempts.data) >= 7 else attempts.data
+            "total_xp_earned": stats["total_xp_earned"],
+            "mistake_breakdown": stats["mistake_breakdown"] or {},
+            "recent_activity": recent_activity
         }
     
     except Exception as e:
@@ -3,10 +3,15 @@ Question generation API endpoints.
 Handles AI-powered question generation with adaptive difficulty.
 """
 from fastapi import APIRouter, HTTPException
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, encoded_responses, project
 from app.models.schemas import QuestionRequest, Question
 from app.ai.generators.question_generator import question_generator
+from app.ai.circuit_breaker import LLMUnavailableError
 from app.db.supabase_client import supabase_client
-from typing import Dict
+from app.services.prefetch_service import question_prefetcher
+from app.services.question_bank import question_bank
+from typing import Dict, Optional
 
 router = APIRouter()
 
@@ -16,12 +21,25 @@ async def generate_question(request: QuestionRequest):
     Generate a new question using AI.
     
     This endpoint:
-    1. Gets user's progress for the topic
-    2. Generates personalized question based on performance
-    3. Saves question to database
-    4. Returns question to frontend
+    1. Serves a stored question the user hasn't seen, if the bank has one
+    2. Otherwise gets user's progress for the topic
+    3. Generates personalized question based on performance
+    4. Saves question to database
+    5. Returns question to frontend
     """
     try:
+        # Reuse an existing question from the bank when possible
+        existing = await question_bank.pick(
+            user_id=request.user_id,
+            topic_id=request.topic_id,
+            subtopic_id=request.subtopic_id,
+            difficulty=request.difficulty.value,
+            question_type=request.question_type.value
+        )
+        if existing:
+            question_bank.record_served(request.user_id, existing["id"], reused=True)
+            return existing
+        
         # Get user's progress for this topic
         user_progress = await supabase_client.get_user_progress(
             request.user_id,
@@ -39,33 +57,50 @@ async def generate_question(request: QuestionRequest):
             }
         
         # Get topic details
-        topic = await supabase_client.client.table("topics").select("*").eq("id", request.topic_id).single().execute()
+        topic = await supabase_client.get_topic(request.topic_id) or {}
         
         if request.subtopic_id:
-            subtopic = await supabase_client.client.table("subtopics").select("*").eq("id", request.subtopic_id).single().execute()
-            subtopic_name = subtopic.data.get("name", "General")
+            subtopic = await supabase_client.get_subtopic(request.subtopic_id) or {}
+            subtopic_name = subtopic.get("name", "General")
         else:
             subtopic_name = "General"
         
-        # Generate question using AI
-        question_data = await question_generator.generate_question(
-            topic=topic.data.get("name", "Programming"),
-            subtopic=subtopic_name,
-            difficulty=request.difficulty,
-            question_type=request.question_type,
-            user_context=user_progress,
-            language="python"
-        )
+        async def generate() -> Dict:
+            question_data = await question_generator.generate_question(
+                topic=topic.get("name", "Programming"),
+                subtopic=subtopic_name,
+                difficulty=request.difficulty,
+                question_type=request.question_type,
+                user_context=user_progress,
+                language="python"
+            )
+            question_data["user_id"] = request.user_id
+            question_data["topic_id"] = request.topic_id
+            question_data["subtopic_id"] = request.subtopic_id
+            return question_data
         
-        # Save to database
-        question_data["user_id"] = request.user_id
-        question_data["topic_id"] = request.topic_id
-        question_data["subtopic_id"] = request.subtopic_id
+        # Generate question using AI and save it (regenerating near-duplicates
+        # of questions the user has already seen)
+        try:
+            saved_question = await question_bank.store_generated(
+                request.user_id, await generate(), regenerate=generate
+            )
+        except LLMUnavailableError:
+            saved_question = None
         
-        saved_question = await supabase_client.save_question(question_data)
+        if saved_question is None:
+            return await _serve_degraded(
+                request.user_id,
+                request.topic_id,
+                request.subtopic_id,
+                request.difficulty.value,
+                request.question_type.value
+            )
         
         return saved_question
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating question: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate question: {str(e)}")
@@ -95,31 +130,84 @@ async def generate_adaptive_question(user_id: str, topic_id: str):
                 "topic_name": "Programming"
             }
         
-        # Generate adaptive question
-        question_data = await question_generator.generate_adaptive_question(
-            user_id=user_id,
-            topic_id=topic_id,
-            user_progress=user_progress
-        )
+        # Use the question speculatively prepared after the last submission,
+        # otherwise reuse one from the bank or generate one now
+        question_data = await question_prefetcher.take(user_id, topic_id, user_progress)
+        
+        if question_data is None:
+            try:
+                question_data = await question_prefetcher.prepare(user_id, topic_id, user_progress)
+            except LLMUnavailableError:
+                difficulty, question_type = question_generator.plan_adaptive_question(user_progress)
+                return await _serve_degraded(user_id, topic_id, None, difficulty.value, question_type.value)
         
-        # Save to database
+        # Stored bank questions already have an id
+        if question_data.get("id"):
+            question_bank.record_served(user_id, question_data["id"], reused=True)
+            return question_data
+        
+        async def regenerate() -> Dict:
+            question_data = await question_generator.generate_adaptive_question(
+                user_id=user_id,
+                topic_id=topic_id,
+                user_progress=user_progress
+            )
+            question_data["user_id"] = user_id
+            question_data["topic_id"] = topic_id
+            return question_data
+        
+        # Save to database (regenerating near-duplicates of questions the user has already seen)
         question_data["user_id"] = user_id
         question_data["topic_id"] = topic_id
         
-        saved_question = await supabase_client.save_question(question_data)
+        try:
+            saved_question = await question_bank.store_generated(user_id, question_data, regenerate=regenerate)
+        except LLMUnavailableError:
+            saved_question = None
+        
+        if saved_question is None:
+            difficulty, question_type = question_generator.plan_adaptive_question(user_progress)
+            return await _serve_degraded(user_id, topic_id, None, difficulty.value, question_type.value)
         
         return saved_question
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating adaptive question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{question_id}", response_model=Question)
-async def get_question(question_id: str):
-    """Get a specific question by ID"""
-    question = await supabase_client.get_question(question_id)
+async def _serve_degraded(
+    user_id: str,
+    topic_id: str,
+    subtopic_id: Optional[str],
+    difficulty: str,
+    question_type: str
+) -> Dict:
+    """
+    Serve a stored question when no new one can be generated: the LLM is
+    unavailable (circuit open or timed out), or it keeps producing
+    questions the user has already seen. Never a question the user has
+    already been served; 503 when none is left.
+    """
+    question = await question_bank.pick_fallback(user_id, topic_id, subtopic_id, difficulty, question_type)
     
     if not question:
-        raise HTTPException(status_code=404, detail="Question not found")
+        raise HTTPException(status_code=503, detail="Question generation is temporarily unavailable")
     
+    question_bank.record_served(user_id, question["id"], reused=True)
     return question
+
+@router.get("/{question_id}", response_model=Question, response_class=FastJSONResponse)
+async def get_question(question_id: str):
+    """Get a specific question by ID (stored questions never change, so the body is pre-encoded)"""
+    async def load():
+        question = await supabase_client.get_question(question_id)
+        return project(question, Question) if question else None
+    
+    response = await encoded_responses.respond("questions", question_id, load, settings.QUESTION_CACHE_TTL)
+    
+    if response is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    
+    return response
@@ -2,38 +2,50 @@
 Topic API endpoints.
 Provides topic details and subtopics.
 """
+import asyncio
 from fastapi import APIRouter, HTTPException
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, encoded_responses
 from app.db.supabase_client import supabase_client
 
 router = APIRouter()
 
-@router.get("/{topic_id}")
+@router.get("/{topic_id}", response_class=FastJSONResponse)
 async def get_topic(topic_id: str):
     """
     Get topic details with subtopics.
     """
-    try:
-        topic = await supabase_client.client.table("topics").select("*").eq("id", topic_id).single().execute()
-        
-        if not topic.data:
-            raise HTTPException(status_code=404, detail="Topic not found")
-        
-        subtopics = await supabase_client.get_subtopics(topic_id)
-        
+    async def load():
+        topic, subtopics = await asyncio.gather(
+            supabase_client.get_topic(topic_id),
+            supabase_client.get_subtopics(topic_id)
+        )
+        if not topic:
+            return None
         return {
-            "topic": topic.data,
+            "topic": topic,
             "subtopics": subtopics
         }
+    
+    try:
+        response = await encoded_responses.respond("catalog", f"topic_page:{topic_id}", load, settings.CATALOG_CACHE_TTL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response is None:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    return response
 
-@router.get("/course/{course_id}")
+@router.get("/course/{course_id}", response_class=FastJSONResponse)
 async def get_topics_by_course(course_id: str):
     """
     Get all topics for a course.
     """
-    try:
+    async def load():
         topics = await supabase_client.get_topics(course_id)
         return {"topics": topics}
+    
+    try:
+        return await encoded_responses.respond("catalog", f"course_topics:{course_id}", load, settings.CATALOG_CACHE_TTL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
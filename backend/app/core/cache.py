@@ -0,0 +1,503 @@
+"""
+Shared cache layer for app/db and app/ai.
+One coherent cache with pluggable backends: in-process memory for a single
+worker, or any Redis-protocol server so several uvicorn workers share it.
+"""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+class CacheBackend:
+    """Key/value operations every backend implements (values are JSON-serializable)"""
+
+    name = "base"
+
+    async def start(self, on_invalidate: Callable[[str], None]) -> None:
+        """Connect and subscribe to namespace invalidations"""
+
+    async def close(self) -> None:
+        """Release connections"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add to an integer counter; ttl is applied when the key is created"""
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+# ============= IN-MEMORY BACKEND =============
+
+class InMemoryBackend(CacheBackend):
+    """
+    Process-local LRU dict with per-key expiry. Values are kept as JSON
+    text, like the Redis backend, so every get returns a fresh copy and
+    callers can't mutate what's cached.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (JSON text, expires_at)
+        self._on_invalidate: Optional[Callable[[str], None]] = None
+
+    async def start(self, on_invalidate: Callable[[str], None]) -> None:
+        self._on_invalidate = on_invalidate
+
+    def _get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return json.loads(value)
+
+    def _set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (json.dumps(value), time.monotonic() + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self._get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        for key, value in mapping.items():
+            self._set(key, value, ttl)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        entry = self._data.get(key)
+        if entry is None or (entry[1] is not None and entry[1] < time.monotonic()):
+            self._set(key, amount, ttl)
+            return amount
+        value = json.loads(entry[0]) + amount
+        self._data[key] = (json.dumps(value), entry[1])
+        return value
+
+    async def publish(self, channel: str, message: str) -> None:
+        # Single process: nobody else to tell
+        pass
+
+# ============= REDIS-PROTOCOL BACKEND =============
+
+class RedisError(Exception):
+    """Error reply from the server"""
+
+# Failures that mean "cache unavailable" rather than a bug in the caller
+BACKEND_ERRORS = (OSError, EOFError, asyncio.TimeoutError, RedisError)
+
+class _RedisConnection:
+    """One RESP2 connection (commands are pipelined, replies read in order)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, url: str) -> "_RedisConnection":
+        parsed = urlparse(url)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(parsed.hostname or "localhost", parsed.port or 6379),
+            settings.CACHE_TIMEOUT_SECONDS
+        )
+        conn = cls(reader, writer)
+        try:
+            if parsed.password:
+                await conn.execute("AUTH", parsed.password)
+            db = (parsed.path or "/").lstrip("/")
+            if db and db != "0":
+                await conn.execute("SELECT", db)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _encode(args: Iterable[Any]) -> bytes:
+        parts = []
+        args = [a if isinstance(a, bytes) else str(a).encode() for a in args]
+        parts.append(b"*%d\r\n" % len(args))
+        for arg in args:
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length == -1:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def pipeline(self, commands: List[List[Any]]) -> List[Any]:
+        """
+        Send all commands in one write, then read one reply per command.
+        A stalled server raises asyncio.TimeoutError after CACHE_TIMEOUT_SECONDS;
+        the connection then has replies outstanding and must be dropped.
+        """
+        return await asyncio.wait_for(self._pipeline(commands), settings.CACHE_TIMEOUT_SECONDS)
+
+    async def _pipeline(self, commands: List[List[Any]]) -> List[Any]:
+        self.writer.write(b"".join(self._encode(cmd) for cmd in commands))
+        await self.writer.drain()
+        replies = []
+        error = None
+        for _ in commands:
+            try:
+                replies.append(await self._read_reply())
+            except RedisError as e:
+                error = error or e
+                replies.append(None)
+        if error:
+            raise error
+        return replies
+
+    async def execute(self, *args: Any) -> Any:
+        return (await self.pipeline([list(args)]))[0]
+
+    def close(self) -> None:
+        self.writer.close()
+
+class RedisBackend(CacheBackend):
+    """
+    Backend for any server speaking the Redis protocol (Redis, Valkey,
+    KeyDB, or app.core.resp_server.LocalRedisServer locally). Values are
+    stored as JSON.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: Optional[str] = None, pool_size: Optional[int] = None):
+        self.url = url or settings.REDIS_URL
+        self.pool_size = pool_size or settings.REDIS_POOL_SIZE
+        self._pool: Optional[asyncio.Queue] = None
+        self._opened = 0
+        self._subscriber: Optional[asyncio.Task] = None
+
+    async def start(self, on_invalidate: Callable[[str], None]) -> None:
+        self._pool = asyncio.Queue()
+        self._subscriber = asyncio.create_task(self._listen(on_invalidate))
+
+    async def close(self) -> None:
+        if self._subscriber:
+            self._subscriber.cancel()
+        while self._pool and not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    async def _run(self, commands: List[List[Any]]) -> List[Any]:
+        """Run a pipeline on a pooled connection"""
+        if self._pool is None:
+            self._pool = asyncio.Queue()
+        if self._pool.empty() and self._opened < self.pool_size:
+            self._opened += 1
+            try:
+                conn = await _RedisConnection.open(self.url)
+            except Exception:
+                self._opened -= 1
+                raise
+        else:
+            conn = await self._pool.get()
+
+        try:
+            replies = await conn.pipeline(commands)
+        except RedisError:
+            # All replies were read, the connection is still usable
+            self._pool.put_nowait(conn)
+            raise
+        except BaseException:
+            conn.close()
+            self._opened -= 1
+            raise
+        self._pool.put_nowait(conn)
+        return replies
+
+    async def _listen(self, on_invalidate: Callable[[str], None]) -> None:
+        """Apply invalidations published by other workers, reconnecting on errors"""
+        while True:
+            try:
+                conn = await _RedisConnection.open(self.url)
+                await conn.execute("SUBSCRIBE", INVALIDATION_CHANNEL)
+                while True:
+                    message = await conn._read_reply()
+                    if isinstance(message, list) and message[0] == b"message":
+                        on_invalidate(message[2].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Cache invalidation listener error: {e}")
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def _ttl_args(ttl: Optional[float]) -> List[Any]:
+        return ["PX", int(ttl * 1000)] if ttl else []
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = (await self._run([["GET", key]]))[0]
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self._run([["SET", key, json.dumps(value)] + self._ttl_args(ttl)])
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._run([["DEL", *keys]])
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        raws = (await self._run([["MGET", *keys]]))[0]
+        return {key: json.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        if mapping:
+            await self._run([
+                ["SET", key, json.dumps(value)] + self._ttl_args(ttl)
+                for key, value in mapping.items()
+            ])
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if not ttl:
+            return (await self._run([["INCRBY", key, amount]]))[0]
+        # Create the key with its expiry only if missing, then increment
+        replies = await self._run([["SET", key, 0, "PX", int(ttl * 1000), "NX"], ["INCRBY", key, amount]])
+        return replies[1]
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._run([["PUBLISH", channel, message]])
+
+# ============= FACADE =============
+
+class CacheNamespace:
+    """
+    Keys under one namespace; the whole namespace can be invalidated at once.
+
+    Reads and writes never fail the caller: if the backend is unreachable a
+    get is a miss and a set is dropped (counted in the cache's error stat).
+    """
+
+    def __init__(self, cache: "Cache", name: str):
+        self.cache = cache
+        self.name = name
+
+    async def _prefix(self) -> str:
+        return f"{self.name}:{await self.cache.version(self.name)}:"
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            return await self.cache.backend.get(await self._prefix() + key)
+        except BACKEND_ERRORS as e:
+            self.cache._on_error(e)
+            return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            await self.cache.backend.set(await self._prefix() + key, value, ttl)
+        except BACKEND_ERRORS as e:
+            self.cache._on_error(e)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            prefix = await self._prefix()
+            await self.cache.backend.delete(*(prefix + key for key in keys))
+        except BACKEND_ERRORS as e:
+            self.cache._on_error(e)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        try:
+            prefix = await self._prefix()
+            found = await self.cache.backend.get_many([prefix + key for key in keys])
+        except BACKEND_ERRORS as e:
+            self.cache._on_error(e)
+            return {}
+        return {key[len(prefix):]: value for key, value in found.items()}
+
+    async def set_many(self, mapping: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        try:
+            prefix = await self._prefix()
+            await self.cache.backend.set_many({prefix + key: value for key, value in mapping.items()}, ttl)
+        except BACKEND_ERRORS as e:
+            self.cache._on_error(e)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return await self.cache.backend.incr(await self._prefix() + key, amount, ttl)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Return the cached value, or load, cache (unless None) and return it"""
+        value = await self.get(key)
+        if value is not None:
+            self.cache.stats["hits"] += 1
+            return value
+
+        self.cache.stats["misses"] += 1
+        value = await loader()
+        if value is not None:
+            await self.set(key, value, ttl)
+        return value
+
+    async def get_many_or_set(
+        self,
+        keys: List[str],
+        loader: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ttl: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Batch get_or_set: one get_many, then one loader call for the missing keys"""
+        found = await self.get_many(keys)
+        self.cache.stats["hits"] += len(found)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            self.cache.stats["misses"] += len(missing)
+            loaded = {key: value for key, value in (await loader(missing)).items() if value is not None}
+            if loaded:
+                await self.set_many(loaded, ttl)
+            found.update(loaded)
+        return found
+
+    async def invalidate(self) -> None:
+        await self.cache.invalidate(self.name)
+
+class Cache:
+    """
+    Facade over the configured backend.
+
+    Namespaces are versioned: invalidating one bumps its version (so old
+    keys are simply never read again and expire by TTL) and publishes the
+    new version so every worker switches immediately.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or self._create_backend()
+        self._versions: Dict[str, int] = {}
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+        self._last_error_logged = 0.0
+
+    @staticmethod
+    def _create_backend() -> CacheBackend:
+        if settings.CACHE_BACKEND == "redis":
+            return RedisBackend()
+        if settings.CACHE_BACKEND == "memory":
+            return InMemoryBackend()
+        raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+    async def start(self) -> None:
+        await self.backend.start(self._on_invalidate)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def namespace(self, name: str) -> CacheNamespace:
+        if name not in self._namespaces:
+            self._namespaces[name] = CacheNamespace(self, name)
+        return self._namespaces[name]
+
+    async def version(self, name: str) -> int:
+        """
+        Current version of a namespace (fetched from the backend once).
+        While the backend is unreachable this is 0 and isn't remembered, so
+        the real version is fetched once the backend is back.
+        """
+        if name not in self._versions:
+            try:
+                self._versions[name] = int(await self.backend.get(f"__ns__:{name}") or 0)
+            except BACKEND_ERRORS as e:
+                self._on_error(e)
+                return 0
+        return self._versions[name]
+
+    async def invalidate(self, name: str) -> None:
+        """
+        Bump the namespace version on every worker. If the backend is
+        unreachable only this worker's version moves (other workers keep
+        theirs until their TTLs expire).
+        """
+        self.stats["invalidations"] += 1
+        try:
+            version = await self.backend.incr(f"__ns__:{name}")
+            self._versions[name] = version
+            await self.backend.publish(INVALIDATION_CHANNEL, f"{name}:{version}")
+        except BACKEND_ERRORS as e:
+            self._on_error(e)
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def _on_invalidate(self, message: str) -> None:
+        name, _, version = message.rpartition(":")
+        self._versions[name] = max(self._versions.get(name, 0), int(version))
+
+    def _on_error(self, error: Exception) -> None:
+        self.stats["errors"] += 1
+        now = time.monotonic()
+        if now - self._last_error_logged > 60:
+            self._last_error_logged = now
+            print(f"⚠️ Cache backend error, serving uncached: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "backend": self.backend.name,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "namespace_versions": dict(self._versions)
+        }
+
+# Global shared cache instance
+cache = Cache()
@@ -3,7 +3,7 @@ Application configuration using Pydantic Settings.
 Loads environment variables and provides typed configuration.
 """
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
@@ -13,19 +13,136 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str = "placeholder_key"
     SUPABASE_SERVICE_KEY: str = "placeholder_service_key"
     
+    # Admin API (X-Admin-Key header; admin routes are disabled while unset)
+    ADMIN_API_KEY: str = ""
+    
     # AI Configuration
     GEMINI_API_KEY: str = "placeholder_gemini_key"
     GEMINI_MODEL: str = "gemini-1.5-flash"
     
+    # Persistent LLM Response Cache (TTL seconds per prompt kind; unlisted kinds are not cached)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "llm_cache.sqlite3"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.75
+    LLM_CACHE_TTLS: Dict[str, int] = {
+        "mistake_analysis": 7 * 24 * 3600,
+        "code_evaluation": 24 * 3600
+    }
+    
+    # LLM Timeout and Circuit Breaker
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_ERROR_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    LLM_BREAKER_SLOW_RATE: float = 0.5
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    LLM_BREAKER_HALF_OPEN_PROBES: int = 1
+    
+    # Hedged LLM Requests
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_BUDGET: float = 0.1
+    LLM_HEDGE_SHADOW_RATE: float = 0.05
+    
     # Judge0 Configuration
     JUDGE0_API_URL: str = "https://judge0-ce.p.rapidapi.com"
     JUDGE0_API_KEY: str = "placeholder_judge0_key"
+    JUDGE0_MAX_CONNECTIONS: int = 20
+    JUDGE0_FAIL_FAST: bool = False  # stop a coding submission's run at its first failing test
+    
+    # Code Review (local static analysis; the LLM reviews failing or borderline code)
+    CODE_ANALYSIS_ENABLED: bool = True
+    CODE_REVIEW_MIN_SCORE: int = 70
+    
+    # Record/Replay Cassettes (off | record | replay)
+    CASSETTE_MODE: str = "off"
+    CASSETTE_DIR: str = "cassettes"
+    CASSETTE_REPLAY_LATENCY: bool = False
+    
+    # Adaptive Question Prefetch
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_TTL_SECONDS: int = 600
+    
+    # Question Bank Reuse
+    QUESTION_BANK_ENABLED: bool = True
+    QUESTION_BANK_PAGE_SIZE: int = 200
+    QUESTION_BANK_SEEN_CAPACITY: int = 1000
+    QUESTION_BANK_FALSE_POSITIVE_RATE: float = 0.01
+    QUESTION_BANK_MAX_USERS: int = 10000
+    
+    # Near-Duplicate Question Detection
+    DEDUP_ENABLED: bool = True
+    DEDUP_THRESHOLD: float = 0.7
+    DEDUP_MAX_REGENERATIONS: int = 2
+    
+    # Background Job Queue (worker pool size per named queue)
+    JOB_QUEUE_PATH: str = "jobs.sqlite3"
+    JOB_QUEUE_CONCURRENCY: Dict[str, int] = {"default": 2, "generation": 2}
+    JOB_QUEUE_POLL_SECONDS: float = 1.0
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
+    
+    # Curriculum Import
+    IMPORT_DIR: str = "imports"
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_CONCURRENCY: int = 4
+    EXPORT_PAGE_SIZE: int = 1000
+    RECOMPUTE_CHECKPOINT_PATH: str = "recompute.checkpoint"
+    
+    # Cohort Analytics (columnar attempt store)
+    ANALYTICS_SNAPSHOT_PATH: str = "analytics_attempts.npz"
+    ANALYTICS_REFRESH_SECONDS: int = 300
+    
+    # Shared Cache (memory | redis)
+    CACHE_BACKEND: str = "memory"
+    CACHE_MAX_ENTRIES: int = 10000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_POOL_SIZE: int = 10
+    CACHE_TIMEOUT_SECONDS: float = 0.5  # connect / reply wait before a cache call counts as a miss
+    CATALOG_CACHE_TTL: int = 300
+    QUESTION_CACHE_TTL: int = 3600
+    LEADERBOARD_CACHE_TTL: int = 30
+    LEADERBOARD_BUCKET_RETENTION_DAYS: int = 35
+    SUBMISSION_IDEMPOTENCY_TTL: int = 300
+    SUBMISSION_CLAIM_SECONDS: int = 60
+    ENCODED_RESPONSE_CACHE_SIZE: int = 2000
+    
+    # Rate Limiting (per route class; backend memory | shared)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMITS_PER_MINUTE: Dict[str, int] = {"ai": 10, "execution": 20, "read": 300}
+    RATE_LIMIT_BURST: Dict[str, int] = {"ai": 5, "execution": 10, "read": 60}
+    RATE_LIMIT_IP_MULTIPLIER: int = 5
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 0  # proxies in front of the app that append X-Forwarded-For
     
     # Security
     SECRET_KEY: str = "dev_secret_key_change_in_production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Startup Warmup (pre-open pools, prime caches, ping the LLM before serving)
+    STARTUP_WARMUP: bool = False
+    WARMUP_TIMEOUT_SECONDS: float = 10.0
+    
+    # LLM Context Caching (static prompt prefixes: "gemini", "local" stand-in, or "off")
+    LLM_CONTEXT_CACHE_BACKEND: str = "gemini"
+    LLM_CONTEXT_CACHE_TTL: int = 3600
+    LLM_CONTEXT_CACHE_REFRESH_MARGIN: int = 300
+    
+    # Health Sampling (background dependency probes behind /health/ready)
+    HEALTH_SAMPLE_INTERVAL: float = 15.0
+    HEALTH_SAMPLE_WINDOW: int = 20
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    HEALTH_MAX_ERROR_RATE: float = 0.5
+    HEALTH_MAX_LATENCY: Dict[str, float] = {"supabase": 1.0, "judge0": 2.0, "gemini": 3.0}
+    HEALTH_REQUIRED_DEPENDENCIES: List[str] = ["supabase"]
+    HEALTH_PROBED_DEPENDENCIES: List[str] = []  # probed in addition to the required ones (judge0, gemini are metered)
+    
     # App Configuration
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
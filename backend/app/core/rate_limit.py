@@ -0,0 +1,267 @@
+"""
+Rate limiting for the API.
+Requests are classed by route (AI generation, code execution, reads) and
+limited per user and per client IP with one O(1) check each: token buckets
+in process memory, or sliding-window counters in the shared cache when
+several workers must share one budget. Over-limit requests get a 429 with
+Retry-After.
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from app.core.cache import BACKEND_ERRORS, cache
+from app.core.config import settings
+from typing import Any, Dict, Optional, Tuple
+
+# (method, path) -> route class; other /api paths are "read"
+ROUTE_CLASSES = {
+    ("POST", "/api/questions/generate"): "ai",
+    ("POST", "/api/questions/adaptive"): "ai",
+    ("POST", "/api/evaluation/submit"): "execution"
+}
+
+# Classes limited per user as well as per IP (their bodies carry user_id)
+USER_CLASSES = {"ai", "execution"}
+
+MAX_IDENTITY_BODY = 64 * 1024
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Limit class for a request, or None for unlimited paths (health, docs)"""
+    if not path.startswith("/api/") or path.startswith(("/api/docs", "/api/redoc")):
+        return None
+    return ROUTE_CLASSES.get((method, path.rstrip("/")), "read")
+
+class TokenBuckets:
+    """
+    In-process token buckets: `burst` capacity refilled at `per_minute`.
+    At most max_keys buckets are kept; the least recently used go first
+    (an evicted bucket comes back full).
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def acquire(self, key: str, per_minute: float, burst: float, cost: float = 1.0) -> float:
+        """0 if allowed, else seconds until enough tokens will be available"""
+        now = time.monotonic()
+        rate = per_minute / 60
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def release(self, key: str, cost: float = 1.0) -> None:
+        """Give back tokens taken by an acquire whose request was rejected anyway"""
+        if key in self._buckets:
+            tokens, updated_at = self._buckets[key]
+            self._buckets[key] = (tokens + cost, updated_at)
+
+class SlidingWindowCounters:
+    """
+    Shared sliding-window counters on the cache backend: this and the
+    previous minute's count, weighted by how much of the previous minute
+    is still inside the window. Burst is not modelled; the budget is
+    per_minute requests over any rolling minute (approximately).
+    """
+
+    name = "shared"
+    window = 60.0
+
+    def __init__(self):
+        self.namespace = cache.namespace("ratelimit")
+
+    async def acquire(self, key: str, per_minute: float, burst: float, cost: float = 1.0) -> float:
+        now = time.time()
+        current = int(now // self.window)
+        elapsed = now - current * self.window
+
+        count = await self.namespace.incr(f"{key}:{current}", int(cost), ttl=self.window * 2)
+        previous = await self.namespace.get(f"{key}:{current - 1}") or 0
+        weighted = previous * (1 - elapsed / self.window) + count
+        if weighted <= per_minute:
+            return 0.0
+
+        # Undo so rejected requests don't consume budget
+        await self.release(key, cost)
+        until_next_window = self.window - elapsed
+        if previous:
+            # The previous minute's weight slides out of the window over time
+            return min((weighted - per_minute) / previous * self.window, until_next_window)
+        return until_next_window
+
+    async def release(self, key: str, cost: float = 1.0) -> None:
+        await self.namespace.incr(f"{key}:{int(time.time() // self.window)}", -int(cost))
+
+class RateLimiter:
+    """Limits per route class, plus error stats"""
+
+    def __init__(self, backend: Optional[str] = None):
+        backend = backend or settings.RATE_LIMIT_BACKEND
+        self.store = SlidingWindowCounters() if backend == "shared" else TokenBuckets()
+        self.stats = {"allowed": 0, "limited": 0, "errors": 0}
+        self.limited_by_class: Dict[str, int] = {}
+
+    async def check(self, limit_class: str, identities: Dict[str, str]) -> float:
+        """
+        0 if the request may proceed, else the Retry-After in seconds.
+        `identities` maps a scope ("user", "ip") to its value.
+        """
+        per_minute = settings.RATE_LIMITS_PER_MINUTE.get(limit_class)
+        if not per_minute:
+            return 0.0
+        burst = settings.RATE_LIMIT_BURST.get(limit_class, per_minute)
+
+        wait = 0.0
+        acquired = []
+        try:
+            for scope, identity in identities.items():
+                scale = settings.RATE_LIMIT_IP_MULTIPLIER if scope == "ip" and "user" in identities else 1
+                key = f"{limit_class}:{scope}:{identity}"
+                wait = await self.store.acquire(key, per_minute * scale, burst * scale)
+                if wait:
+                    # Rejected by this scope: refund the ones already charged
+                    for charged in acquired:
+                        await self.store.release(charged)
+                    break
+                acquired.append(key)
+        except BACKEND_ERRORS as e:
+            # Fail open: an unreachable shared store must not take the API down
+            cache._on_error(e)
+            self.stats["errors"] += 1
+            return 0.0
+
+        if wait:
+            self.stats["limited"] += 1
+            self.limited_by_class[limit_class] = self.limited_by_class.get(limit_class, 0) + 1
+        else:
+            self.stats["allowed"] += 1
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": self.store.name,
+            "limited_by_class": self.limited_by_class,
+            "limits": {
+                name: {"per_minute": per_minute, "burst": settings.RATE_LIMIT_BURST.get(name, per_minute)}
+                for name, per_minute in settings.RATE_LIMITS_PER_MINUTE.items()
+            }
+        }
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying rate_limiter to every API request.
+
+    Users are identified by the user_id in the JSON body of the AI and
+    execution routes (the body is buffered and replayed to the app); every
+    request is also limited per client IP (see client_ip), with a larger
+    budget when a user limit applies too, so rotating user_ids doesn't
+    bypass it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limit_class = route_class(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        if limit_class is None or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        identities = {}
+        if limit_class in USER_CLASSES:
+            user_id, receive = await _read_user_id(scope, receive)
+            if user_id:
+                identities["user"] = user_id
+        ip = client_ip(scope)
+        if ip:
+            identities["ip"] = ip
+
+        retry_after = await rate_limiter.check(limit_class, identities)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": f"Rate limit exceeded for {limit_class} requests; retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def client_ip(scope) -> Optional[str]:
+    """
+    The client's address for per-IP limits. Behind RATE_LIMIT_TRUSTED_PROXY_HOPS
+    proxies it's read from X-Forwarded-For (the entry the outermost trusted
+    proxy appended; earlier entries are client-controlled). With no trusted
+    proxies the header is ignored and the socket peer is used. None only
+    when neither gives an address.
+    """
+    hops = settings.RATE_LIMIT_TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for name, value in scope.get("headers") or []
+            if name == b"x-forwarded-for"
+            for address in value.decode("latin-1").split(",")
+            if address.strip()
+        ]
+        if forwarded:
+            return forwarded[-hops] if len(forwarded) >= hops else forwarded[0]
+    client = scope.get("client")
+    return client[0] if client else None
+
+async def _read_user_id(scope, receive):
+    """user_id from a small JSON body, and a receive that replays the body"""
+    headers = dict(scope.get("headers") or [])
+    if not headers.get(b"content-type", b"").startswith(b"application/json"):
+        return None, receive
+    if int(headers.get(b"content-length", b"0") or 0) > MAX_IDENTITY_BODY:
+        return None, receive
+
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body") or size > MAX_IDENTITY_BODY:
+            break
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    user_id = None
+    if size <= MAX_IDENTITY_BODY and not messages[-1].get("more_body"):
+        try:
+            payload = json.loads(b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request"))
+            if isinstance(payload, dict) and isinstance(payload.get("user_id"), str):
+                user_id = payload["user_id"]
+        except ValueError:
+            pass
+    return user_id, replay
@@ -0,0 +1,167 @@
+"""
+Local stand-in for a Redis-protocol server.
+Speaks RESP2 over TCP with the commands RedisBackend sends, so the shared
+cache can be exercised across "workers" without installing Redis.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+class LocalRedisServer:
+    """
+    In-process server for GET, SET (PX, NX), DEL, MGET, INCRBY, PUBLISH,
+    SUBSCRIBE, AUTH, SELECT and PING. Data lives in memory and is lost when
+    the server closes; for development and checks only.
+    """
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self._dbs: Dict[str, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self._subscribers: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Listen (on a free port by default) and return the redis:// URL"""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        auth = f":{self.password}@" if self.password else ""
+        self.url = f"redis://{auth}{host}:{port}/0"
+        return self.url
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+        # Closing the sockets ends each client's read loop
+        handlers = list(self._clients.values())
+        for writer in list(self._clients):
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+
+    # ============= PROTOCOL =============
+
+    @staticmethod
+    def _encode(reply: Any) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-%s\r\n" % str(reply).encode()
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(LocalRedisServer._encode(item) for item in reply)
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        """One command as a list of bulk strings, or None when the client left"""
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError(f"Expected an array, got {line!r}")
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = await reader.readline()
+            data = await reader.readexactly(int(header[1:-2]) + 2)
+            args.append(data[:-2])
+        return args
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = {"db": "0", "authenticated": self.password is None}
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    args = await self._read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if args is None:
+                    break
+                writer.write(self._encode(self._dispatch(args, session, writer)))
+                await writer.drain()
+        except ValueError as e:
+            writer.write(self._encode(Exception(f"ERR Protocol error: {e}")))
+        finally:
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            self._clients.pop(writer, None)
+            writer.close()
+
+    # ============= COMMANDS =============
+
+    def _live(self, db: Dict[bytes, Tuple[bytes, Optional[float]]], key: bytes) -> Optional[bytes]:
+        entry = db.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del db[key]
+            return None
+        return value
+
+    def _dispatch(self, args: List[bytes], session: Dict[str, Any], writer: asyncio.StreamWriter) -> Any:
+        command, args = args[0].upper().decode(), args[1:]
+        if command == "AUTH":
+            if args and args[-1].decode() == self.password:
+                session["authenticated"] = True
+                return "OK"
+            return Exception("WRONGPASS invalid username-password pair")
+        if not session["authenticated"]:
+            return Exception("NOAUTH Authentication required.")
+
+        db = self._dbs.setdefault(session["db"], {})
+        if command == "PING":
+            return "PONG"
+        if command == "SELECT":
+            session["db"] = args[0].decode()
+            return "OK"
+        if command == "GET":
+            return self._live(db, args[0])
+        if command == "MGET":
+            return [self._live(db, key) for key in args]
+        if command == "SET":
+            return self._set(db, args)
+        if command == "DEL":
+            deleted = [key for key in args if self._live(db, key) is not None]
+            for key in deleted:
+                del db[key]
+            return len(deleted)
+        if command == "INCRBY":
+            key = args[0]
+            current = self._live(db, key)
+            try:
+                value = int(current or 0) + int(args[1])
+            except ValueError:
+                return Exception("ERR value is not an integer or out of range")
+            db[key] = (str(value).encode(), db[key][1] if current is not None else None)
+            return value
+        if command == "PUBLISH":
+            channel, message = args
+            receivers = self._subscribers.get(channel, set())
+            for receiver in receivers:
+                receiver.write(self._encode([b"message", channel, message]))
+            return len(receivers)
+        if command == "SUBSCRIBE":
+            for channel in args:
+                self._subscribers.setdefault(channel, set()).add(writer)
+            # One confirmation per channel; only the last goes through the normal reply path
+            for count, channel in enumerate(args[:-1], start=1):
+                writer.write(self._encode([b"subscribe", channel, count]))
+            return [b"subscribe", args[-1], len(args)]
+        return Exception(f"ERR unknown command '{command}'")
+
+    def _set(self, db: Dict[bytes, Tuple[bytes, Optional[float]]], args: List[bytes]) -> Any:
+        key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+        expires_at = None
+        if b"PX" in options:
+            expires_at = time.monotonic() + int(options[options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and self._live(db, key) is not None:
+            return None
+        db[key] = (value, expires_at)
+        return "OK"
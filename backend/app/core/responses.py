@@ -0,0 +1,98 @@
+"""
+Fast JSON response path.
+orjson encoding (when installed), projection of trusted DB rows onto a
+response model without re-validating them, and a cache of pre-encoded
+bodies for immutable objects such as catalog entries and questions.
+"""
+import json
+import time
+from collections import OrderedDict
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from app.core.cache import cache
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+def dumps(content: Any) -> bytes:
+    """Encode to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; use as response_class or return directly"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def project(row: Dict[str, Any], model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Shape a trusted DB row like `model` would (same keys, defaults for
+    missing optional fields) without validating it.
+    """
+    projected = {}
+    for name, field in model.model_fields.items():
+        if name in row:
+            projected[name] = row[name]
+        elif not field.is_required():
+            projected[name] = field.get_default(call_default_factory=True)
+    return projected
+
+class EncodedResponseCache:
+    """
+    Process-local LRU of encoded response bodies.
+
+    Entries are keyed by the shared cache namespace version, so invalidating
+    the namespace (catalog import, question merge) retires them on every
+    worker; the TTL bounds staleness for everything else.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.ENCODED_RESPONSE_CACHE_SIZE
+        self._bodies: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (body, expires_at)
+        self.stats = {"hits": 0, "misses": 0, "bytes_served": 0}
+
+    async def respond(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float
+    ) -> Optional[Response]:
+        """Cached body as a Response, or load and encode it; None if the loader returns None"""
+        cache_key = (namespace, await cache.version(namespace), key)
+        entry = self._bodies.get(cache_key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._bodies.move_to_end(cache_key)
+            self.stats["hits"] += 1
+            self.stats["bytes_served"] += len(entry[0])
+            return Response(content=entry[0], media_type="application/json")
+
+        self.stats["misses"] += 1
+        value = await loader()
+        if value is None:
+            return None
+
+        body = dumps(value)
+        self._bodies[cache_key] = (body, time.monotonic() + ttl)
+        self._bodies.move_to_end(cache_key)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+        return Response(content=body, media_type="application/json")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._bodies),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "orjson": orjson is not None
+        }
+
+# Global encoded response cache instance
+encoded_responses = EncodedResponseCache()
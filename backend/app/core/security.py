@@ -0,0 +1,16 @@
+"""
+Admin API authentication.
+Admin routes read and write through the service-role client (RLS is
+bypassed), so every call must carry the ADMIN_API_KEY in X-Admin-Key.
+"""
+import secrets
+from fastapi import Header, HTTPException
+from app.core.config import settings
+from typing import Optional
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """Dependency rejecting requests without the admin API key (fails closed when unset)"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin API is disabled: ADMIN_API_KEY is not set")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Key header")
@@ -0,0 +1,124 @@
+"""
+Batching loader for point lookups by id.
+Lookups made in the same event-loop tick are combined into one `in_`
+query per table, and results are memoized for the rest of the request.
+"""
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# Per-request memo: (loader name, key) -> future. None outside a request.
+_request_memo: ContextVar[Optional[Dict[tuple, asyncio.Future]]] = ContextVar("request_memo", default=None)
+
+BatchFetch = Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+
+def _forget_failure(memo: Dict[tuple, asyncio.Future], memo_key: tuple, future: asyncio.Future) -> None:
+    """Failed lookups are not memoized, so a retry in the same request refetches"""
+    if future.cancelled() or future.exception() is not None:
+        memo.pop(memo_key, None)
+
+class BatchLoader:
+    """
+    DataLoader-style batcher.
+
+    `load(key)` queues the key and schedules a dispatch with call_soon, so
+    every coroutine that asks for a key before the loop gets back to it
+    shares one fetch. Concurrent lookups of the same key share one future.
+    """
+
+    def __init__(self, name: str, fetch_many: BatchFetch, max_batch_size: int = 100):
+        self.name = name
+        self.fetch_many = fetch_many
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, asyncio.Future] = {}
+        # The loop only holds weak references to tasks; keep in-flight
+        # fetches alive until they finish so their waiters are resolved
+        self._fetches: Set[asyncio.Task] = set()
+        self.stats = {
+            "loads": 0,
+            "memo_hits": 0,
+            "batches": 0,
+            "keys_fetched": 0
+        }
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Row for this key, or None if it doesn't exist"""
+        self.stats["loads"] += 1
+        memo = _request_memo.get()
+        memo_key = (self.name, key)
+        if memo is not None and memo_key in memo:
+            self.stats["memo_hits"] += 1
+            return await asyncio.shield(memo[memo_key])
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending[key] = future
+
+        if memo is not None:
+            memo[memo_key] = future
+            future.add_done_callback(lambda f: _forget_failure(memo, memo_key, f))
+
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: str, value: Optional[Dict[str, Any]]) -> None:
+        """Replace the request's memoized value after a write"""
+        memo = _request_memo.get()
+        if memo is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        memo[(self.name, key)] = future
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        keys = list(batch)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = {key: batch[key] for key in keys[start:start + self.max_batch_size]}
+            task = asyncio.ensure_future(self._fetch(chunk))
+            self._fetches.add(task)
+            task.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, batch: Dict[str, asyncio.Future]) -> None:
+        self.stats["batches"] += 1
+        self.stats["keys_fetched"] += len(batch)
+        try:
+            rows = await self.fetch_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(rows.get(key))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["keys_fetched"] / self.stats["batches"], 2) if self.stats["batches"] else 0.0
+        }
+
+class RequestMemoMiddleware:
+    """ASGI middleware giving each HTTP request its own loader memo"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_memo.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_memo.reset(token)
@@ -0,0 +1,37 @@
+"""
+Keyset (cursor) pagination helpers.
+Cursors are opaque to clients: the sort key of the last row of a page,
+so the next page is an index range scan no matter how deep it is.
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, key: Tuple[str, ...]) -> Dict[str, Any]:
+    """Raises ValueError for a malformed cursor or one missing a key column"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(values, dict) or any(values.get(column) is None for column in key):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def quote_filter_value(value: str) -> str:
+    """Quote a value for a PostgREST or/and filter (timestamps contain reserved characters)"""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def split_page(rows: List[Dict], limit: int, key: Tuple[str, ...]) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Trim a result fetched with limit + 1 rows to the page, and return the
+    cursor for the next page (None on the last page).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor({column: page[-1][column] for column in key})
@@ -2,9 +2,18 @@
 Supabase client initialization and database utilities.
 Provides typed access to Supabase database and auth.
 """
+import asyncio
+from datetime import datetime
 from supabase import create_client, Client
+from postgrest.types import ReturnMethod
 from app.core.config import settings
-from typing import Optional, Dict, Any, List
+from app.core.cache import cache
+from app.db.pagination import decode_cursor, quote_filter_value, split_page
+from app.db.batch_loader import BatchLoader
+from typing import Optional, Dict, Any, List, Tuple
+
+# Attempt history columns; the mistakes JSONB is the bulk of a row and is opt-in
+ATTEMPT_COLUMNS = "id, question_id, topic_id, is_correct, xp_earned, time_taken, recommended_action, attempted_at"
 
 class SupabaseClient:
     """Wrapper around Supabase client with helper methods"""
@@ -12,6 +21,20 @@ class SupabaseClient:
     def __init__(self):
         self._client: Optional[Client] = None
         self._admin_client: Optional[Client] = None
+        
+        # Point lookups by id are batched per table (see app/db/batch_loader.py)
+        self.loaders = {
+            "user_profiles": BatchLoader("user_profiles", lambda ids: self._fetch_by_ids("user_profiles", ids)),
+            "questions": BatchLoader("questions", lambda ids: self._fetch_by_ids(
+                "questions", ids, cache_namespace="questions", ttl=settings.QUESTION_CACHE_TTL
+            )),
+            "topics": BatchLoader("topics", lambda ids: self._fetch_by_ids(
+                "topics", ids, cache_namespace="catalog", cache_prefix="topic:", ttl=settings.CATALOG_CACHE_TTL
+            )),
+            "subtopics": BatchLoader("subtopics", lambda ids: self._fetch_by_ids(
+                "subtopics", ids, cache_namespace="catalog", cache_prefix="subtopic:", ttl=settings.CATALOG_CACHE_TTL
+            ))
+        }
     
     @property
     def client(self) -> Client:
@@ -35,6 +58,51 @@ class SupabaseClient:
             )
         return self._admin_client
     
+    async def _execute(self, query):
+        """
+        Run a query builder off the event loop.
+        
+        The Supabase client is synchronous; running it in a worker thread
+        lets independent queries overlap (asyncio.gather) instead of
+        blocking the loop one after another.
+        """
+        return await asyncio.to_thread(query.execute)
+    
+    async def _fetch_by_ids(
+        self,
+        table: str,
+        ids: List[str],
+        cache_namespace: Optional[str] = None,
+        cache_prefix: str = "",
+        ttl: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """Rows by id with a single `in_` query; with a cache namespace only misses reach the database"""
+        async def load(missing_ids: List[str]) -> Dict[str, Dict]:
+            response = await self._execute(self.client.table(table).select("*").in_("id", missing_ids))
+            return {row["id"]: row for row in response.data}
+        
+        if cache_namespace is None:
+            return await load(ids)
+        
+        async def load_prefixed(keys: List[str]) -> Dict[str, Dict]:
+            rows = await load([key[len(cache_prefix):] for key in keys])
+            return {cache_prefix + row_id: row for row_id, row in rows.items()}
+        
+        found = await cache.namespace(cache_namespace).get_many_or_set(
+            [cache_prefix + row_id for row_id in ids], load_prefixed, ttl
+        )
+        return {key[len(cache_prefix):]: row for key, row in found.items()}
+    
+    async def upsert_rows(self, table: str, rows: List[Dict]) -> None:
+        """Insert or update many rows by id in one request (admin client; catalog tables are read-only under RLS)"""
+        await self._execute(
+            self.admin_client.table(table).upsert(rows, on_conflict="id", returning=ReturnMethod.minimal)
+        )
+    
+    async def ping(self) -> None:
+        """Cheapest round trip to the database (one id from a small public table)"""
+        await self._execute(self.client.table("courses").select("id").limit(1))
+    
     # ============= AUTH METHODS =============
     # Auth methods are handled directly in auth.py router
     
@@ -42,8 +110,7 @@ class SupabaseClient:
     
     async def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """Get user profile with progress stats"""
-        response = self.client.table("user_profiles").select("*").eq("id", user_id).single().execute()
-        return response.data if response.data else None
+        return await self.loaders["user_profiles"].load(user_id)
     
     async def update_user_xp(self, user_id: str, xp_to_add: int) -> Dict:
         """Add XP to user and check for level up"""
@@ -51,13 +118,24 @@ class SupabaseClient:
         new_xp = profile["xp"] + xp_to_add
         new_level = self._calculate_level(new_xp)
         
-        response = self.client.table("user_profiles").update({
+        response = await self._execute(self.client.table("user_profiles").update({
             "xp": new_xp,
             "level": new_level
-        }).eq("id", user_id).execute()
+        }).eq("id", user_id))
         
+        self.loaders["user_profiles"].prime(user_id, response.data[0])
         return response.data[0]
     
+    async def update_user_streak(self, user_id: str, streak: int, last_activity_date: str) -> Dict:
+        """Set the daily streak and the date it was last extended"""
+        response = await self._execute(self.client.table("user_profiles").update({
+            "streak": streak,
+            "last_activity_date": last_activity_date
+        }).eq("id", user_id))
+        
+        self.loaders["user_profiles"].prime(user_id, response.data[0] if response.data else None)
+        return response.data[0] if response.data else {}
+    
     def _calculate_level(self, xp: int) -> int:
         """Calculate level based on XP (exponential curve)"""
         # Level formula: level = floor(sqrt(xp / 100))
@@ -66,49 +144,269 @@ class SupabaseClient:
     
     # ============= COURSE/TOPIC METHODS =============
     
+    # Catalog reads go through the shared "catalog" cache namespace; the
+    # catalog only changes on curriculum imports, which invalidate it
+    
     async def get_courses(self) -> List[Dict]:
         """Get all available courses"""
-        response = self.client.table("courses").select("*").execute()
-        return response.data
+        async def load():
+            response = await self._execute(self.client.table("courses").select("*"))
+            return response.data
+        return await cache.namespace("catalog").get_or_set("courses", load, settings.CATALOG_CACHE_TTL)
+    
+    async def get_course(self, course_id: str) -> Optional[Dict]:
+        """Get course by ID"""
+        async def load():
+            response = await self._execute(self.client.table("courses").select("*").eq("id", course_id).limit(1))
+            return response.data[0] if response.data else None
+        return await cache.namespace("catalog").get_or_set(f"course:{course_id}", load, settings.CATALOG_CACHE_TTL)
     
     async def get_topics(self, course_id: str) -> List[Dict]:
         """Get topics for a course"""
-        response = self.client.table("topics").select("*").eq("course_id", course_id).order("order").execute()
-        return response.data
+        async def load():
+            response = await self._execute(self.client.table("topics").select("*").eq("course_id", course_id).order("order"))
+            return response.data
+        return await cache.namespace("catalog").get_or_set(f"topics:{course_id}", load, settings.CATALOG_CACHE_TTL)
+    
+    async def get_topic(self, topic_id: str) -> Optional[Dict]:
+        """Get topic by ID"""
+        return await self.loaders["topics"].load(topic_id)
+    
+    async def get_subtopic(self, subtopic_id: str) -> Optional[Dict]:
+        """Get subtopic by ID"""
+        return await self.loaders["subtopics"].load(subtopic_id)
     
     async def get_subtopics(self, topic_id: str) -> List[Dict]:
         """Get subtopics for a topic"""
-        response = self.client.table("subtopics").select("*").eq("topic_id", topic_id).order("order").execute()
-        return response.data
+        async def load():
+            response = await self._execute(self.client.table("subtopics").select("*").eq("topic_id", topic_id).order("order"))
+            return response.data
+        return await cache.namespace("catalog").get_or_set(f"subtopics:{topic_id}", load, settings.CATALOG_CACHE_TTL)
     
     # ============= QUESTION METHODS =============
     
     async def save_question(self, question_data: Dict) -> Dict:
         """Save generated question to database"""
-        response = self.client.table("questions").insert(question_data).execute()
+        response = await self._execute(self.client.table("questions").insert(question_data))
         return response.data[0]
     
     async def get_question(self, question_id: str) -> Optional[Dict]:
         """Get question by ID"""
-        response = self.client.table("questions").select("*").eq("id", question_id).single().execute()
-        return response.data if response.data else None
+        return await self.loaders["questions"].load(question_id)
+    
+    async def get_question_ids(
+        self,
+        topic_id: str,
+        difficulty: str,
+        question_type: str,
+        subtopic_id: Optional[str] = None,
+        after_id: Optional[str] = None,
+        limit: int = 200
+    ) -> List[str]:
+        """Get ids of stored questions matching the filters, in id order"""
+        query = self.client.table("questions").select("id")\
+            .eq("topic_id", topic_id)\
+            .eq("difficulty", difficulty)\
+            .eq("question_type", question_type)
+        
+        if subtopic_id:
+            query = query.eq("subtopic_id", subtopic_id)
+        if after_id:
+            query = query.gt("id", after_id)
+        
+        response = await self._execute(query.order("id").limit(limit))
+        return [row["id"] for row in response.data]
+    
+    async def get_questions_page(
+        self,
+        columns: str = "*",
+        topic_id: Optional[str] = None,
+        question_type: Optional[str] = None,
+        after_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[Dict]:
+        """Get one page of questions in id order (keyset on id)"""
+        query = self.client.table("questions").select(columns)
+        
+        if topic_id:
+            query = query.eq("topic_id", topic_id)
+        if question_type:
+            query = query.eq("question_type", question_type)
+        if after_id:
+            query = query.gt("id", after_id)
+        
+        response = await self._execute(query.order("id").limit(limit))
+        return response.data
+    
+    async def merge_questions(self, canonical_id: str, duplicate_ids: List[str]) -> None:
+        """Repoint attempts from duplicate questions to the canonical one, then delete the duplicates"""
+        await self._execute(self.admin_client.table("question_attempts").update({
+            "question_id": canonical_id
+        }).in_("question_id", duplicate_ids))
+        
+        await self._execute(self.admin_client.table("questions").delete().in_("id", duplicate_ids))
+        # Bump the namespace rather than deleting keys so pre-encoded
+        # question bodies on every worker are retired too
+        await cache.namespace("questions").invalidate()
+    
+    async def get_export_page(
+        self,
+        table: str,
+        columns: str,
+        date_column: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        topic_ids: Optional[List[str]] = None,
+        after_id: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Dict]:
+        """Keyset page of any learner table in id order, for exports (admin client: all users)"""
+        query = self.admin_client.table(table).select(columns)
+        
+        if since:
+            query = query.gte(date_column, since)
+        if until:
+            query = query.lt(date_column, until)
+        if topic_ids is not None:
+            query = query.in_("topic_id", topic_ids)
+        if after_id:
+            query = query.gt("id", after_id)
+        
+        response = await self._execute(query.order("id").limit(limit))
+        return response.data
+    
+    async def get_question_difficulties(self, question_ids: List[str], chunk_size: int = 200) -> Dict[str, str]:
+        """Difficulty by question id, in chunked `in_` queries run concurrently (admin client)"""
+        chunks = [question_ids[i:i + chunk_size] for i in range(0, len(question_ids), chunk_size)]
+        responses = await asyncio.gather(*(
+            self._execute(self.admin_client.table("questions").select("id, difficulty").in_("id", chunk))
+            for chunk in chunks
+        ))
+        return {row["id"]: row["difficulty"] for response in responses for row in response.data}
+    
+    async def get_seen_question_ids(self, user_id: str) -> List[str]:
+        """Get ids of questions already served to or attempted by a user"""
+        attempted, generated = await asyncio.gather(
+            self._execute(self.client.table("question_attempts").select("question_id").eq("user_id", user_id)),
+            self._execute(self.client.table("questions").select("id").eq("user_id", user_id))
+        )
+        
+        question_ids = {row["question_id"] for row in attempted.data if row.get("question_id")}
+        question_ids.update(row["id"] for row in generated.data)
+        return list(question_ids)
     
     # ============= PROGRESS METHODS =============
     
     async def get_user_progress(self, user_id: str, topic_id: str) -> Optional[Dict]:
         """Get user's progress for a specific topic"""
-        response = self.client.table("user_progress").select("*").eq("user_id", user_id).eq("topic_id", topic_id).single().execute()
+        response = await self._execute(self.client.table("user_progress").select("*").eq("user_id", user_id).eq("topic_id", topic_id).single())
         return response.data if response.data else None
     
+    async def get_all_progress(self, user_id: str, columns: str = "*") -> List[Dict]:
+        """Get user's progress rows for every topic started"""
+        response = await self._execute(self.client.table("user_progress").select(columns).eq("user_id", user_id))
+        return response.data
+    
     async def update_progress(self, progress_data: Dict) -> Dict:
         """Update user progress after question attempt"""
-        response = self.client.table("user_progress").upsert(progress_data).execute()
+        response = await self._execute(self.client.table("user_progress").upsert(progress_data))
         return response.data[0]
     
     async def save_attempt(self, attempt_data: Dict) -> Dict:
         """Save question attempt with evaluation"""
-        response = self.client.table("question_attempts").insert(attempt_data).execute()
+        response = await self._execute(self.client.table("question_attempts").insert(attempt_data))
         return response.data[0]
+    
+    async def get_attempts_page(
+        self,
+        user_id: str,
+        topic_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        include_mistakes: bool = False
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get a page of a user's attempts, newest first.
+        
+        Keyset pagination on (attempted_at, id), served by the
+        idx_question_attempts_user_* indexes.
+        
+        Returns:
+            (attempts, next_cursor); next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        columns = ATTEMPT_COLUMNS + (", mistakes" if include_mistakes else "")
+        query = self.client.table("question_attempts").select(columns).eq("user_id", user_id)
+        
+        if topic_id:
+            query = query.eq("topic_id", topic_id)
+        if cursor:
+            position = decode_cursor(cursor, ("attempted_at", "id"))
+            attempted_at = quote_filter_value(position["attempted_at"])
+            last_id = quote_filter_value(position["id"])
+            query = query.or_(
+                f"attempted_at.lt.{attempted_at},"
+                f"and(attempted_at.eq.{attempted_at},id.lt.{last_id})"
+            )
+        
+        response = await self._execute(query.order("attempted_at", desc=True).order("id", desc=True).limit(limit + 1))
+        return split_page(response.data, limit, ("attempted_at", "id"))
+    
+    async def get_leaderboard(self, limit: int = 10) -> List[Dict]:
+        """Get top users by XP (briefly cached; XP changes constantly)"""
+        async def load():
+            response = await self._execute(self.client.table("user_profiles").select("id, full_name, level, xp, streak").order("xp", desc=True).limit(limit))
+            return response.data
+        return await cache.namespace("leaderboard").get_or_set(f"top:{limit}", load, settings.LEADERBOARD_CACHE_TTL)
+    
+    async def get_user_rank(self, user_id: str) -> Optional[Dict]:
+        """Get user's leaderboard position ({rank, total_users}) via the get_user_rank SQL function"""
+        response = await self._execute(self.client.rpc("get_user_rank", {"p_user_id": user_id}))
+        return response.data[0] if response.data else None
+    
+    async def get_user_attempt_stats(self, user_id: str) -> Dict:
+        """Attempt totals and mistake counts by type, aggregated by the get_user_attempt_stats SQL function"""
+        response = await self._execute(self.client.rpc("get_user_attempt_stats", {"p_user_id": user_id}))
+        return response.data[0] if response.data else {
+            "total_attempts": 0, "correct_attempts": 0, "total_xp_earned": 0, "mistake_breakdown": {}
+        }
+    
+    # ============= WINDOWED LEADERBOARD METHODS =============
+    # Backed by per-user XP buckets (xp_buckets); see database_schema.sql
+    
+    async def increment_xp_buckets(
+        self, user_id: str, course_id: Optional[str], xp: int, at: Optional[datetime] = None
+    ) -> None:
+        """Add XP to the user's day and week buckets (current, or those containing `at`), overall and for the course"""
+        params = {"p_user_id": user_id, "p_course_id": course_id, "p_xp": xp}
+        if at is not None:
+            params["p_at"] = at.isoformat()
+        await self._execute(self.admin_client.rpc("increment_xp_buckets", params))
+    
+    async def get_window_leaderboard(self, period: str, bucket_start: str, scope: str, limit: int = 10) -> List[Dict]:
+        """Top users of one day/week board (briefly cached, like the all-time board)"""
+        async def load():
+            response = await self._execute(self.client.rpc("get_window_leaderboard", {
+                "p_period": period, "p_bucket_start": bucket_start, "p_scope": scope, "p_limit": limit
+            }))
+            return response.data
+        return await cache.namespace("leaderboard").get_or_set(
+            f"{period}:{bucket_start}:{scope}:{limit}", load, settings.LEADERBOARD_CACHE_TTL
+        )
+    
+    async def get_window_rank(self, period: str, bucket_start: str, scope: str, user_id: str) -> Optional[Dict]:
+        """User's position on one day/week board ({rank, total_users, xp}; rank None without XP in the window)"""
+        response = await self._execute(self.client.rpc("get_window_rank", {
+            "p_period": period, "p_bucket_start": bucket_start, "p_scope": scope, "p_user_id": user_id
+        }))
+        return response.data[0] if response.data else None
+    
+    async def prune_xp_buckets(self, before: str) -> int:
+        """Delete buckets whose window ended before the given date; returns rows deleted"""
+        response = await self._execute(self.admin_client.rpc("prune_xp_buckets", {"p_before": before}))
+        return response.data or 0
 
 # Global Supabase client instance
 supabase_client = SupabaseClient()
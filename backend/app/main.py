@@ -2,10 +2,21 @@
 Main FastAPI application entry point.
 Configures routers, middleware, and startup/shutdown events.
 """
+from datetime import datetime, timedelta
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api import auth, course, topic, question, evaluation, progress
+from app.api import auth, course, topic, question, evaluation, progress, admin
+from app.core.cache import cache
+from app.core.rate_limit import RateLimitMiddleware
+from app.db.batch_loader import RequestMemoMiddleware
+from app.services.job_queue import job_queue
+from app.services.health_sampler import health_sampler
+from app.services.judge0_service import judge0_service
+from app.services.leaderboard_service import schedule_prune
+from app.services.warmup import run_warmup
+from app.services import job_handlers  # noqa: F401 - registers job handlers
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -16,6 +27,10 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Per-user and per-IP limits on AI, code execution and read routes
+# (added before CORS so 429 responses still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS Configuration - Allow frontend to communicate with backend
 app.add_middleware(
     CORSMiddleware,
@@ -25,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request memo for batched DB lookups
+app.add_middleware(RequestMemoMiddleware)
+
 # Include API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(course.router, prefix="/api/courses", tags=["Courses"])
@@ -32,6 +50,7 @@ app.include_router(topic.router, prefix="/api/topics", tags=["Topics"])
 app.include_router(question.router, prefix="/api/questions", tags=["Questions"])
 app.include_router(evaluation.router, prefix="/api/evaluation", tags=["Evaluation"])
 app.include_router(progress.router, prefix="/api/progress", tags=["Progress"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
@@ -56,14 +75,36 @@ async def health_check():
         "judge0_configured": settings.JUDGE0_API_KEY != "placeholder_judg",
     }
 
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 while a required dependency is down or unsampled.
+    Served from the background sampler's cached results, with no I/O.
+    """
+    report = health_sampler.readiness()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
     print("🚀 SkillForge LMS API starting up...")
     # Initialize AI services, database connections, etc.
+    await cache.start()
+    await job_queue.start()
+    # Daily pruning of expired leaderboard buckets (idempotent per day)
+    await schedule_prune()
+    await schedule_prune(datetime.utcnow().date() + timedelta(days=1))
+    # Pre-open pools, prime caches and ping the LLM before serving
+    if settings.STARTUP_WARMUP:
+        await run_warmup()
+    await health_sampler.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     print("👋 SkillForge LMS API shutting down...")
     # Close connections, cleanup resources
+    await health_sampler.stop()
+    await job_queue.stop()
+    await judge0_service.close()
+    await cache.close()
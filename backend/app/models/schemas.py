@@ -92,6 +92,22 @@ class QuestionRequest(BaseModel):
     difficulty: DifficultyLevel
     question_type: QuestionType
 
+class PregenerateRequest(BaseModel):
+    """Request to fill the question bank ahead of demand"""
+    topic_id: str
+    subtopic_id: Optional[str] = None
+    difficulty: DifficultyLevel
+    question_type: QuestionType
+    count: int = Field(default=5, ge=1, le=50)
+    language: str = "python"
+    idempotency_key: Optional[str] = None
+
+class RecomputeRequest(BaseModel):
+    """Request to recompute derived progress fields in bulk"""
+    tables: Optional[List[str]] = None  # user_progress, user_profiles; default both
+    difficulty: bool = False
+    dry_run: bool = False
+
 class MCQOption(BaseModel):
     id: str
     text: str
@@ -136,6 +152,9 @@ class AnswerSubmission(BaseModel):
     # For Coding
     code_solution: Optional[str] = None
     language: Optional[str] = None
+    
+    # Replays with the same key return the first result (see app/services/idempotency_service.py)
+    idempotency_key: Optional[str] = None
 
 class MistakeAnalysis(BaseModel):
     mistake_type: MistakeType
@@ -179,3 +198,29 @@ class LevelUp(BaseModel):
     xp_required: int
     rewards: List[str]
     message: str
+
+# ============= IMPORT MODELS =============
+# Curriculum import records: the API models with ids optional (derived
+# deterministically when absent) and DB-defaulted columns defaulted
+
+class CourseImport(Course):
+    id: Optional[str] = None
+    description: str = ""
+    icon: Optional[str] = None
+    color: str = "from-cyan-500 to-blue-600"
+    total_topics: int = 0
+    estimated_hours: int = 0
+
+class TopicImport(Topic):
+    id: Optional[str] = None
+    description: str = ""
+    estimated_minutes: int = 30
+
+class SubtopicImport(Subtopic):
+    id: Optional[str] = None
+    description: str = ""
+
+class QuestionImport(Question):
+    id: Optional[str] = None
+    subtopic_id: Optional[str] = None
+    xp_reward: int = 50
@@ -0,0 +1,93 @@
+"""
+Loading check for the analytics attempt store.
+Feeds synthetic attempts in pages ordered by random UUID id (as iter_rows
+and export files deliver them), then an incremental pass that re-reads
+the overlap window, and checks every attempt is held exactly once.
+
+Usage:
+    python -m app.scripts.check_analytics_load
+    python -m app.scripts.check_analytics_load --attempts 20000 --page-size 1000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.services.analytics_service import REFRESH_OVERLAP, AttemptStore
+from typing import Any, Dict, List, Optional
+
+def make_attempts(count: int, start: datetime, span: timedelta) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": f"user-{random.randrange(50)}",
+            "topic_id": f"topic-{random.randrange(5)}",
+            "question_id": f"question-{random.randrange(300)}",
+            "is_correct": random.random() < 0.6,
+            "xp_earned": random.choice([0, 50, 75]),
+            "time_taken": random.randrange(5, 300),
+            "attempted_at": (start + span * random.random()).isoformat()
+        }
+        for _ in range(count)
+    ]
+
+def load_pages(store: AttemptStore, rows: List[Dict[str, Any]], page_size: int) -> int:
+    """One load in id order, as refresh() runs it"""
+    rows = sorted(rows, key=lambda row: row["id"])
+    skip_before = store._skip_before()
+    loaded = sum(store.append_rows(rows[i:i + page_size], skip_before) for i in range(0, len(rows), page_size))
+    store._finish_load()
+    return loaded
+
+def held_ids_once(store: AttemptStore, expected: int) -> Optional[str]:
+    held = len(store._compact()["user"])
+    return None if held == expected else f"holds {held} attempts, expected {expected}"
+
+def main(attempts: int, page_size: int) -> bool:
+    now = datetime.now(timezone.utc)
+    history = make_attempts(attempts, now - timedelta(days=30), timedelta(days=30))
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AttemptStore(snapshot_path=os.path.join(tmp, "snapshot.npz"))
+        loaded = load_pages(store, history, page_size)
+        if loaded != attempts:
+            failures.append(f"full load kept {loaded} of {attempts} attempts")
+
+        # Incremental pass: the server returns everything since the overlap
+        # horizon, which includes rows already held
+        newer = make_attempts(attempts // 10, now, timedelta(minutes=30))
+        horizon = datetime.fromtimestamp(store.watermark, tz=timezone.utc) - REFRESH_OVERLAP
+        overlap = [row for row in history if datetime.fromisoformat(row["attempted_at"]) >= horizon]
+        loaded = load_pages(store, overlap + newer, page_size)
+        if loaded != len(newer):
+            failures.append(f"incremental load added {loaded} attempts, expected {len(newer)}")
+        failure = held_ids_once(store, attempts + len(newer))
+        if failure:
+            failures.append(f"after incremental load: {failure}")
+
+        path = os.path.join(tmp, "question_attempts.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in sorted(history, key=lambda row: row["id"]):
+                f.write(json.dumps(row) + "\n")
+        from_file = AttemptStore(snapshot_path=os.path.join(tmp, "file.npz"))
+        loaded = from_file.load_ndjson(path)
+        if loaded != attempts:
+            failures.append(f"ndjson load kept {loaded} of {attempts} attempts")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ {attempts} attempts loaded in pages of {page_size}, incremental pass de-duplicated")
+    return not failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check attempts survive paged loads in id order")
+    parser.add_argument("--attempts", type=int, default=4000, help="Synthetic attempts to load")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per page")
+    args = parser.parse_args()
+
+    if not main(args.attempts, args.page_size):
+        raise SystemExit(1)
@@ -0,0 +1,153 @@
+"""
+Behaviour check for the shared cache backends.
+Runs the same operations against InMemoryBackend and RedisBackend, the
+latter on a local RESP2 stand-in (or a real server with --redis-url), and
+checks that invalidations reach a second worker over pub/sub.
+
+Usage:
+    python -m app.scripts.check_cache_backends
+    python -m app.scripts.check_cache_backends --redis-url redis://localhost:6379/1
+"""
+import argparse
+import asyncio
+import uuid
+from app.core.cache import Cache, CacheBackend, InMemoryBackend, RedisBackend, RedisError
+from app.core.resp_server import LocalRedisServer
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+TTL = 0.2
+
+async def check_backend(backend: CacheBackend) -> List[Tuple[str, Optional[str]]]:
+    """(check, failure or None) for each key/value operation"""
+    run = uuid.uuid4().hex[:8]
+    key = lambda name: f"check:{run}:{name}"
+    results = []
+
+    async def check(name: str, body: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await body()
+            results.append((name, None))
+        except Exception as e:
+            results.append((name, f"{type(e).__name__}: {e}"))
+
+    async def round_trip():
+        value = {"id": "q1", "tags": ["a", "b"], "score": 1.5, "ok": True, "none": None}
+        await backend.set(key("value"), value)
+        assert await backend.get(key("value")) == value
+        assert await backend.get(key("missing")) is None
+
+    async def copies():
+        await backend.set(key("copy"), {"items": [1]})
+        (await backend.get(key("copy")))["items"].append(2)
+        assert await backend.get(key("copy")) == {"items": [1]}
+
+    async def expiry():
+        await backend.set(key("ttl"), "soon gone", ttl=TTL)
+        assert await backend.get(key("ttl")) == "soon gone"
+        await asyncio.sleep(TTL * 1.5)
+        assert await backend.get(key("ttl")) is None
+
+    async def batch():
+        await backend.set_many({key("m1"): 1, key("m2"): [2]}, ttl=60)
+        found = await backend.get_many([key("m1"), key("m2"), key("m3")])
+        assert found == {key("m1"): 1, key("m2"): [2]}, found
+        assert await backend.get_many([]) == {}
+
+    async def counters():
+        assert await backend.incr(key("count")) == 1
+        assert await backend.incr(key("count"), 4) == 5
+        assert await backend.get(key("count")) == 5
+        assert await backend.incr(key("window"), ttl=TTL) == 1
+        assert await backend.incr(key("window"), ttl=TTL) == 2
+        await asyncio.sleep(TTL * 1.5)
+        assert await backend.incr(key("window"), ttl=TTL) == 1
+
+    async def deletes():
+        await backend.set_many({key("d1"): 1, key("d2"): 2})
+        await backend.delete(key("d1"), key("d2"), key("never-set"))
+        assert await backend.get_many([key("d1"), key("d2")]) == {}
+
+    async def error_replies():
+        if not isinstance(backend, RedisBackend):
+            return
+        await backend.set(key("text"), "not a number")
+        try:
+            await backend.incr(key("text"))
+        except RedisError:
+            pass
+        else:
+            raise AssertionError("INCRBY on a string should fail")
+        # The error reply was read in full, so the pooled connection still works
+        assert await backend.get(key("text")) == "not a number"
+
+    for name, body in [
+        ("get/set round trip", round_trip),
+        ("get returns a copy", copies),
+        ("ttl expiry", expiry),
+        ("get_many/set_many", batch),
+        ("incr with and without ttl", counters),
+        ("delete", deletes),
+        ("error replies keep the connection", error_replies)
+    ]:
+        await check(name, body)
+    return results
+
+async def check_invalidation(first: Cache, second: Cache) -> Optional[str]:
+    """Invalidating a namespace on one cache must hide its keys on the other"""
+    name = f"check-{uuid.uuid4().hex[:8]}"
+    await first.namespace(name).set("key", "stale")
+    if await second.namespace(name).get("key") != "stale":
+        return "second worker doesn't see the first worker's write"
+
+    await first.namespace(name).invalidate()
+    for _ in range(50):
+        if await second.namespace(name).get("key") is None:
+            return None
+        await asyncio.sleep(0.02)
+    return "second worker still reads the invalidated key after 1 s"
+
+def report(title: str, results: List[Tuple[str, Optional[str]]]) -> bool:
+    print(f"\n{title}")
+    for name, failure in results:
+        print(f"  {'❌' if failure else '✅'} {name}{f': {failure}' if failure else ''}")
+    return all(failure is None for _, failure in results)
+
+async def main(redis_url: Optional[str]) -> bool:
+    ok = report("memory", await check_backend(InMemoryBackend(max_entries=1000)))
+
+    memory = Cache(InMemoryBackend(max_entries=1000))
+    await memory.start()
+    ok &= report("memory invalidation", [("namespace invalidation", await check_invalidation(memory, memory))])
+
+    server = None
+    if redis_url is None:
+        server = LocalRedisServer(password="check")
+        redis_url = await server.start()
+
+    first, second = Cache(RedisBackend(redis_url, pool_size=2)), Cache(RedisBackend(redis_url, pool_size=2))
+    try:
+        await first.start()
+        await second.start()
+        # Let both subscribers connect before anything is published
+        await asyncio.sleep(0.2)
+        label = "redis (local stand-in)" if server else f"redis ({redis_url})"
+        ok &= report(label, await check_backend(first.backend))
+        ok &= report(f"{label} invalidation", [
+            ("invalidation reaches another worker", await check_invalidation(first, second))
+        ])
+    finally:
+        await first.close()
+        await second.close()
+        if server:
+            await server.close()
+
+    print("\n✅ All cache checks passed" if ok else "\n❌ Some cache checks failed")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the in-memory and Redis cache backends behave the same")
+    parser.add_argument("--redis-url", default=None, help="Server to check instead of the local stand-in")
+    args = parser.parse_args()
+
+    if not asyncio.run(main(args.redis_url)):
+        raise SystemExit(1)
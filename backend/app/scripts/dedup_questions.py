@@ -0,0 +1,75 @@
+"""
+Bank-wide near-duplicate detection for stored questions.
+Streams the questions table in id order, clusters near-duplicates per
+(topic, question type) and optionally merges each cluster into its first
+question.
+
+Usage:
+    python -m app.scripts.dedup_questions            # report only
+    python -m app.scripts.dedup_questions --apply    # merge duplicates
+"""
+import argparse
+import asyncio
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.dedup_index import DedupIndex
+from typing import Dict, List
+
+PAGE_SIZE = 500
+
+async def find_duplicate_clusters(threshold: float) -> Dict[str, List[str]]:
+    """Map each canonical question id to the ids of its near-duplicates"""
+    index = DedupIndex(threshold=threshold)
+    clusters: Dict[str, List[str]] = {}
+    after_id = None
+    scanned = 0
+
+    while True:
+        page = await supabase_client.get_questions_page(
+            columns="id, topic_id, question_type, question_text, code_snippet, options",
+            after_id=after_id,
+            limit=PAGE_SIZE
+        )
+
+        for question in page:
+            scope = (question.get("topic_id"), question.get("question_type"))
+            signature = index.signature(question)
+            match = index.find_duplicate(scope, question, signature)
+
+            if match:
+                clusters.setdefault(match[0], []).append(question["id"])
+            else:
+                index.add(scope, question["id"], question, signature)
+
+        scanned += len(page)
+        if len(page) < PAGE_SIZE:
+            break
+        after_id = page[-1]["id"]
+        print(f"   scanned {scanned} questions...")
+
+    print(f"✅ Scanned {scanned} questions, {len(clusters)} clusters with duplicates")
+    return clusters
+
+async def main(apply: bool, threshold: float) -> None:
+    clusters = await find_duplicate_clusters(threshold)
+    duplicates = sum(len(ids) for ids in clusters.values())
+
+    for canonical_id, duplicate_ids in clusters.items():
+        print(f"{canonical_id}: {len(duplicate_ids)} duplicate(s) {', '.join(duplicate_ids)}")
+
+    if not apply:
+        print(f"Dry run: {duplicates} duplicate questions would be merged (use --apply)")
+        return
+
+    for canonical_id, duplicate_ids in clusters.items():
+        await supabase_client.merge_questions(canonical_id, duplicate_ids)
+
+    print(f"✅ Merged {duplicates} duplicate questions")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect and merge near-duplicate questions")
+    parser.add_argument("--apply", action="store_true", help="Merge duplicates instead of only reporting them")
+    parser.add_argument("--threshold", type=float, default=settings.DEDUP_THRESHOLD, help="Minimum estimated similarity")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.apply, args.threshold))
@@ -0,0 +1,59 @@
+"""
+Export learner data for analytics.
+Streams a table page by page to a file (gzipped if the name ends in .gz)
+or stdout, so memory stays flat for any number of rows.
+
+Usage:
+    python -m app.scripts.export_data question_attempts --since 2024-01-01 -o attempts.ndjson.gz
+    python -m app.scripts.export_data user_progress --format csv --course-id <uuid> -o progress.csv
+"""
+import argparse
+import asyncio
+import gzip
+import sys
+import time
+from datetime import datetime
+from app.core.config import settings
+from app.services.export_service import DATASETS, FORMATS, stream_export
+from typing import Optional
+
+async def main(
+    dataset: str,
+    format: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    course_id: Optional[str],
+    output: Optional[str],
+    page_size: int
+) -> None:
+    if output is None:
+        out = sys.stdout.buffer
+    elif output.endswith(".gz"):
+        out = gzip.open(output, "wb")
+    else:
+        out = open(output, "wb")
+
+    started = time.perf_counter()
+    written = 0
+    try:
+        async for chunk in stream_export(dataset, format, since, until, course_id, page_size):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+    print(f"✅ Exported {dataset} ({written} bytes) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a learner table as NDJSON or CSV")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only rows at or after this date/time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Only rows before this date/time")
+    parser.add_argument("--course-id", help="Only rows for topics of this course")
+    parser.add_argument("-o", "--output", help="Output file (.gz to compress); stdout if omitted")
+    parser.add_argument("--page-size", type=int, default=settings.EXPORT_PAGE_SIZE, help="Rows per keyset page")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dataset, args.format, args.since, args.until, args.course_id, args.output, args.page_size))
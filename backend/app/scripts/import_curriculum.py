@@ -0,0 +1,56 @@
+"""
+Bulk import of courses, topics, subtopics and pre-authored questions.
+Streams each file, validates records, upserts them in batches and
+checkpoints progress; re-running after an interruption resumes.
+
+Records may reference parents by id (course_id, topic_id, subtopic_id) or
+by name (course, topic, subtopic); records without an id get one derived
+from their natural key, so re-importing a file updates rather than
+duplicates. Invalid records are written to <file>.rejects.jsonl.
+
+Usage:
+    python -m app.scripts.import_curriculum courses.csv --kind course
+    python -m app.scripts.import_curriculum curriculum.jsonl          # records carry "kind"
+    python -m app.scripts.import_curriculum questions.jsonl.gz --kind question --dry-run
+"""
+import argparse
+import asyncio
+import time
+from app.core.config import settings
+from app.services.curriculum_import import KINDS, import_file
+from typing import List, Optional
+
+async def main(paths: List[str], kind: Optional[str], batch_size: int, concurrency: int, resume: bool, dry_run: bool) -> None:
+    for path in paths:
+        started = time.perf_counter()
+        stats = await import_file(
+            path,
+            kind=kind,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            resume=resume,
+            dry_run=dry_run
+        )
+        elapsed = time.perf_counter() - started
+        rate = stats["read"] / elapsed if elapsed else 0.0
+
+        print(f"✅ {path}: {stats['imported']} imported, {stats['rejected']} rejected, "
+              f"{stats['skipped']} already done ({elapsed:.1f}s, {rate:.0f} records/s)")
+        for table, rows in stats["tables"].items():
+            print(f"   {table}: {rows} rows written")
+        if stats["rejected"]:
+            print(f"   rejected records: {path}.rejects.jsonl")
+        if dry_run:
+            print("   Dry run: nothing was written")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import curriculum and questions from JSONL/CSV files")
+    parser.add_argument("paths", nargs="+", help=".jsonl/.ndjson/.csv files, optionally gzipped; imported in order")
+    parser.add_argument("--kind", choices=sorted(KINDS), help="Record kind for every record (required for CSV)")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE, help="Rows per upsert request")
+    parser.add_argument("--concurrency", type=int, default=settings.IMPORT_CONCURRENCY, help="Upsert requests in flight")
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoints and import from the start")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.paths, args.kind, args.batch_size, args.concurrency, not args.restart, args.dry_run))
@@ -0,0 +1,52 @@
+"""
+Import-time profile of the API.
+Imports a module in a fresh interpreter with `-X importtime` and lists
+the slowest imports by cumulative time, to keep worker cold starts fast.
+
+Usage:
+    python -m app.scripts.profile_imports
+    python -m app.scripts.profile_imports --module app.main --top 30 --min-ms 5
+"""
+import argparse
+import subprocess
+import sys
+from typing import List, Tuple
+
+def profile(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) per import, in import order"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+def main(module: str, top: int, min_ms: float) -> None:
+    imports = profile(module)
+    total = next((cumulative for name, _, cumulative in imports if name == module), 0)
+    print(f"{module}: {total / 1000:.0f} ms to import, {len(imports)} modules\n")
+
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    slowest = sorted(imports, key=lambda entry: entry[2], reverse=True)
+    for name, self_us, cumulative_us in slowest[:top]:
+        if cumulative_us / 1000 < min_ms:
+            break
+        print(f"{cumulative_us / 1000:13.1f} {self_us / 1000:8.1f}  {name}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the slowest imports of a module")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Number of imports to list")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Hide imports faster than this")
+    args = parser.parse_args()
+
+    main(args.module, args.top, args.min_ms)
@@ -0,0 +1,65 @@
+"""
+Recompute derived progress fields for the whole user base.
+Re-applies the accuracy and mastery formulas to user_progress and the
+level formula to user_profiles after a formula change, writing only rows
+that differ. Re-running after an interruption resumes.
+
+Usage:
+    python -m app.scripts.recompute_progress --dry-run --diff changes.ndjson   # report only
+    python -m app.scripts.recompute_progress                                   # apply
+    python -m app.scripts.recompute_progress --table user_progress --difficulty
+"""
+import argparse
+import asyncio
+import sys
+from app.core.config import settings
+from app.services.recalibration import TABLES, recompute_all
+from typing import Any, Dict, List, Optional
+
+def report(stats: Dict[str, Any]) -> None:
+    print(f"   {stats['table']}: {stats['scanned']} scanned, {stats['changed']} changed "
+          f"({stats['rows_per_second']} rows/s)", file=sys.stderr)
+
+async def main(
+    tables: Optional[List[str]],
+    difficulty: bool,
+    page_size: int,
+    dry_run: bool,
+    resume: bool,
+    diff_path: Optional[str]
+) -> None:
+    diff_file = open(diff_path, "w", encoding="utf-8") if diff_path else None
+    try:
+        results = await recompute_all(
+            tables,
+            difficulty=difficulty,
+            page_size=page_size,
+            dry_run=dry_run,
+            resume=resume,
+            diff_file=diff_file,
+            on_progress=report
+        )
+    finally:
+        if diff_file is not None:
+            diff_file.close()
+
+    for stats in results:
+        fields = ", ".join(f"{field}: {count}" for field, count in sorted(stats["fields"].items())) or "none"
+        resumed = f", resumed after {stats['resumed_after']}" if stats["resumed_after"] else ""
+        print(f"✅ {stats['table']}: {stats['changed']} of {stats['scanned']} rows changed, "
+              f"{stats['written']} written in {stats['seconds']}s{resumed} (fields changed: {fields})")
+    if dry_run:
+        print("   Dry run: nothing was written" + (f"; row diffs in {diff_path}" if diff_path else ""))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute accuracy, mastery, difficulty and levels in bulk")
+    parser.add_argument("--table", action="append", choices=sorted(TABLES), help="Table to recompute (repeatable; default all)")
+    parser.add_argument("--difficulty", action="store_true",
+                        help="Also apply one step of the automatic difficulty rule to user_progress")
+    parser.add_argument("--page-size", type=int, default=settings.EXPORT_PAGE_SIZE, help="Rows per page and upsert")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first row")
+    parser.add_argument("--diff", help="Write one JSON line per changed row (before/after) to this file")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.table, args.difficulty, args.page_size, args.dry_run, not args.restart, args.diff))
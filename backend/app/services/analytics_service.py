@@ -0,0 +1,413 @@
+"""
+Cohort-wide learning analytics.
+Attempts are held as columnar NumPy arrays (ids interned to integer codes)
+and aggregated with vectorized group-bys, so queries over millions of
+attempts take milliseconds instead of per-user Python loops.
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.export_service import iter_rows
+from app.services.progress_service import DIFFICULTY_LEVELS
+from typing import Any, Dict, Iterable, List, Optional
+
+# Re-read this much history on incremental refreshes; rows written late
+# (clock skew, slow transactions) are picked up and de-duplicated by id
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+def _parse_timestamp(value: Optional[str]) -> float:
+    if not value:
+        return np.nan
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+class _Interner:
+    """Maps string ids to dense integer codes"""
+
+    def __init__(self, ids: Iterable[str] = ()):
+        self.ids: List[str] = list(ids)
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.ids)}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.ids)
+            self.ids.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class AttemptStore:
+    """
+    Columnar copy of question_attempts.
+
+    Loaded from a snapshot file when present, then kept current with
+    incremental reads of attempts newer than the last one seen. New rows
+    are appended in chunks and concatenated lazily on the next query.
+    """
+
+    COLUMNS = {
+        "user": np.int32,
+        "topic": np.int32,
+        "question": np.int32,
+        "correct": np.bool_,
+        "xp": np.int32,
+        "time_taken": np.float32,
+        "attempted_at": np.float64
+    }
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self.snapshot_path = snapshot_path or settings.ANALYTICS_SNAPSHOT_PATH
+        self.users = _Interner()
+        self.topics = _Interner()
+        self.questions = _Interner()
+        self.question_difficulty = np.empty(0, dtype=np.int8)  # by question code, -1 unknown
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._derived: Dict[str, Any] = {}  # sort orders reused until the next compaction
+        self._overlap_ids: Dict[str, float] = {}  # attempt id -> attempted_at, within the overlap window
+        self.watermark: Optional[float] = None
+        self._newest: Optional[float] = None  # newest attempted_at appended; becomes the watermark when a load completes
+        self.refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._loaded_snapshot = False
+
+    # ============= LOADING =============
+
+    def append_rows(self, rows: List[Dict[str, Any]], skip_before: Optional[float] = None) -> int:
+        """
+        Append attempt rows (export/DB shape); returns how many were new.
+
+        Rows older than skip_before are already held. Pages arrive in id
+        order, not time order, so the caller fixes skip_before for a whole
+        load (see _skip_before) and calls _finish_load after the last page.
+        """
+        fresh = []
+        for row in rows:
+            attempted_at = _parse_timestamp(row.get("attempted_at"))
+            if skip_before is not None and attempted_at < skip_before:
+                continue
+            if row["id"] in self._overlap_ids:
+                continue
+            fresh.append((row, attempted_at))
+
+        if not fresh:
+            return 0
+
+        chunk = {
+            "user": np.fromiter((self.users.code(r.get("user_id")) for r, _ in fresh), np.int32, len(fresh)),
+            "topic": np.fromiter((self.topics.code(r.get("topic_id")) for r, _ in fresh), np.int32, len(fresh)),
+            "question": np.fromiter((self.questions.code(r.get("question_id")) for r, _ in fresh), np.int32, len(fresh)),
+            "correct": np.fromiter((bool(r.get("is_correct")) for r, _ in fresh), np.bool_, len(fresh)),
+            "xp": np.fromiter((r.get("xp_earned") or 0 for r, _ in fresh), np.int32, len(fresh)),
+            "time_taken": np.fromiter(
+                (np.nan if r.get("time_taken") is None else r["time_taken"] for r, _ in fresh), np.float32, len(fresh)
+            ),
+            "attempted_at": np.fromiter((at for _, at in fresh), np.float64, len(fresh))
+        }
+        self._chunks.append(chunk)
+
+        newest = float(np.nanmax(chunk["attempted_at"])) if not np.all(np.isnan(chunk["attempted_at"])) else None
+        if newest is not None and (self._newest is None or newest > self._newest):
+            self._newest = newest
+        # The final horizon is at least this one, so rows below it are never
+        # needed; ids held from earlier loads are pruned only in _finish_load,
+        # as later pages of this load may still repeat them
+        horizon = (self._newest or 0) - REFRESH_OVERLAP.total_seconds()
+        for row, attempted_at in fresh:
+            if attempted_at >= horizon:
+                self._overlap_ids[row["id"]] = attempted_at
+        return len(fresh)
+
+    def _skip_before(self) -> Optional[float]:
+        """Threshold for one load: rows older than this were held before it started"""
+        return None if self.watermark is None else self.watermark - REFRESH_OVERLAP.total_seconds()
+
+    def _finish_load(self) -> None:
+        """Advance the watermark past the load and forget ids outside the new overlap window"""
+        self.watermark = self._newest
+        horizon = (self._newest or 0) - REFRESH_OVERLAP.total_seconds()
+        self._overlap_ids = {k: v for k, v in self._overlap_ids.items() if v >= horizon}
+
+    def load_ndjson(self, path: str) -> int:
+        """Load attempts from a question_attempts export file (.ndjson, optionally .gz)"""
+        opener = gzip.open if path.endswith(".gz") else open
+        skip_before = self._skip_before()
+        loaded = 0
+        page: List[Dict[str, Any]] = []
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    page.append(json.loads(line))
+                if len(page) >= 10000:
+                    loaded += self.append_rows(page, skip_before)
+                    page = []
+        loaded += self.append_rows(page, skip_before)
+        self._finish_load()
+        return loaded
+
+    async def refresh(self) -> int:
+        """Pull attempts newer than the watermark (everything on first run)"""
+        async with self._lock:
+            if not self._loaded_snapshot:
+                self._loaded_snapshot = True
+                await asyncio.to_thread(self.load_snapshot)
+
+            skip_before = self._skip_before()
+            since = None if skip_before is None else datetime.fromtimestamp(skip_before, tz=timezone.utc)
+
+            loaded = 0
+            async for page in iter_rows("question_attempts", since=since):
+                loaded += self.append_rows(page, skip_before)
+            self._finish_load()
+
+            await self._load_difficulties()
+            self.refreshed_at = time.time()
+            if loaded:
+                await asyncio.to_thread(self.save_snapshot)
+            return loaded
+
+    async def ensure_fresh(self, max_age: Optional[float] = None) -> None:
+        max_age = settings.ANALYTICS_REFRESH_SECONDS if max_age is None else max_age
+        if self.refreshed_at is None or time.time() - self.refreshed_at > max_age:
+            await self.refresh()
+
+    async def _load_difficulties(self) -> None:
+        """Look up difficulty for questions first seen since the last refresh"""
+        known = len(self.question_difficulty)
+        if known == len(self.questions):
+            return
+        new_ids = self.questions.ids[known:]
+        difficulties = await supabase_client.get_question_difficulties(new_ids)
+        codes = np.fromiter(
+            (DIFFICULTY_LEVELS.index(difficulties[qid]) if difficulties.get(qid) in DIFFICULTY_LEVELS else -1 for qid in new_ids),
+            np.int8,
+            len(new_ids)
+        )
+        self.question_difficulty = np.concatenate([self.question_difficulty, codes])
+
+    def _difficulty_of(self, question_codes: np.ndarray) -> np.ndarray:
+        """Difficulty level per question code, -1 where unknown (not yet looked up)"""
+        table = np.concatenate([self.question_difficulty, np.full(len(self.questions) - len(self.question_difficulty) + 1, -1, np.int8)])
+        return table[question_codes]  # code -1 hits the trailing -1
+
+    def _compact(self) -> Dict[str, np.ndarray]:
+        if self._chunks:
+            self._columns = {
+                name: np.concatenate([self._columns[name]] + [chunk[name] for chunk in self._chunks])
+                for name in self.COLUMNS
+            }
+            self._chunks = []
+            self._derived = {}
+        return self._columns
+
+    def _attempt_sequence(self) -> Dict[str, np.ndarray]:
+        """
+        Attempts sorted by (user, topic, time) and each one's step number
+        within its (user, topic) group; computed once per compaction.
+        """
+        c = self._compact()
+        if "sequence" not in self._derived:
+            # Attempts without a user or topic (NULL ids, code -1) belong to no group
+            rows = np.nonzero((c["user"] >= 0) & (c["topic"] >= 0))[0]
+            group = c["user"][rows].astype(np.int64) * max(len(self.topics), 1) + c["topic"][rows]
+            by_group = np.lexsort((c["attempted_at"][rows], group))
+            order = rows[by_group]
+            sorted_group = group[by_group]
+            is_start = np.concatenate([[True], sorted_group[1:] != sorted_group[:-1]])
+            start_index = np.maximum.accumulate(np.where(is_start, np.arange(len(order)), 0))
+            self._derived["sequence"] = {"order": order, "step": np.arange(len(order)) - start_index}
+        return self._derived["sequence"]
+
+    # ============= SNAPSHOT =============
+
+    def save_snapshot(self) -> None:
+        columns = self._compact()
+        tmp = f"{self.snapshot_path}.tmp.npz"
+        np.savez(
+            tmp,
+            **columns,
+            question_difficulty=self.question_difficulty,
+            user_ids=np.array(self.users.ids, dtype=str),
+            topic_ids=np.array(self.topics.ids, dtype=str),
+            question_ids=np.array(self.questions.ids, dtype=str),
+            overlap_ids=np.array(list(self._overlap_ids), dtype=str),
+            overlap_at=np.array(list(self._overlap_ids.values()), dtype=np.float64),
+            watermark=np.array([np.nan if self.watermark is None else self.watermark])
+        )
+        os.replace(tmp, self.snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        if not os.path.exists(self.snapshot_path):
+            return False
+        with np.load(self.snapshot_path) as data:
+            self._columns = {name: data[name].astype(dtype) for name, dtype in self.COLUMNS.items()}
+            self.question_difficulty = data["question_difficulty"]
+            self.users = _Interner(data["user_ids"].tolist())
+            self.topics = _Interner(data["topic_ids"].tolist())
+            self.questions = _Interner(data["question_ids"].tolist())
+            self._overlap_ids = dict(zip(data["overlap_ids"].tolist(), data["overlap_at"].tolist()))
+            watermark = float(data["watermark"][0])
+            self.watermark = self._newest = None if np.isnan(watermark) else watermark
+        self._chunks = []
+        return True
+
+    # ============= AGGREGATES =============
+
+    def _filtered(self, topic_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        columns = self._compact()
+        if topic_id is None:
+            return columns
+        code = self.topics.codes.get(topic_id)
+        if code is None:
+            return {name: values[:0] for name, values in columns.items()}
+        mask = columns["topic"] == code
+        return {name: values[mask] for name, values in columns.items()}
+
+    def topic_accuracy(self, min_attempts: int = 5, bins: int = 10) -> List[Dict[str, Any]]:
+        """
+        Per topic, the distribution of learner accuracy: learners with at
+        least min_attempts attempts, mean, quartiles and a histogram.
+        """
+        c = self._compact()
+        n_topics = len(self.topics)
+        # Attempts without a user or topic (NULL ids, code -1) can't be grouped
+        valid = (c["user"] >= 0) & (c["topic"] >= 0)
+        if not valid.any() or not n_topics:
+            return []
+
+        # Group by (user, topic)
+        group = c["user"][valid].astype(np.int64) * n_topics + c["topic"][valid]
+        keys, inverse = np.unique(group, return_inverse=True)
+        attempts = np.bincount(inverse)
+        correct = np.bincount(inverse, weights=c["correct"][valid])
+        keep = attempts >= min_attempts
+        accuracy = correct[keep] / attempts[keep]
+        topic = (keys[keep] % n_topics).astype(np.int64)
+        if not len(topic):
+            return []
+
+        learners = np.bincount(topic, minlength=n_topics)
+        mean = np.bincount(topic, weights=accuracy, minlength=n_topics) / np.maximum(learners, 1)
+
+        # Quartiles per topic: sort by (topic, accuracy), index into each group
+        order = np.lexsort((accuracy, topic))
+        sorted_accuracy = accuracy[order]
+        starts = np.concatenate([[0], np.cumsum(learners)[:-1]])
+        quartiles = {
+            q: sorted_accuracy[np.minimum(starts + np.floor(q * (learners - 1)).astype(np.int64), len(sorted_accuracy) - 1)]
+            for q in (0.25, 0.5, 0.75)
+        }
+
+        bin_index = np.minimum((accuracy * bins).astype(np.int64), bins - 1)
+        histogram = np.bincount(topic * bins + bin_index, minlength=n_topics * bins).reshape(n_topics, bins)
+
+        return [
+            {
+                "topic_id": self.topics.ids[t],
+                "learners": int(learners[t]),
+                "mean_accuracy": round(float(mean[t]), 4),
+                "p25": round(float(quartiles[0.25][t]), 4),
+                "median": round(float(quartiles[0.5][t]), 4),
+                "p75": round(float(quartiles[0.75][t]), 4),
+                "histogram": histogram[t].tolist()
+            }
+            for t in np.nonzero(learners)[0]
+        ]
+
+    def difficulty_progression(self, topic_id: Optional[str] = None, max_steps: int = 50) -> Dict[str, Any]:
+        """
+        Learning curves: for the k-th attempt a learner makes in a topic,
+        the mean difficulty level (0 = beginner … 3 = expert) and accuracy
+        across all learners.
+        """
+        c = self._compact()
+        sequence = self._attempt_sequence()
+        order, step = sequence["order"], sequence["step"]
+        if topic_id is not None:
+            in_topic = c["topic"][order] == self.topics.codes.get(topic_id, -2)
+            order, step = order[in_topic], step[in_topic]
+        if not len(order):
+            return {"steps": [], "mean_difficulty": [], "accuracy": [], "learners": []}
+
+        within = step < max_steps
+        step = step[within]
+        order = order[within]
+        correct = c["correct"][order]
+        difficulty = self._difficulty_of(c["question"][order])
+        known = difficulty >= 0
+
+        learners = np.bincount(step, minlength=max_steps)
+        accuracy = np.bincount(step, weights=correct, minlength=max_steps) / np.maximum(learners, 1)
+        difficulty_counts = np.bincount(step[known], minlength=max_steps)
+        mean_difficulty = np.bincount(step[known], weights=difficulty[known], minlength=max_steps) / np.maximum(difficulty_counts, 1)
+
+        steps = int(np.count_nonzero(learners))
+        return {
+            "steps": list(range(1, steps + 1)),
+            "mean_difficulty": [
+                round(float(value), 3) if count else None
+                for value, count in zip(mean_difficulty[:steps], difficulty_counts[:steps])
+            ],
+            "accuracy": np.round(accuracy[:steps], 4).tolist(),
+            "learners": learners[:steps].tolist()
+        }
+
+    def question_success(
+        self,
+        topic_id: Optional[str] = None,
+        min_attempts: int = 10,
+        limit: int = 50,
+        hardest_first: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Per-question success rate and mean time, hardest (or easiest) first"""
+        c = self._filtered(topic_id)
+        valid = c["question"] >= 0
+        question = c["question"][valid]
+        if not len(question):
+            return []
+
+        n = len(self.questions)
+        attempts = np.bincount(question, minlength=n)
+        correct = np.bincount(question, weights=c["correct"][valid], minlength=n)
+        timed = ~np.isnan(c["time_taken"][valid])
+        time_count = np.bincount(question[timed], minlength=n)
+        time_sum = np.bincount(question[timed], weights=c["time_taken"][valid][timed], minlength=n)
+
+        candidates = np.nonzero(attempts >= min_attempts)[0]
+        rate = correct[candidates] / attempts[candidates]
+        ranked = candidates[np.argsort(rate if hardest_first else -rate, kind="stable")[:limit]]
+
+        return [
+            {
+                "question_id": self.questions.ids[q],
+                "attempts": int(attempts[q]),
+                "success_rate": round(float(correct[q] / attempts[q]), 4),
+                "mean_time_taken": round(float(time_sum[q] / time_count[q]), 2) if time_count[q] else None,
+                "difficulty": DIFFICULTY_LEVELS[level] if level >= 0 else None
+            }
+            for q, level in zip(ranked, self._difficulty_of(ranked))
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        columns = self._compact()
+        return {
+            "attempts": int(len(columns["user"])),
+            "users": len(self.users),
+            "topics": len(self.topics),
+            "questions": len(self.questions),
+            "memory_bytes": int(sum(values.nbytes for values in columns.values())),
+            "watermark": datetime.fromtimestamp(self.watermark, tz=timezone.utc).isoformat() if self.watermark else None,
+            "refreshed_at": self.refreshed_at
+        }
+
+# Global attempt store instance
+attempt_store = AttemptStore()
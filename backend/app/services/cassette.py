@@ -0,0 +1,149 @@
+"""
+Record/replay cassettes for external service calls.
+Captures Gemini and Judge0 request/response pairs (with timing) on disk so
+production traffic can be replayed offline for benchmarks and CI.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording matches a request"""
+
+class Cassette:
+    """
+    Records and replays request/response pairs for one external service.
+
+    Modes:
+    - off: calls pass straight through
+    - record: calls pass through and each pair is appended to the cassette
+    - replay: calls are served from the cassette, never hitting the network
+
+    Cassettes are gzipped JSON lines stored at `<CASSETTE_DIR>/<name>.jsonl.gz`.
+    When the same request was recorded several times, replay cycles through
+    the recordings in their original order so runs stay deterministic.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: Optional[str] = None,
+        directory: Optional[str] = None,
+        replay_latency: Optional[bool] = None
+    ):
+        self.name = name
+        self.mode = (mode or settings.CASSETTE_MODE).lower()
+        self.directory = directory or settings.CASSETTE_DIR
+        self.replay_latency = (
+            settings.CASSETTE_REPLAY_LATENCY if replay_latency is None else replay_latency
+        )
+        self.path = os.path.join(self.directory, f"{name}.jsonl.gz")
+
+        # Replay index: request key -> recorded entries, plus a cursor per key
+        self._entries: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._cursors: Dict[str, int] = {}
+
+        if self.mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @staticmethod
+    def request_key(request: Dict[str, Any]) -> str:
+        """Stable hash of a request (key order independent)"""
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    async def play(
+        self,
+        request: Dict[str, Any],
+        call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a call through the cassette.
+
+        Args:
+            request: JSON-serializable description of the request
+            call: Zero-argument coroutine factory performing the real call
+
+        Returns:
+            The live response (off/record) or the recorded one (replay)
+        """
+        if self.mode == "replay":
+            return await self._replay(request)
+
+        if self.mode == "off":
+            return await call()
+
+        started = time.perf_counter()
+        response = await call()
+        self._append({
+            "key": self.request_key(request),
+            "request": request,
+            "response": response,
+            "duration": round(time.perf_counter() - started, 4),
+            "recorded_at": time.time()
+        })
+        return response
+
+    async def _replay(self, request: Dict[str, Any]) -> Any:
+        """Serve the next recorded response for this request"""
+        if self._entries is None:
+            self._entries = self._load()
+
+        key = self.request_key(request)
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMissError(f"No '{self.name}' recording for request {key[:12]}")
+
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        entry = entries[cursor % len(entries)]
+
+        if self.replay_latency and entry.get("duration"):
+            await asyncio.sleep(entry["duration"])
+
+        return entry["response"]
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Append one entry (each append is its own gzip member)"""
+        os.makedirs(self.directory, exist_ok=True)
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(line)
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Load and index the cassette file"""
+        entries: Dict[str, List[Dict[str, Any]]] = {}
+        if not os.path.exists(self.path):
+            return entries
+
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entries.setdefault(entry["key"], []).append(entry)
+
+        return entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary of the cassette contents (loads it if needed)"""
+        if self._entries is None:
+            self._entries = self._load()
+        durations = [e.get("duration", 0) for entries in self._entries.values() for e in entries]
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "path": self.path,
+            "unique_requests": len(self._entries),
+            "recordings": len(durations),
+            "recorded_seconds": round(sum(durations), 3)
+        }
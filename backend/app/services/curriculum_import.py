@@ -0,0 +1,257 @@
+"""
+Curriculum import pipeline.
+Streams JSONL/CSV files of courses, topics, subtopics and pre-authored
+questions, validates each record against the import models and upserts
+them in batched multi-row writes, checkpointing progress so an interrupted
+import resumes where it stopped.
+"""
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import uuid
+from collections import deque
+from pydantic import ValidationError
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.models.schemas import CourseImport, TopicImport, SubtopicImport, QuestionImport
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Namespace for ids derived from natural keys, so re-importing a file
+# without ids updates the same rows instead of duplicating them
+IMPORT_NAMESPACE = uuid.UUID("5b0c1f6e-7d52-4f0e-9a57-3c1e2f4d8a90")
+
+KINDS = {
+    "course": ("courses", CourseImport),
+    "topic": ("topics", TopicImport),
+    "subtopic": ("subtopics", SubtopicImport),
+    "question": ("questions", QuestionImport)
+}
+
+# CSV cells holding JSON values
+JSON_COLUMNS = {"options", "test_cases", "hints"}
+
+def derived_id(*parts: str) -> str:
+    return str(uuid.uuid5(IMPORT_NAMESPACE, "\0".join(parts)))
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream raw records from a .jsonl/.ndjson or .csv file (optionally gzipped)"""
+    name = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as f:
+        if name.endswith(".csv"):
+            for row in csv.DictReader(f):
+                record = {}
+                for key, value in row.items():
+                    if value == "" or value is None:
+                        continue
+                    record[key] = json.loads(value) if key in JSON_COLUMNS else value
+                yield record
+        elif name.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported import file type: {path}")
+
+def resolve_references(kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill parent ids from parent names (course → topic → subtopic) and derive
+    a deterministic id when the record has none.
+    """
+    record = dict(record)
+    course = record.pop("course", None)
+    topic = record.pop("topic", None)
+    subtopic = record.pop("subtopic", None)
+
+    if kind == "course":
+        record.setdefault("id", derived_id("course", record.get("name", "")))
+        return record
+
+    if kind in ("topic", "subtopic", "question") and course and not record.get("course_id"):
+        record["course_id"] = derived_id("course", course)
+
+    if kind == "topic":
+        record.setdefault("id", derived_id("topic", record.get("course_id", ""), record.get("name", "")))
+        return record
+
+    if topic and not record.get("topic_id"):
+        record["topic_id"] = derived_id("topic", record.get("course_id", ""), topic)
+    course_id = record.pop("course_id", "")
+
+    if kind == "subtopic":
+        record.setdefault("id", derived_id("subtopic", record.get("topic_id", ""), record.get("name", "")))
+        return record
+
+    if subtopic and not record.get("subtopic_id"):
+        record["subtopic_id"] = derived_id("subtopic", record.get("topic_id", ""), subtopic)
+    record.setdefault("id", derived_id(
+        "question", course_id, record.get("topic_id", ""), record.get("question_type", ""), record.get("question_text", "")
+    ))
+    return record
+
+class Checkpoint:
+    """Records-committed counter persisted next to the import file"""
+
+    def __init__(self, source: str):
+        self.path = f"{source}.checkpoint"
+        stat = os.stat(source)
+        self.fingerprint = {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def load(self) -> int:
+        """Records already committed, or 0 if there's no checkpoint for this exact file"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if state.get("file") != self.fingerprint:
+            return 0
+        return state.get("records_done", 0)
+
+    def save(self, records_done: int) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"file": self.fingerprint, "records_done": records_done}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def import_file(
+    path: str,
+    kind: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    resume: bool = True,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Import one file.
+
+    Args:
+        path: .jsonl/.ndjson/.csv file, optionally .gz
+        kind: course | topic | subtopic | question; JSONL records may instead
+            carry their own "kind" field (mixed files must list parents first)
+        batch_size: Rows per upsert request
+        concurrency: Upsert requests in flight; memory stays bounded by
+            batch_size * concurrency records
+        resume: Skip records committed by a previous interrupted run
+        dry_run: Validate only, write nothing
+
+    Returns:
+        Counters (read, imported, skipped, rejected) per the run
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    concurrency = concurrency or settings.IMPORT_CONCURRENCY
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"Unknown import kind: {kind}")
+
+    checkpoint = Checkpoint(path)
+    start_at = checkpoint.load() if resume and not dry_run else 0
+    rejects_path = f"{path}.rejects.jsonl"
+    stats = {"read": 0, "imported": 0, "skipped": start_at, "rejected": 0, "tables": {}}
+
+    # Buffered rows per table (by id, last one wins) with the file position
+    # of their first record, and writes in flight with the same (and their table)
+    batches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    batch_starts: Dict[str, int] = {}
+    in_flight: "deque[Tuple[asyncio.Task, int, str]]" = deque()
+    position = start_at
+
+    def committed_through() -> int:
+        """Every record before this position is written"""
+        return min([position] + list(batch_starts.values()) + [start for _, start, _ in in_flight])
+
+    async def drain(until: int) -> None:
+        """Wait for in-flight writes, oldest first, until at most `until` remain"""
+        while len(in_flight) > until:
+            task, _, _ = in_flight.popleft()
+            await task
+            checkpoint.save(committed_through())
+
+    async def drain_tables(tables: List[str]) -> None:
+        """Wait until no write to any of these tables is in flight (older writes finish first)"""
+        pending = [i for i, (_, _, table) in enumerate(in_flight) if table in tables]
+        if pending:
+            await drain(len(in_flight) - pending[-1] - 1)
+
+    async def flush(table: str) -> None:
+        rows = list(batches.pop(table, {}).values())
+        start = batch_starts.pop(table, position)
+        if not rows or dry_run:
+            return
+        stats["tables"][table] = stats["tables"].get(table, 0) + len(rows)
+        in_flight.append((asyncio.create_task(supabase_client.upsert_rows(table, rows)), start, table))
+        await drain(concurrency - 1)
+
+    # Rejects of an interrupted run are kept when resuming
+    with open(rejects_path, "a" if start_at else "w", encoding="utf-8") as rejects:
+        try:
+            for index, raw in enumerate(iter_records(path)):
+                if index < start_at:
+                    continue
+                position = index
+                stats["read"] += 1
+
+                record_kind = raw.pop("kind", None) or kind
+                if record_kind not in KINDS:
+                    stats["rejected"] += 1
+                    rejects.write(json.dumps({"record": raw, "error": f"Unknown kind: {record_kind}"}) + "\n")
+                    continue
+
+                table, model = KINDS[record_kind]
+                try:
+                    row = model.model_validate(resolve_references(record_kind, raw)).model_dump(mode="json")
+                except ValidationError as e:
+                    stats["rejected"] += 1
+                    rejects.write(json.dumps({"record": raw, "error": e.errors(include_url=False)}, default=str) + "\n")
+                    continue
+
+                # Parents must be written before children that reference them,
+                # including parent batches already flushed and still in flight
+                parent_tables = _parent_tables(table)
+                for parent_table in parent_tables:
+                    if parent_table in batches:
+                        await flush(parent_table)
+                await drain_tables(parent_tables)
+
+                batches.setdefault(table, {})[row["id"]] = row
+                batch_starts.setdefault(table, index)
+                stats["imported"] += 1
+                if len(batches[table]) >= batch_size:
+                    position = index + 1
+                    await flush(table)
+
+            position = start_at + stats["read"]
+            for table in list(batches):
+                await flush(table)
+            await drain(0)
+        except BaseException:
+            for task, _, _ in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for task, _, _ in in_flight), return_exceptions=True)
+            raise
+
+    if os.path.getsize(rejects_path) == 0:
+        os.remove(rejects_path)
+    if not dry_run:
+        checkpoint.clear()
+        # New or changed catalog rows and questions must be visible on every worker
+        await cache.invalidate("catalog")
+        if "questions" in stats["tables"]:
+            await cache.invalidate("questions")
+
+    return stats
+
+def _parent_tables(table: str) -> List[str]:
+    order = ["courses", "topics", "subtopics", "questions"]
+    return order[:order.index(table)]
@@ -0,0 +1,148 @@
+"""
+Near-duplicate detection for generated questions.
+MinHash signatures over text shingles, bucketed with LSH so a fresh
+question can be checked against the bank in well under a millisecond.
+"""
+import hashlib
+import re
+from app.core.config import settings
+from typing import Dict, Any, List, Optional, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+
+def question_fingerprint_text(question: Dict[str, Any]) -> str:
+    """Normalized text a question is compared on (text, code and options)"""
+    option_texts = sorted(
+        (opt.get("text") or "") for opt in (question.get("options") or []) if isinstance(opt, dict)
+    )
+    parts = [question.get("question_text") or "", question.get("code_snippet") or ""] + option_texts
+    return " ".join(parts).lower()
+
+def shingle_hashes(text: str, size: int = 2) -> List[int]:
+    """64-bit hashes of overlapping word n-grams"""
+    words = _WORD_RE.findall(text)
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return [
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=8).digest(), "little")
+        for i in range(len(words) - size + 1)
+    ]
+
+def minhash_signature(hashes: List[int], num_perm: int) -> Tuple[int, ...]:
+    """
+    One-permutation MinHash: each shingle hash lands in one of num_perm
+    bins and the minimum per bin is kept, so cost is one pass over the
+    shingles instead of num_perm passes. Empty bins borrow the next
+    non-empty bin's value (rotation densification).
+    """
+    empty = _MASK
+    bins = [empty] * num_perm
+    for h in hashes:
+        idx = h % num_perm
+        value = h // num_perm
+        if value < bins[idx]:
+            bins[idx] = value
+
+    if all(v == empty for v in bins):
+        return tuple(bins)
+
+    for i in range(num_perm):
+        if bins[i] != empty:
+            continue
+        j, offset = (i + 1) % num_perm, 1
+        while bins[j] == empty:
+            j, offset = (j + 1) % num_perm, offset + 1
+        bins[i] = (bins[j] + offset * 0x9E3779B97F4A7C15) & _MASK
+
+    return tuple(bins)
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+class DedupIndex:
+    """
+    Incremental LSH index of question signatures.
+
+    Questions are only compared within the same scope (topic, question type).
+    Scopes are loaded lazily from the database on first use and kept up to
+    date as new questions are saved.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: Optional[float] = None
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold if threshold is not None else settings.DEDUP_THRESHOLD
+
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[Any, ...], List[str]] = {}
+        self._loaded_scopes = set()
+
+    def signature(self, question: Dict[str, Any]) -> Tuple[int, ...]:
+        return minhash_signature(shingle_hashes(question_fingerprint_text(question)), self.num_perm)
+
+    def _band_keys(self, scope: Tuple[str, str], signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (scope, band, signature[start:start + self.rows])
+
+    def add(
+        self,
+        scope: Tuple[str, str],
+        question_id: str,
+        question: Dict[str, Any],
+        signature: Optional[Tuple[int, ...]] = None
+    ) -> None:
+        """Index a stored question"""
+        if question_id in self._signatures:
+            return
+        signature = signature or self.signature(question)
+        self._signatures[question_id] = signature
+        for key in self._band_keys(scope, signature):
+            self._buckets.setdefault(key, []).append(question_id)
+
+    def find_duplicate(
+        self,
+        scope: Tuple[str, str],
+        question: Dict[str, Any],
+        signature: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Return (question_id, similarity) of the closest indexed question in
+        the scope at or above the threshold, or None.
+        """
+        signature = signature or self.signature(question)
+        best: Optional[Tuple[str, float]] = None
+        checked = set()
+
+        for key in self._band_keys(scope, signature):
+            for candidate_id in self._buckets.get(key, ()):
+                if candidate_id in checked:
+                    continue
+                checked.add(candidate_id)
+                similarity = estimate_similarity(signature, self._signatures[candidate_id])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate_id, similarity)
+
+        return best
+
+    def is_loaded(self, scope: Tuple[str, str]) -> bool:
+        return scope in self._loaded_scopes
+
+    def mark_loaded(self, scope: Tuple[str, str]) -> None:
+        self._loaded_scopes.add(scope)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+# Global dedup index instance
+dedup_index = DedupIndex()
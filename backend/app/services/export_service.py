@@ -0,0 +1,135 @@
+"""
+Bulk data export for analytics.
+Streams learner tables as NDJSON or CSV using keyset-paged reads, so
+memory stays flat whatever the number of rows.
+"""
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from app.core.config import settings
+from app.core.responses import dumps
+from app.db.supabase_client import supabase_client
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# dataset -> columns exported and the timestamp column date filters apply to
+DATASETS = {
+    "question_attempts": {
+        "columns": ["id", "user_id", "question_id", "topic_id", "is_correct", "xp_earned",
+                    "time_taken", "mistakes", "recommended_action", "attempted_at"],
+        "date_column": "attempted_at",
+        "has_topic": True
+    },
+    "user_progress": {
+        "columns": ["id", "user_id", "topic_id", "current_difficulty", "questions_attempted",
+                    "questions_correct", "accuracy", "total_xp_earned", "mastery_level",
+                    "last_activity", "created_at"],
+        "date_column": "last_activity",
+        "has_topic": True
+    },
+    "user_profiles": {
+        "columns": ["id", "full_name", "level", "xp", "streak", "last_activity_date", "created_at"],
+        "date_column": "created_at",
+        "has_topic": False
+    }
+}
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+class ExportRequestError(ValueError):
+    """The export parameters are invalid"""
+
+def validate_export(dataset: str, format: str, course_id: Optional[str] = None) -> None:
+    """Check parameters up front, before a streaming response has started"""
+    if dataset not in DATASETS:
+        raise ExportRequestError(f"Unknown dataset: {dataset}")
+    if format not in FORMATS:
+        raise ExportRequestError(f"Unknown format: {format}")
+    if course_id and not DATASETS[dataset]["has_topic"]:
+        raise ExportRequestError(f"{dataset} can't be filtered by course")
+
+async def iter_rows(
+    dataset: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    course_id: Optional[str] = None,
+    page_size: Optional[int] = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield pages of rows in id order.
+
+    The next page is fetched while the current one is being consumed, so
+    the database and the client stay busy at the same time; at most two
+    pages are held in memory.
+    """
+    validate_export(dataset, "ndjson", course_id)
+    spec = DATASETS[dataset]
+    page_size = page_size or settings.EXPORT_PAGE_SIZE
+
+    topic_ids = None
+    if course_id:
+        topic_ids = [topic["id"] for topic in await supabase_client.get_topics(course_id)]
+        if not topic_ids:
+            return
+
+    def fetch(after_id: Optional[str]):
+        return asyncio.ensure_future(supabase_client.get_export_page(
+            dataset,
+            columns=", ".join(spec["columns"]),
+            date_column=spec["date_column"],
+            since=since.isoformat() if since else None,
+            until=until.isoformat() if until else None,
+            topic_ids=topic_ids,
+            after_id=after_id,
+            limit=page_size
+        ))
+
+    next_page = fetch(None)
+    try:
+        while True:
+            page = await next_page
+            if not page:
+                return
+            next_page = fetch(page[-1]["id"]) if len(page) == page_size else None
+            yield page
+            if next_page is None:
+                return
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+async def stream_export(
+    dataset: str,
+    format: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    course_id: Optional[str] = None,
+    page_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Encoded export body, one chunk per page"""
+    validate_export(dataset, format, course_id)
+    columns = DATASETS[dataset]["columns"]
+
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+
+    async for page in iter_rows(dataset, since, until, course_id, page_size):
+        if format == "ndjson":
+            yield b"".join(dumps(row) + b"\n" for row in page)
+            continue
+
+        buffer.seek(0)
+        buffer.truncate()
+        for row in page:
+            writer.writerow([
+                json.dumps(value) if isinstance(value, (list, dict)) else value
+                for value in (row.get(column) for column in columns)
+            ])
+        yield buffer.getvalue().encode()
@@ -0,0 +1,136 @@
+"""
+Dependency health sampling.
+A background task probes Supabase (and, when configured, the metered
+Judge0 and Gemini APIs) on an interval and keeps a rolling window of
+round-trip latencies and failures per dependency. Readiness is computed from those cached samples, so the
+probe endpoint does no I/O however often the load balancer calls it.
+"""
+import asyncio
+import time
+from collections import deque
+from app.ai.llm_client import gemini_client
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.judge0_service import judge0_service
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+PROBES: Dict[str, Callable[[], Awaitable[None]]] = {
+    "supabase": supabase_client.ping,
+    "judge0": judge0_service.ping,
+    "gemini": gemini_client.ping
+}
+
+class DependencySamples:
+    """Rolling window of (ok, latency seconds) for one dependency"""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self._samples = deque(maxlen=window)
+        self.last_sampled_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None) -> None:
+        self._samples.append((ok, latency))
+        self.last_sampled_at = time.time()
+        if error:
+            self.last_error = error
+
+    def report(self, now: float) -> Dict[str, Any]:
+        """Status (ok | degraded | down | stale | unknown) against the configured thresholds"""
+        if not self._samples:
+            return {"status": "unknown", "samples": 0}
+
+        calls = len(self._samples)
+        error_rate = sum(1 for ok, _ in self._samples if not ok) / calls
+        latencies = sorted(latency for ok, latency in self._samples if ok)
+        p95 = latencies[max(0, int(round(0.95 * len(latencies))) - 1)] if latencies else None
+        max_latency = settings.HEALTH_MAX_LATENCY.get(self.name)
+
+        if now - self.last_sampled_at > settings.HEALTH_SAMPLE_INTERVAL * 3:
+            status = "stale"
+        elif error_rate >= settings.HEALTH_MAX_ERROR_RATE:
+            status = "down"
+        elif error_rate > 0 or (p95 is not None and max_latency is not None and p95 > max_latency):
+            status = "degraded"
+        else:
+            status = "ok"
+
+        return {
+            "status": status,
+            "samples": calls,
+            "error_rate": round(error_rate, 4),
+            "latency_p95": round(p95, 4) if p95 is not None else None,
+            "latency_last": round(self._samples[-1][1], 4),
+            "last_sampled_seconds_ago": round(now - self.last_sampled_at, 1),
+            "last_error": self.last_error
+        }
+
+def probed_dependencies() -> List[str]:
+    """
+    Required dependencies plus HEALTH_PROBED_DEPENDENCIES. Judge0 and Gemini
+    are metered, so they're only probed when configured.
+    """
+    names = set(settings.HEALTH_REQUIRED_DEPENDENCIES) | set(settings.HEALTH_PROBED_DEPENDENCIES)
+    return [name for name in PROBES if name in names]
+
+class HealthSampler:
+    """Background prober; readiness reads only what it has cached"""
+
+    def __init__(self):
+        self.dependencies = {
+            name: DependencySamples(name, settings.HEALTH_SAMPLE_WINDOW)
+            for name in probed_dependencies()
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.sample()
+            await asyncio.sleep(settings.HEALTH_SAMPLE_INTERVAL)
+
+    async def sample(self) -> None:
+        """Probe every probed dependency once, concurrently"""
+        await asyncio.gather(*(self._probe(name, PROBES[name]) for name in self.dependencies))
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), settings.HEALTH_PROBE_TIMEOUT)
+            self.dependencies[name].record(True, time.perf_counter() - started)
+        except Exception as e:
+            self.dependencies[name].record(False, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Ready when every required dependency is ok or degraded; the others
+        are reported but don't take the worker out of rotation (an outage
+        there hits every worker alike). No I/O.
+        """
+        now = time.time()
+        dependencies = {
+            name: self.dependencies[name].report(now) if name in self.dependencies else {"status": "not_probed"}
+            for name in PROBES
+        }
+        # Free signal from real traffic, probed or not
+        dependencies["gemini"]["breaker"] = gemini_client.breaker.state
+
+        required: List[str] = settings.HEALTH_REQUIRED_DEPENDENCIES
+        failing = [name for name in required if dependencies.get(name, {}).get("status") not in ("ok", "degraded")]
+        return {
+            "ready": not failing,
+            "failing": failing,
+            "dependencies": dependencies
+        }
+
+# Global health sampler instance
+health_sampler = HealthSampler()
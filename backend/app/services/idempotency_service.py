@@ -0,0 +1,137 @@
+"""
+Idempotent answer submission.
+A submission is keyed by the client's idempotency key, or by a hash of
+user, question and answer. Replays within the TTL get the stored result;
+duplicates arriving while the first is still being evaluated wait for it
+(in-process via a shared future, across workers via a claim in the shared
+cache), so Judge0, Gemini and XP awards run once per submission.
+"""
+import asyncio
+import hashlib
+import json
+from app.core.cache import BACKEND_ERRORS, cache
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.schemas import AnswerSubmission
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class SubmissionInProgress(Exception):
+    """Another worker is still evaluating the same submission"""
+
+def submission_key(submission: AnswerSubmission, idempotency_key: Optional[str] = None) -> str:
+    """Stable key for a submission; client keys are scoped to the user"""
+    key = idempotency_key or submission.idempotency_key
+    if key:
+        parts = ["key", submission.user_id, key]
+    else:
+        parts = [
+            "answer", submission.user_id, submission.question_id,
+            submission.selected_option_id, submission.snippet_answer, submission.code_solution, submission.language
+        ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+class SubmissionDeduplicator:
+    """
+    Runs each distinct submission once.
+
+    The result is stored in the shared cache under the submission key for
+    SUBMISSION_IDEMPOTENCY_TTL seconds. While the evaluation runs, the
+    owning worker holds a claim key; other workers poll for the result
+    rather than evaluating again. If the cache is unreachable, duplicates
+    are still suppressed within this process.
+    """
+
+    def __init__(self, namespace: str = "submissions"):
+        self.namespace = cache.namespace(namespace)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"executed": 0, "replayed": 0, "joined": 0, "waited": 0, "timeouts": 0}
+
+    async def run(self, key: str, evaluate: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Result of the submission and whether it was a duplicate (True when
+        the result comes from an earlier or concurrent evaluation).
+
+        Raises:
+            SubmissionInProgress: another worker holds the claim past the wait limit
+        """
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["joined"] += 1
+            return await asyncio.shield(in_flight), True
+
+        # Registered before the first await so concurrent duplicates join it
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result, duplicate = await self._run(key, evaluate)
+            future.set_result(result)
+            return result, duplicate
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, even if nobody joined
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _run(self, key: str, evaluate: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SUBMISSION_CLAIM_SECONDS
+        while True:
+            stored = await self.namespace.get(f"result:{key}")
+            if stored is not None:
+                self.stats["replayed"] += 1
+                return stored, True
+
+            if await self._claim(key):
+                return await self._evaluate(key, evaluate), False
+
+            # Another worker is evaluating: wait for its result, or for its
+            # claim to be released (it failed) and then try to claim again
+            stored = await self._wait_for_result(key, deadline)
+            if stored is not None:
+                self.stats["waited"] += 1
+                return stored, True
+
+    async def _evaluate(self, key: str, evaluate: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            # Normalized to plain JSON so the first response and replays
+            # (which come back from the cache) are identical
+            result = json.loads(dumps(await evaluate()))
+        except BaseException:
+            # Let a retry evaluate again rather than wait out the claim
+            await self.namespace.delete(f"claim:{key}")
+            raise
+
+        self.stats["executed"] += 1
+        await self.namespace.set(f"result:{key}", result, settings.SUBMISSION_IDEMPOTENCY_TTL)
+        await self.namespace.delete(f"claim:{key}")
+        return result
+
+    async def _claim(self, key: str) -> bool:
+        """True if this worker should evaluate (first claimant, or the cache is down)"""
+        try:
+            return await self.namespace.incr(f"claim:{key}", ttl=settings.SUBMISSION_CLAIM_SECONDS) == 1
+        except BACKEND_ERRORS as e:
+            cache._on_error(e)
+            return True
+
+    async def _wait_for_result(self, key: str, deadline: float) -> Optional[Any]:
+        """The other worker's result, or None once its claim is gone"""
+        loop = asyncio.get_running_loop()
+        delay = 0.05
+        while loop.time() < deadline:
+            await asyncio.sleep(delay)
+            stored = await self.namespace.get(f"result:{key}")
+            if stored is not None:
+                return stored
+            if await self.namespace.get(f"claim:{key}") is None:
+                return None
+            delay = min(delay * 2, 1.0)
+        self.stats["timeouts"] += 1
+        raise SubmissionInProgress("This submission is already being evaluated; retry shortly")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "in_flight": len(self._in_flight)}
+
+# Global submission deduplicator instance
+submission_deduplicator = SubmissionDeduplicator()
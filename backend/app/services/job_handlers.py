@@ -0,0 +1,106 @@
+"""
+Background job handlers.
+Slow work handed off by the API and run by the job queue workers.
+"""
+import asyncio
+import itertools
+import json
+import os
+from app.ai.generators.question_generator import question_generator
+from app.db.supabase_client import supabase_client
+from app.models.schemas import DifficultyLevel, QuestionType
+from app.services.curriculum_import import import_file
+from app.services.job_queue import job_queue
+from app.services.leaderboard_service import prune_buckets, record_xp_job
+from app.services.question_bank import question_bank
+from app.services.recalibration import recompute_all
+from typing import Any, Dict, List
+
+async def pregenerate_questions(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill the question bank for a (topic, subtopic, difficulty, type) ahead
+    of demand, so learners are served stored questions instead of waiting
+    on generation. Near-duplicates of stored questions are dropped.
+
+    Payload: topic_id, subtopic_id (optional), difficulty, question_type, count
+    """
+    topic = await supabase_client.get_topic(payload["topic_id"])
+    if not topic:
+        raise ValueError(f"Topic not found: {payload['topic_id']}")
+
+    subtopic_name = "General"
+    if payload.get("subtopic_id"):
+        subtopic = await supabase_client.get_subtopic(payload["subtopic_id"])
+        subtopic_name = subtopic.get("name", "General") if subtopic else "General"
+
+    question_type = QuestionType(payload["question_type"])
+    saved_ids = set()
+
+    for _ in range(payload.get("count", 1)):
+        question_data = await question_generator.generate_question(
+            topic=topic.get("name", "Programming"),
+            subtopic=subtopic_name,
+            difficulty=DifficultyLevel(payload["difficulty"]),
+            question_type=question_type,
+            user_context={},
+            language=payload.get("language", "python")
+        )
+        question_data["topic_id"] = payload["topic_id"]
+        question_data["subtopic_id"] = payload.get("subtopic_id")
+
+        saved = await question_bank.store_generated(None, question_data)
+        saved_ids.add(saved["id"])
+
+    return {"question_ids": sorted(saved_ids), "requested": payload.get("count", 1)}
+
+async def import_curriculum(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Import an uploaded curriculum/question file. Retries resume from the
+    file's checkpoint rather than starting over.
+
+    The upload and its .checkpoint/.rejects.jsonl files are deleted once
+    the import succeeds; the first rejects are kept in the job result.
+
+    Payload: path, kind (optional), dry_run
+    """
+    path = payload["path"]
+    stats = await import_file(path, kind=payload.get("kind"), dry_run=payload.get("dry_run", False))
+    stats["rejects"] = await asyncio.to_thread(_remove_upload, path)
+    return stats
+
+def _remove_upload(path: str, keep_rejects: int = 100) -> List[Dict[str, Any]]:
+    """Delete an uploaded import file and its side files; returns the first rejects"""
+    rejects = []
+    try:
+        with open(f"{path}.rejects.jsonl", encoding="utf-8") as f:
+            for line in itertools.islice(f, keep_rejects):
+                rejects.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+
+    for leftover in (path, f"{path}.checkpoint", f"{path}.checkpoint.tmp", f"{path}.rejects.jsonl"):
+        try:
+            os.remove(leftover)
+        except FileNotFoundError:
+            pass
+    return rejects
+
+async def recompute_progress(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recompute derived progress fields across all users. Retries resume
+    after the last committed page.
+
+    Payload: tables (optional), difficulty, dry_run
+    """
+    results = await recompute_all(
+        payload.get("tables"),
+        difficulty=payload.get("difficulty", False),
+        dry_run=payload.get("dry_run", False)
+    )
+    return {"tables": results}
+
+job_queue.register("pregenerate_questions", pregenerate_questions)
+job_queue.register("import_curriculum", import_curriculum)
+job_queue.register("recompute_progress", recompute_progress)
+job_queue.register("prune_xp_buckets", prune_buckets)
+job_queue.register("record_leaderboard_xp", record_xp_job)
@@ -0,0 +1,313 @@
+"""
+In-process background job queue with persistent state.
+Named queues, each drained by a bounded pool of asyncio workers; jobs are
+stored in SQLite so queued and interrupted work survives restarts.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """True if a process with this pid exists (and isn't us restarting)"""
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """
+    Persistent job queue.
+
+    Jobs move queued → running → succeeded | failed. A failing job is
+    retried with exponential backoff until max_attempts is reached.
+    Enqueuing with an idempotency key that already exists returns the
+    existing job instead of creating a new one. SQLite calls run in a
+    thread (asyncio.to_thread) so they never block the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.JOB_QUEUE_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazy-open the database and create the schema"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    queue TEXT NOT NULL,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    idempotency_key TEXT UNIQUE,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    run_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner_pid INTEGER,
+                    result TEXT,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue_status_run_at ON jobs(queue, status, run_at)")
+            self._conn = conn
+        return self._conn
+
+    # ============= REGISTRATION & ENQUEUE =============
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of this type"""
+        self._handlers[job_type] = handler
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        queue: str = "default",
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = 3,
+        delay_seconds: float = 0
+    ) -> str:
+        """
+        Persist a job and wake the queue's workers.
+
+        Returns:
+            The job id (the existing one if the idempotency key was seen before)
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+        if queue not in settings.JOB_QUEUE_CONCURRENCY:
+            raise ValueError(f"Unknown job queue: {queue}")
+
+        job_id = await asyncio.to_thread(
+            self._insert, job_type, payload, queue, idempotency_key, max_attempts, delay_seconds
+        )
+
+        wakeup = self._wakeups.get(queue)
+        if wakeup:
+            wakeup.set()
+        return job_id
+
+    def _insert(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        queue: str,
+        idempotency_key: Optional[str],
+        max_attempts: int,
+        delay_seconds: float
+    ) -> str:
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            # Insert-or-nothing, then read back: the lock is per process, and
+            # workers sharing the database may enqueue the same key at once
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (id, queue, job_type, payload, idempotency_key, status, max_attempts, run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?) "
+                "ON CONFLICT(idempotency_key) DO NOTHING",
+                (job_id, queue, job_type, json.dumps(payload), idempotency_key, max_attempts, now + delay_seconds, now)
+            )
+            if cursor.rowcount == 0:
+                return self.conn.execute(
+                    "SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()[0]
+        return job_id
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get_job, job_id)
+
+    def _get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([c[0] for c in cursor.description], row))
+
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # ============= WORKERS =============
+
+    async def start(self) -> None:
+        """Recover interrupted jobs and start a worker pool per configured queue"""
+        await asyncio.to_thread(self._recover)
+
+        for queue, concurrency in settings.JOB_QUEUE_CONCURRENCY.items():
+            self._wakeups[queue] = asyncio.Event()
+            for _ in range(concurrency):
+                self._workers.append(asyncio.create_task(self._worker(queue)))
+
+        print(f"🧵 Job queue started: {dict(settings.JOB_QUEUE_CONCURRENCY)}")
+
+    def _recover(self) -> None:
+        with self._lock:
+            # Jobs left running by a process that no longer exists (crash or
+            # restart) go back to the queue; other live workers keep theirs
+            running = self.conn.execute("SELECT id, owner_pid FROM jobs WHERE status = 'running'").fetchall()
+            for job_id, owner_pid in running:
+                if not _process_alive(owner_pid):
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL WHERE id = ?",
+                        (job_id,)
+                    )
+            self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - settings.JOB_RETENTION_SECONDS,)
+            )
+
+    async def stop(self) -> None:
+        """Cancel workers; their running jobs are re-queued on next start"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self, queue: str) -> None:
+        wakeup = self._wakeups[queue]
+        while True:
+            job = await asyncio.to_thread(self._claim, queue)
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=settings.JOB_QUEUE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job)
+
+    def _claim(self, queue: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the next due job of the queue to running"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT id, job_type, payload, attempts, max_attempts FROM jobs "
+                    "WHERE queue = ? AND status = 'queued' AND run_at <= ? ORDER BY run_at LIMIT 1",
+                    (queue, now)
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, owner_pid = ?, attempts = attempts + 1 WHERE id = ?",
+                        (now, os.getpid(), row[0])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "job_type": row[1],
+            "payload": json.loads(row[2]),
+            "attempts": row[3] + 1,
+            "max_attempts": row[4]
+        }
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        handler = self._handlers.get(job["job_type"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job type: {job['job_type']}")
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self._on_failure, job, e)
+            return
+
+        await asyncio.to_thread(self._on_success, job, result)
+
+    def _on_success(self, job: Dict[str, Any], result: Any) -> None:
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'succeeded', finished_at = ?, result = ?, last_error = NULL WHERE id = ?",
+                (time.time(), json.dumps(result, default=str), job["id"])
+            )
+
+    def _on_failure(self, job: Dict[str, Any], error: Exception) -> None:
+        """Retry with exponential backoff (plus jitter) or mark failed"""
+        print(f"⚠️ Job {job['job_type']} {job['id']} failed (attempt {job['attempts']}): {error}")
+        now = time.time()
+        with self._lock:
+            if job["attempts"] < job["max_attempts"]:
+                backoff = settings.JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'queued', run_at = ?, last_error = ? WHERE id = ?",
+                    (now + backoff * random.uniform(0.8, 1.2), str(error), job["id"])
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ? WHERE id = ?",
+                    (now, str(error), job["id"])
+                )
+
+    # ============= INSPECTION =============
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Queue depth by status and latency of recently finished jobs, per queue"""
+        return await asyncio.to_thread(self._get_stats)
+
+    def _get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            counts = self.conn.execute(
+                "SELECT queue, status, COUNT(*) FROM jobs GROUP BY queue, status"
+            ).fetchall()
+            latencies = self.conn.execute(
+                "SELECT queue, AVG(finished_at - created_at), MAX(finished_at - created_at), AVG(finished_at - started_at) "
+                "FROM jobs WHERE status = 'succeeded' AND finished_at > ? GROUP BY queue",
+                (now - 3600,)
+            ).fetchall()
+            oldest = self.conn.execute(
+                "SELECT queue, MIN(created_at) FROM jobs WHERE status = 'queued' GROUP BY queue"
+            ).fetchall()
+
+        queues: Dict[str, Dict[str, Any]] = {
+            queue: {"workers": concurrency, "queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+            for queue, concurrency in settings.JOB_QUEUE_CONCURRENCY.items()
+        }
+        for queue, status, count in counts:
+            queues.setdefault(queue, {"workers": 0})[status] = count
+        for queue, avg_latency, max_latency, avg_run_time in latencies:
+            queues[queue]["last_hour"] = {
+                "avg_latency": round(avg_latency, 3),
+                "max_latency": round(max_latency, 3),
+                "avg_run_time": round(avg_run_time, 3)
+            }
+        for queue, created_at in oldest:
+            queues[queue]["oldest_queued_age"] = round(now - created_at, 3)
+
+        return {"running_workers": len(self._workers), "queues": queues}
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -5,8 +5,20 @@ Runs user code against test cases in a sandboxed environment.
 import httpx
 import asyncio
 import base64
+import re
 from app.core.config import settings
-from typing import List, Dict, Any
+from app.services.cassette import Cassette
+from typing import List, Dict, Any, Optional
+
+# Judge0 status id for "Compilation Error"
+COMPILATION_ERROR = 6
+
+# Interpreted languages have no compile step: Judge0 reports their syntax
+# errors as runtime errors, recognised here from stderr. (Not JavaScript:
+# its SyntaxError is also what JSON.parse throws on bad input at runtime.)
+SYNTAX_ERROR_PATTERNS = {
+    "python": re.compile(r"^(SyntaxError|IndentationError|TabError):", re.MULTILINE)
+}
 
 class Judge0Service:
     """Handles code execution via Judge0 API"""
@@ -28,46 +40,160 @@ class Judge0Service:
             "cpp": 54,
             "c": 50
         }
+        
+        # Record/replay layer (pass-through unless CASSETTE_MODE is set)
+        self.cassette = Cassette("judge0")
+        
+        # One pooled client for all submissions (keep-alive connections)
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        self.stats = {"executed": 0, "skipped": 0}
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazy-create the shared HTTP client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=settings.JUDGE0_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.JUDGE0_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+    
+    async def ping(self) -> None:
+        """Cheapest round trip to Judge0 (also opens a pooled connection)"""
+        response = await self.client.get(f"{self.api_url}/about")
+        response.raise_for_status()
+    
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def run_test_cases(
         self,
         code: str,
         language: str,
-        test_cases: List[Dict[str, Any]]
+        test_cases: List[Dict[str, Any]],
+        fail_fast: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
-        Run code against multiple test cases.
+        Run code against multiple test cases, cheapest first.
+        
+        Visible tests run before hidden ones, and hidden tests only once
+        every visible test passed. A compile error stops the run; with
+        fail_fast (JUDGE0_FAIL_FAST by default) so does the first failure.
+        Tests not run are reported with skipped=True and passed=False.
         
         Args:
             code: User's source code
             language: Programming language
-            test_cases: List of test cases with input/expected_output
+            test_cases: List of test cases with input/expected_output/is_hidden
+            fail_fast: Stop at the first failing test
         
         Returns:
-            List of test results with pass/fail status
+            List of test results with pass/fail status, in test case order
         """
-        results = []
-        
-        for test_case in test_cases:
-            result = await self.execute_code(
-                code=code,
-                language=language,
-                stdin=test_case.get("input", ""),
-                expected_output=test_case.get("expected_output", "")
-            )
+        if fail_fast is None:
+            fail_fast = settings.JUDGE0_FAIL_FAST
+        
+        tiers = [
+            [i for i, test_case in enumerate(test_cases) if not test_case.get("is_hidden")],
+            [i for i, test_case in enumerate(test_cases) if test_case.get("is_hidden")]
+        ]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(test_cases)
+        skip_reason = None
+        
+        for tier in tiers:
+            if skip_reason:
+                break
+            if not tier:
+                continue
             
-            results.append({
-                "input": test_case.get("input"),
-                "expected_output": test_case.get("expected_output"),
-                "actual_output": result.get("stdout", ""),
-                "passed": result.get("passed", False),
-                "error": result.get("stderr", ""),
-                "execution_time": result.get("time", 0),
-                "memory_used": result.get("memory", 0)
-            })
+            # The first test alone catches compile errors before the rest run
+            batches = [tier[:1], tier[1:]]
+            if fail_fast:
+                batches = [[i] for i in tier]
+            
+            for batch in batches:
+                batch_results = await asyncio.gather(*(
+                    self._run_test_case(code, language, test_cases[i]) for i in batch
+                ))
+                for i, result in zip(batch, batch_results):
+                    results[i] = result
+                
+                if any(result["compile_error"] for result in batch_results):
+                    skip_reason = "compile_error"
+                elif fail_fast and not all(result["passed"] for result in batch_results):
+                    skip_reason = "failed_test"
+                if skip_reason:
+                    break
+            
+            if not skip_reason and not all(results[i]["passed"] for i in tier):
+                skip_reason = "visible_tests_failed"
+        
+        for i, test_case in enumerate(test_cases):
+            if results[i] is None:
+                results[i] = self._skipped_result(test_case, skip_reason)
         
+        self.stats["executed"] += sum(1 for result in results if not result["skipped"])
+        self.stats["skipped"] += sum(1 for result in results if result["skipped"])
         return results
     
+    async def _run_test_case(self, code: str, language: str, test_case: Dict[str, Any]) -> Dict[str, Any]:
+        result = await self.execute_code(
+            code=code,
+            language=language,
+            stdin=test_case.get("input", ""),
+            expected_output=test_case.get("expected_output", "")
+        )
+        
+        return {
+            "input": test_case.get("input"),
+            "expected_output": test_case.get("expected_output"),
+            "actual_output": result.get("stdout", ""),
+            "passed": result.get("passed", False),
+            "error": result.get("stderr", "") or result.get("compile_output", ""),
+            "execution_time": result.get("time", 0),
+            "memory_used": result.get("memory", 0),
+            "is_hidden": bool(test_case.get("is_hidden")),
+            "compile_error": self._is_compile_error(language, result),
+            "skipped": False
+        }
+    
+    def _is_compile_error(self, language: str, result: Dict[str, Any]) -> bool:
+        """A compile error, or a syntax error of an interpreted language"""
+        if result.get("status_id") == COMPILATION_ERROR:
+            return True
+        pattern = SYNTAX_ERROR_PATTERNS.get(language.lower())
+        return bool(pattern and result.get("stderr") and pattern.search(result["stderr"]))
+    
+    def _skipped_result(self, test_case: Dict[str, Any], reason: Optional[str]) -> Dict[str, Any]:
+        return {
+            "input": test_case.get("input"),
+            "expected_output": test_case.get("expected_output"),
+            "actual_output": "",
+            "passed": False,
+            "error": "",
+            "execution_time": 0,
+            "memory_used": 0,
+            "is_hidden": bool(test_case.get("is_hidden")),
+            "compile_error": False,
+            "skipped": True,
+            "skip_reason": reason
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Test cases run in the sandbox vs. skipped by the execution policy"""
+        total = self.stats["executed"] + self.stats["skipped"]
+        return {
+            **self.stats,
+            "skip_rate": round(self.stats["skipped"] / total, 4) if total else 0.0,
+            "fail_fast": settings.JUDGE0_FAIL_FAST
+        }
+    
     async def execute_code(
         self,
         code: str,
@@ -87,6 +213,25 @@ class Judge0Service:
         Returns:
             Execution result with output, errors, and status
         """
+        request = {
+            "language": language.lower(),
+            "code": code,
+            "stdin": stdin,
+            "expected_output": expected_output
+        }
+        return await self.cassette.play(
+            request,
+            lambda: self._submit_and_poll(code, language, stdin, expected_output)
+        )
+    
+    async def _submit_and_poll(
+        self,
+        code: str,
+        language: str,
+        stdin: str,
+        expected_output: str
+    ) -> Dict[str, Any]:
+        """Submit code to Judge0 and poll until the result is ready"""
         language_id = self.language_ids.get(language.lower(), 71)
         
         # Encode code and input
@@ -102,27 +247,25 @@ class Judge0Service:
             "expected_output": encoded_expected
         }
         
-        async with httpx.AsyncClient() as client:
-            # Submit code
-            response = await client.post(
-                f"{self.api_url}/submissions",
-                json=submission_data,
-                headers=self.headers,
-                params={"base64_encoded": "true", "wait": "false"}
-            )
-            
-            if response.status_code != 201:
-                return {
-                    "error": "Submission failed",
-                    "passed": False
-                }
-            
-            token = response.json().get("token")
-            
-            # Poll for result
-            result = await self._poll_result(client, token)
-            
-            return result
+        # Submit code
+        response = await self.client.post(
+            f"{self.api_url}/submissions",
+            json=submission_data,
+            params={"base64_encoded": "true", "wait": "false"}
+        )
+        
+        if response.status_code != 201:
+            return {
+                "error": "Submission failed",
+                "passed": False
+            }
+        
+        token = response.json().get("token")
+        
+        # Poll for result
+        result = await self._poll_result(self.client, token)
+        
+        return result
     
     async def _poll_result(
         self,
@@ -144,7 +287,6 @@ class Judge0Service:
         for _ in range(max_attempts):
             response = await client.get(
                 f"{self.api_url}/submissions/{token}",
-                headers=self.headers,
                 params={"base64_encoded": "true"}
             )
             
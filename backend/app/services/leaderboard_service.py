@@ -0,0 +1,117 @@
+"""
+Windowed leaderboards.
+Daily and weekly boards, overall or per course, read from per-user XP
+buckets that are incremented at submit time. Windows are UTC days and
+ISO weeks; a new window starts a new bucket, so boards roll over without
+any reset, and buckets past the retention period are pruned daily.
+"""
+from datetime import date, datetime, timedelta, timezone
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.job_queue import job_queue
+from typing import Any, Dict, Optional
+
+# window name -> bucket period
+WINDOWS = {
+    "daily": "day",
+    "weekly": "week"
+}
+
+ALL_COURSES = "all"
+
+def bucket_start(period: str, offset: int = 0, today: Optional[date] = None) -> date:
+    """First day of the current bucket, or of the one `offset` windows back"""
+    today = today or datetime.utcnow().date()
+    if period == "day":
+        return today - timedelta(days=offset)
+    return today - timedelta(days=today.weekday() + 7 * offset)
+
+def _window(window: str, offset: int) -> Dict[str, Any]:
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown leaderboard window: {window}")
+    if offset < 0:
+        raise ValueError("offset must be 0 (current window) or more")
+    period = WINDOWS[window]
+    start = bucket_start(period, offset)
+    end = start + timedelta(days=1 if period == "day" else 7)
+    return {"window": window, "period": period, "start": start.isoformat(), "end": end.isoformat()}
+
+async def get_board(window: str, course_id: Optional[str] = None, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+    """Top users of a window (offset 1 = the previous day/week)"""
+    info = _window(window, offset)
+    scope = course_id or ALL_COURSES
+    leaderboard = await supabase_client.get_window_leaderboard(info["period"], info["start"], scope, limit)
+    return {**info, "course_id": course_id, "leaderboard": leaderboard}
+
+async def get_rank(user_id: str, window: str, course_id: Optional[str] = None, offset: int = 0) -> Dict[str, Any]:
+    """A user's position in a window"""
+    info = _window(window, offset)
+    scope = course_id or ALL_COURSES
+    rank = await supabase_client.get_window_rank(info["period"], info["start"], scope, user_id)
+    return {**info, "course_id": course_id, **(rank or {"rank": None, "total_users": 0, "xp": 0})}
+
+async def record_xp(user_id: str, topic_id: str, xp: int, earned_at: Optional[datetime] = None) -> None:
+    """Count XP earned on a topic towards the user's windowed boards (those containing earned_at, default now)"""
+    if xp <= 0:
+        return
+    topic = await supabase_client.get_topic(topic_id)
+    await supabase_client.increment_xp_buckets(user_id, topic.get("course_id") if topic else None, xp, earned_at)
+
+async def record_xp_or_retry(user_id: str, topic_id: str, xp: int) -> None:
+    """
+    record_xp for the submit path: the boards are a side effect, so a
+    failure is logged and queued for retry instead of failing the submission.
+    The retry credits the windows the XP was earned in, not the ones it runs in.
+    """
+    earned_at = datetime.now(timezone.utc)
+    try:
+        await record_xp(user_id, topic_id, xp, earned_at)
+    except Exception as e:
+        print(f"⚠️ Leaderboard XP for {user_id} not recorded, queued for retry: {e}")
+        try:
+            await job_queue.enqueue("record_leaderboard_xp", {
+                "user_id": user_id, "topic_id": topic_id, "xp": xp, "earned_at": earned_at.isoformat()
+            })
+        except Exception as e:
+            print(f"❌ Leaderboard XP for {user_id} lost: {e}")
+
+async def record_xp_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retry of a failed record_xp. Skipped once the day it was earned is past
+    the retention period: that bucket has been (or is about to be) pruned.
+
+    Payload: user_id, topic_id, xp, earned_at (ISO timestamp)
+    """
+    earned_at = datetime.fromisoformat(payload["earned_at"]) if payload.get("earned_at") else None
+    if earned_at is not None:
+        cutoff = datetime.utcnow().date() - timedelta(days=settings.LEADERBOARD_BUCKET_RETENTION_DAYS)
+        if earned_at.astimezone(timezone.utc).date() < cutoff:
+            return {"recorded": 0, "expired": earned_at.isoformat()}
+    await record_xp(payload["user_id"], payload["topic_id"], payload["xp"], earned_at)
+    return {"recorded": payload["xp"]}
+
+# ============= ROLLOVER =============
+
+async def schedule_prune(day: Optional[date] = None) -> str:
+    """Queue the prune for the start of the given day (UTC); one job per day"""
+    day = day or datetime.utcnow().date()
+    delay = max((datetime.combine(day, datetime.min.time()) - datetime.utcnow()).total_seconds(), 0)
+    return await job_queue.enqueue(
+        "prune_xp_buckets",
+        {"day": day.isoformat()},
+        idempotency_key=f"prune_xp_buckets:{day.isoformat()}",
+        delay_seconds=delay
+    )
+
+async def prune_buckets(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop buckets older than the retention period, then schedule the next
+    day's run.
+
+    Payload: day (ISO date the run is for)
+    """
+    day = date.fromisoformat(payload["day"])
+    before = day - timedelta(days=settings.LEADERBOARD_BUCKET_RETENTION_DAYS)
+    deleted = await supabase_client.prune_xp_buckets(before.isoformat())
+    await schedule_prune(day + timedelta(days=1))
+    return {"deleted": deleted, "before": before.isoformat()}
@@ -0,0 +1,162 @@
+"""
+Speculative prefetch of each learner's next adaptive question.
+Starts generation right after a submission so the following
+/api/questions/adaptive call can be served without waiting on the LLM.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from app.ai.generators.question_generator import question_generator
+from app.services.question_bank import question_bank
+from app.core.config import settings
+from typing import Dict, Any, Optional, Tuple
+
+class QuestionPrefetcher:
+    """Holds at most one in-flight or ready question per (user, topic)"""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.generator = question_generator
+        self.bank = question_bank
+        self.ttl_seconds = ttl_seconds or settings.PREFETCH_TTL_SECONDS
+
+        # (user_id, topic_id) -> slot, oldest first so expiry is O(1) amortized
+        self._slots: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+        self.stats = {
+            "scheduled": 0,
+            "hits": 0,
+            "misses": 0,
+            "wasted": 0,  # expired or replaced before being used
+            "stale": 0,   # plan (difficulty/type) changed before being used
+            "failed": 0
+        }
+
+    def schedule(self, user_id: str, topic_id: str, user_progress: Dict[str, Any]) -> None:
+        """
+        Start generating the next adaptive question in the background.
+        Replaces any previous prefetch for the same user/topic.
+        """
+        if not settings.PREFETCH_ENABLED:
+            return
+
+        self._evict_expired()
+
+        key = (user_id, topic_id)
+        previous = self._slots.pop(key, None)
+        if previous:
+            self._discard(previous, "wasted")
+
+        difficulty, question_type = self.generator.plan_adaptive_question(user_progress)
+        task = asyncio.create_task(self.prepare(user_id, topic_id, user_progress))
+        task.add_done_callback(self._on_task_done)
+
+        self._slots[key] = {
+            "task": task,
+            "difficulty": difficulty,
+            "question_type": question_type,
+            "expires_at": time.monotonic() + self.ttl_seconds
+        }
+        self.stats["scheduled"] += 1
+
+    async def take(
+        self,
+        user_id: str,
+        topic_id: str,
+        user_progress: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Claim the prefetched question for this user/topic.
+
+        Returns None (and records why) when there is no usable prefetch:
+        nothing scheduled, expired, planned for a different difficulty or
+        question type than the current progress implies, or failed.
+        An in-flight prefetch is awaited, which is still faster than
+        starting a fresh generation.
+        """
+        slot = self._slots.pop((user_id, topic_id), None)
+
+        if slot is None:
+            self.stats["misses"] += 1
+            return None
+
+        if slot["expires_at"] < time.monotonic():
+            self._discard(slot, "wasted")
+            return None
+
+        plan = self.generator.plan_adaptive_question(user_progress)
+        if plan != (slot["difficulty"], slot["question_type"]):
+            self._discard(slot, "stale")
+            return None
+
+        try:
+            question = await slot["task"]
+        except Exception:
+            self.stats["failed"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return question
+
+    async def prepare(
+        self,
+        user_id: str,
+        topic_id: str,
+        user_progress: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Produce the next adaptive question: an unseen stored question from
+        the bank when there is one (it already has an id), else a freshly
+        generated, unsaved one.
+        """
+        difficulty, question_type = self.generator.plan_adaptive_question(user_progress)
+
+        existing = await self.bank.pick(
+            user_id=user_id,
+            topic_id=topic_id,
+            subtopic_id=None,
+            difficulty=difficulty.value,
+            question_type=question_type.value
+        )
+        if existing:
+            return existing
+
+        return await self.generator.generate_adaptive_question(
+            user_id=user_id,
+            topic_id=topic_id,
+            user_progress=user_progress
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Prefetch counters plus derived hit rate"""
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["stale"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "pending": len(self._slots),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+    def _evict_expired(self) -> None:
+        """Drop expired slots from the front of the queue"""
+        now = time.monotonic()
+        while self._slots:
+            key, slot = next(iter(self._slots.items()))
+            if slot["expires_at"] >= now:
+                break
+            self._slots.popitem(last=False)
+            self._discard(slot, "wasted")
+
+    def _discard(self, slot: Dict[str, Any], reason: str) -> None:
+        """Cancel an unused prefetch and count it"""
+        slot["task"].cancel()
+        self.stats[reason] += 1
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        """Retrieve background failures so they are logged, not leaked"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error:
+            print(f"⚠️ Question prefetch failed: {error}")
+
+# Global question prefetcher instance
+question_prefetcher = QuestionPrefetcher()
@@ -2,11 +2,23 @@
 User progress tracking and adaptive learning service.
 Manages XP, levels, difficulty progression, and learning recommendations.
 """
+import asyncio
 from app.db.supabase_client import supabase_client
+from app.services.leaderboard_service import record_xp_or_retry
 from app.models.schemas import LearningAction, DifficultyLevel
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
+DIFFICULTY_LEVELS = ["beginner", "intermediate", "advanced", "expert"]
+
+# Mastery points (0-30) for the difficulty a learner has reached
+MASTERY_DIFFICULTY_SCORES = {
+    "beginner": 10,
+    "intermediate": 20,
+    "advanced": 25,
+    "expert": 30
+}
+
 class ProgressService:
     """Manages user learning progression and adaptive difficulty"""
     
@@ -58,8 +70,11 @@ class ProgressService:
         if new_level > old_level:
             level_up_info = self._create_level_up_info(new_level)
         
-        # 2. Update streak
-        await self._update_streak(user_id)
+        # 2. Update streak and windowed leaderboard counters
+        await asyncio.gather(
+            self._update_streak(user_id),
+            record_xp_or_retry(user_id, topic_id, xp_earned)
+        )
         
         # 3. Get or create topic progress
         topic_progress = await self.db.get_user_progress(user_id, topic_id)
@@ -167,7 +182,7 @@ class ProgressService:
     
     def _increase_difficulty(self, current: str) -> str:
         """Move to next difficulty level"""
-        levels = ["beginner", "intermediate", "advanced", "expert"]
+        levels = DIFFICULTY_LEVELS
         try:
             idx = levels.index(current)
             return levels[min(idx + 1, len(levels) - 1)]
@@ -176,7 +191,7 @@ class ProgressService:
     
     def _decrease_difficulty(self, current: str) -> str:
         """Move to previous difficulty level"""
-        levels = ["beginner", "intermediate", "advanced", "expert"]
+        levels = DIFFICULTY_LEVELS
         try:
             idx = levels.index(current)
             return levels[max(idx - 1, 0)]
@@ -205,13 +220,7 @@ class ProgressService:
         volume_score = min(questions_attempted / 50, 1.0) * 30
         
         # Difficulty component (0-30)
-        difficulty_scores = {
-            "beginner": 10,
-            "intermediate": 20,
-            "advanced": 25,
-            "expert": 30
-        }
-        difficulty_score = difficulty_scores.get(current_difficulty, 10)
+        difficulty_score = MASTERY_DIFFICULTY_SCORES.get(current_difficulty, 10)
         
         mastery = int(accuracy_score + volume_score + difficulty_score)
         return min(mastery, 100)
@@ -245,10 +254,7 @@ class ProgressService:
                 new_streak = 1
         
         # Update streak in database
-        await self.db.client.table("user_profiles").update({
-            "streak": new_streak,
-            "last_activity_date": today.isoformat()
-        }).eq("id", user_id).execute()
+        await self.db.update_user_streak(user_id, new_streak, today.isoformat())
         
         return new_streak
     
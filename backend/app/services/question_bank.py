@@ -0,0 +1,273 @@
+"""
+Question bank reuse across users.
+Serves an existing stored question the learner has not seen before paying
+for a new generation; per-user seen-sets are compact Bloom filters.
+Newly generated near-duplicates of stored questions are merged, not saved.
+"""
+import hashlib
+import math
+import random
+from collections import OrderedDict
+from app.db.supabase_client import supabase_client
+from app.services.dedup_index import dedup_index
+from app.core.config import settings
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class SeenSet:
+    """
+    Bloom filter over question ids.
+
+    False positives only mean an unseen question is occasionally skipped;
+    a question the user has seen is never reported as unseen.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.num_bits = max(64, int(-self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: h1 + i * h2 gives k independent-enough positions
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def saturated(self) -> bool:
+        """True once more items were added than the filter was sized for"""
+        return self.count > self.capacity
+
+class QuestionBank:
+    """Picks stored questions a user has not seen yet"""
+
+    def __init__(self):
+        self.db = supabase_client
+        self.dedup = dedup_index
+
+        # user_id -> SeenSet, least recently used first
+        self._seen: "OrderedDict[str, SeenSet]" = OrderedDict()
+
+        self.stats = {
+            "reused": 0,
+            "generated": 0,
+            "exhausted": 0,
+            "duplicates": 0,
+            "merged": 0,
+            "repeats": 0,
+            "degraded": 0
+        }
+
+    async def pick(
+        self,
+        user_id: str,
+        topic_id: str,
+        subtopic_id: Optional[str],
+        difficulty: str,
+        question_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored question matching (topic, subtopic, difficulty, type)
+        that this user has not seen. Returns None when the bank is exhausted.
+
+        When subtopic_id is None any subtopic of the topic matches.
+        """
+        if not settings.QUESTION_BANK_ENABLED:
+            return None
+
+        seen = await self._get_seen_set(user_id)
+        after_id = None
+
+        # Page through candidate ids in id order until an unseen one shows up
+        while True:
+            candidate_ids = await self.db.get_question_ids(
+                topic_id=topic_id,
+                subtopic_id=subtopic_id,
+                difficulty=difficulty,
+                question_type=question_type,
+                after_id=after_id,
+                limit=settings.QUESTION_BANK_PAGE_SIZE
+            )
+            unseen = [qid for qid in candidate_ids if qid not in seen]
+
+            if unseen:
+                return await self.db.get_question(random.choice(unseen))
+
+            if len(candidate_ids) < settings.QUESTION_BANK_PAGE_SIZE:
+                self.stats["exhausted"] += 1
+                return None
+
+            after_id = candidate_ids[-1]
+
+    async def pick_fallback(
+        self,
+        user_id: str,
+        topic_id: str,
+        subtopic_id: Optional[str],
+        difficulty: str,
+        question_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Degraded-mode pick used when no new question can be generated: prefer
+        an unseen exact match, then an unseen stored question for the topic
+        of any difficulty or type. None rather than a question the user has
+        already seen.
+        """
+        existing = await self.pick(user_id, topic_id, subtopic_id, difficulty, question_type)
+        if existing:
+            return existing
+
+        seen = await self._get_seen_set(user_id)
+        after_id = None
+        while True:
+            candidates = await self.db.get_questions_page(
+                columns="id",
+                topic_id=topic_id,
+                after_id=after_id,
+                limit=settings.QUESTION_BANK_PAGE_SIZE
+            )
+            unseen = [row["id"] for row in candidates if row["id"] not in seen]
+
+            if unseen:
+                self.stats["degraded"] += 1
+                return await self.db.get_question(random.choice(unseen))
+
+            if len(candidates) < settings.QUESTION_BANK_PAGE_SIZE:
+                return None
+
+            after_id = candidates[-1]["id"]
+
+    async def store_generated(
+        self,
+        user_id: Optional[str],
+        question_data: Dict[str, Any],
+        regenerate: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Save a freshly generated question and mark it served.
+
+        If it is a near-duplicate of a stored question the user hasn't seen,
+        the stored question is served instead and the new one is dropped.
+        If the user has already seen that stored question, the new one is
+        dropped as well and `regenerate` asked for another, up to
+        DEDUP_MAX_REGENERATIONS times; None means nothing new was found.
+        Without a user (bank pre-generation) a near-duplicate is always
+        dropped and the stored question returned.
+        """
+        for attempt in range(settings.DEDUP_MAX_REGENERATIONS + 1):
+            if attempt:
+                question_data = await regenerate()
+
+            scope = (question_data.get("topic_id"), question_data.get("question_type"))
+            signature = None
+
+            if settings.DEDUP_ENABLED and scope[0]:
+                await self._ensure_scope_indexed(scope)
+                signature = self.dedup.signature(question_data)
+                match = self.dedup.find_duplicate(scope, question_data, signature)
+
+                if match:
+                    self.stats["duplicates"] += 1
+                    if user_id and match[0] in await self._get_seen_set(user_id):
+                        # Serving either copy would repeat a question for this user
+                        self.stats["repeats"] += 1
+                        if regenerate is None:
+                            return None
+                        continue
+
+                    existing = await self.db.get_question(match[0])
+                    if existing:
+                        self.stats["merged"] += 1
+                        if user_id:
+                            self.record_served(user_id, existing["id"], reused=True)
+                        return existing
+
+            saved = await self.db.save_question(question_data)
+            if scope[0]:
+                self.dedup.add(scope, saved["id"], saved, signature)
+            if user_id:
+                self.record_served(user_id, saved["id"], reused=False)
+
+            return saved
+
+        return None
+
+    def record_served(self, user_id: str, question_id: str, reused: bool) -> None:
+        """Mark a question as seen by the user once it has been served"""
+        self.stats["reused" if reused else "generated"] += 1
+
+        seen = self._seen.get(user_id)
+        if seen is None:
+            return
+
+        seen.add(question_id)
+        if seen.saturated:
+            # Rebuilt from the database, with more room, on next use
+            del self._seen[user_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        served = self.stats["reused"] + self.stats["generated"]
+        return {
+            **self.stats,
+            "cached_users": len(self._seen),
+            "indexed_questions": len(self.dedup),
+            "reuse_rate": round(self.stats["reused"] / served, 4) if served else 0.0
+        }
+
+    async def _ensure_scope_indexed(self, scope) -> None:
+        """Load a (topic, question type) scope into the dedup index once"""
+        if self.dedup.is_loaded(scope):
+            return
+
+        topic_id, question_type = scope
+        after_id = None
+        while True:
+            page = await self.db.get_questions_page(
+                columns="id, question_text, code_snippet, options",
+                topic_id=topic_id,
+                question_type=question_type,
+                after_id=after_id,
+                limit=settings.QUESTION_BANK_PAGE_SIZE
+            )
+            for question in page:
+                self.dedup.add(scope, question["id"], question)
+            if len(page) < settings.QUESTION_BANK_PAGE_SIZE:
+                break
+            after_id = page[-1]["id"]
+
+        self.dedup.mark_loaded(scope)
+
+    async def _get_seen_set(self, user_id: str) -> SeenSet:
+        """Get the user's seen-set, loading it from the database if needed"""
+        seen = self._seen.get(user_id)
+        if seen is not None:
+            self._seen.move_to_end(user_id)
+            return seen
+
+        question_ids = await self.db.get_seen_question_ids(user_id)
+        seen = SeenSet(
+            capacity=max(settings.QUESTION_BANK_SEEN_CAPACITY, len(question_ids) * 2),
+            false_positive_rate=settings.QUESTION_BANK_FALSE_POSITIVE_RATE
+        )
+        for question_id in question_ids:
+            seen.add(question_id)
+
+        self._seen[user_id] = seen
+        while len(self._seen) > settings.QUESTION_BANK_MAX_USERS:
+            self._seen.popitem(last=False)
+
+        return seen
+
+# Global question bank instance
+question_bank = QuestionBank()
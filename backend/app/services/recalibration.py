@@ -0,0 +1,263 @@
+"""
+Bulk recomputation of derived progress fields.
+Streams user_progress and user_profiles in keyset pages, re-applies the
+accuracy, mastery, difficulty and level formulas to whole pages at once
+with NumPy, and writes changed rows back in batched upserts. Progress is
+checkpointed per page so an interrupted run resumes where it stopped.
+"""
+import asyncio
+import json
+import os
+import time
+import numpy as np
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.progress_service import DIFFICULTY_LEVELS, MASTERY_DIFFICULTY_SCORES
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+# table -> columns read, recomputed columns written back, and columns
+# carried unchanged so each upserted row satisfies the table's NOT NULLs
+TABLES = {
+    "user_progress": {
+        "columns": ["id", "user_id", "topic_id", "current_difficulty", "questions_attempted",
+                    "questions_correct", "accuracy", "mastery_level"],
+        "written": ["accuracy", "current_difficulty", "mastery_level"],
+        "carried": ["user_id", "topic_id"]
+    },
+    "user_profiles": {
+        "columns": ["id", "email", "full_name", "xp", "level"],
+        "written": ["level"],
+        "carried": ["email", "full_name"]
+    }
+}
+
+# ============= VECTORIZED FORMULAS =============
+# Whole-array versions of ProgressService._adjust_difficulty (accuracy
+# rules only), ProgressService._calculate_mastery and
+# SupabaseClient._calculate_level; keep them in step when tuning those
+
+def accuracy(questions_correct: np.ndarray, questions_attempted: np.ndarray) -> np.ndarray:
+    """Percent correct, rounded like the DECIMAL(5,2) column"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(questions_attempted > 0, questions_correct / questions_attempted * 100, 0.0)
+    return np.round(percent, 2)
+
+def adjust_difficulty(levels: np.ndarray, accuracy: np.ndarray, questions_attempted: np.ndarray) -> np.ndarray:
+    """One step of the automatic difficulty rule; levels are indexes into DIFFICULTY_LEVELS"""
+    step = np.where((accuracy >= 80) & (questions_attempted >= 10), 1, np.where(accuracy < 50, -1, 0))
+    step = np.where(questions_attempted < 5, 0, step)
+    return np.clip(levels + step, 0, len(DIFFICULTY_LEVELS) - 1)
+
+def mastery(accuracy: np.ndarray, questions_attempted: np.ndarray, levels: np.ndarray) -> np.ndarray:
+    """Mastery 0-100 from accuracy (40), volume (30) and difficulty reached (30)"""
+    difficulty_scores = np.array([MASTERY_DIFFICULTY_SCORES[level] for level in DIFFICULTY_LEVELS])
+    score = accuracy / 100 * 40 + np.minimum(questions_attempted / 50, 1.0) * 30 + difficulty_scores[levels]
+    return np.minimum(score.astype(np.int64), 100)
+
+def level_for_xp(xp: np.ndarray) -> np.ndarray:
+    return np.maximum(1, np.floor(np.sqrt(xp / 100))).astype(np.int64)
+
+# ============= PAGE RECOMPUTATION =============
+
+def _int_column(rows: List[Dict[str, Any]], column: str) -> np.ndarray:
+    return np.fromiter((row.get(column) or 0 for row in rows), np.int64, len(rows))
+
+def recompute_progress_page(rows: List[Dict[str, Any]], difficulty: bool = False) -> List[Dict[str, Any]]:
+    """
+    New values for the user_progress rows that change, as
+    {"id", "before", "after"} dicts holding only the changed fields.
+
+    Difficulty is left alone unless `difficulty` is set: the submit-time
+    rule moves one level per evaluation, so applying it is a deliberate,
+    one-step recalibration rather than an idempotent recompute.
+    """
+    attempted = _int_column(rows, "questions_attempted")
+    correct = _int_column(rows, "questions_correct")
+    stored_accuracy = np.fromiter((float(row.get("accuracy") or 0) for row in rows), np.float64, len(rows))
+    stored_mastery = _int_column(rows, "mastery_level")
+    level_index = {level: index for index, level in enumerate(DIFFICULTY_LEVELS)}
+    stored_levels = np.fromiter((level_index.get(row.get("current_difficulty"), 0) for row in rows), np.int64, len(rows))
+
+    new_accuracy = accuracy(correct, attempted)
+    new_levels = adjust_difficulty(stored_levels, new_accuracy, attempted) if difficulty else stored_levels
+    new_mastery = mastery(new_accuracy, attempted, new_levels)
+
+    changed_accuracy = np.abs(new_accuracy - stored_accuracy) >= 0.005
+    changed_levels = new_levels != stored_levels
+    changed_mastery = new_mastery != stored_mastery
+
+    changes = []
+    for i in np.nonzero(changed_accuracy | changed_levels | changed_mastery)[0]:
+        row = rows[i]
+        before, after = {}, {}
+        if changed_accuracy[i]:
+            before["accuracy"], after["accuracy"] = row.get("accuracy"), float(new_accuracy[i])
+        if changed_levels[i]:
+            before["current_difficulty"], after["current_difficulty"] = row.get("current_difficulty"), DIFFICULTY_LEVELS[new_levels[i]]
+        if changed_mastery[i]:
+            before["mastery_level"], after["mastery_level"] = row.get("mastery_level"), int(new_mastery[i])
+        changes.append({"id": row["id"], "before": before, "after": after})
+    return changes
+
+def recompute_profiles_page(rows: List[Dict[str, Any]], difficulty: bool = False) -> List[Dict[str, Any]]:
+    """New levels for the user_profiles rows whose level no longer matches their XP"""
+    stored = _int_column(rows, "level")
+    levels = level_for_xp(_int_column(rows, "xp"))
+    return [
+        {"id": rows[i]["id"], "before": {"level": rows[i].get("level")}, "after": {"level": int(levels[i])}}
+        for i in np.nonzero(levels != stored)[0]
+    ]
+
+RECOMPUTE = {
+    "user_progress": recompute_progress_page,
+    "user_profiles": recompute_profiles_page
+}
+
+# ============= RUNNER =============
+
+class RecomputeCheckpoint:
+    """Last committed id per table, valid only for the same options"""
+
+    def __init__(self, path: str, options: Dict[str, Any]):
+        self.path = path
+        self.options = options
+
+    def load(self, table: str) -> Optional[str]:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("options") != self.options:
+            return None
+        return state.get("tables", {}).get(table)
+
+    def save(self, table: str, after_id: str) -> None:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("options") != self.options:
+            state = {"options": self.options, "tables": {}}
+        state["tables"][table] = after_id
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+async def recompute_table(
+    table: str,
+    difficulty: bool = False,
+    page_size: Optional[int] = None,
+    dry_run: bool = False,
+    resume: bool = True,
+    diff_file: Optional[TextIO] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    checkpoint_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Recompute one table.
+
+    Each page's changed rows are upserted while the next page is read; the
+    checkpoint advances only after a page's write has committed.
+
+    Args:
+        table: user_progress | user_profiles
+        difficulty: Also apply one step of the automatic difficulty rule
+        page_size: Rows per keyset page (and at most per upsert)
+        dry_run: Compute and report changes, write nothing
+        resume: Continue after the last committed page of an interrupted run
+        diff_file: Receives one JSON line per changed row ({"table", "id", "before", "after"})
+        on_progress: Called with the running counters after every page
+        checkpoint_path: Defaults to RECOMPUTE_CHECKPOINT_PATH
+
+    Returns:
+        Counters: scanned, changed, written, per-field change counts
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    spec = TABLES[table]
+    page_size = page_size or settings.EXPORT_PAGE_SIZE
+    checkpoint = RecomputeCheckpoint(checkpoint_path or settings.RECOMPUTE_CHECKPOINT_PATH, {"difficulty": difficulty})
+    after_id = checkpoint.load(table) if resume and not dry_run else None
+
+    stats = {"table": table, "scanned": 0, "changed": 0, "written": 0, "fields": {}, "resumed_after": after_id}
+    started = time.perf_counter()
+
+    def fetch(after: Optional[str]):
+        return asyncio.ensure_future(supabase_client.get_export_page(
+            table, columns=", ".join(spec["columns"]), date_column="created_at", after_id=after, limit=page_size
+        ))
+
+    next_page = fetch(after_id)
+    try:
+        while True:
+            page = await next_page
+            next_page = None
+            if not page:
+                break
+
+            changes = RECOMPUTE[table](page, difficulty=difficulty)
+            stats["scanned"] += len(page)
+            stats["changed"] += len(changes)
+            for change in changes:
+                for field in change["after"]:
+                    stats["fields"][field] = stats["fields"].get(field, 0) + 1
+                if diff_file is not None:
+                    diff_file.write(json.dumps({"table": table, **change}) + "\n")
+
+            if len(page) == page_size:
+                next_page = fetch(page[-1]["id"])
+
+            if changes and not dry_run:
+                # A bulk upsert needs the same keys in every row, so
+                # unchanged recomputed fields are sent as stored
+                rows_by_id = {row["id"]: row for row in page}
+                await supabase_client.upsert_rows(table, [
+                    {
+                        "id": change["id"],
+                        **{column: rows_by_id[change["id"]].get(column) for column in spec["carried"]},
+                        **{column: change["after"].get(column, rows_by_id[change["id"]].get(column)) for column in spec["written"]}
+                    }
+                    for change in changes
+                ])
+                stats["written"] += len(changes)
+            if not dry_run:
+                checkpoint.save(table, page[-1]["id"])
+
+            if on_progress is not None:
+                elapsed = time.perf_counter() - started
+                on_progress({**stats, "rows_per_second": round(stats["scanned"] / elapsed) if elapsed else 0})
+            if next_page is None:
+                break
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    return stats
+
+async def recompute_all(
+    tables: Optional[List[str]] = None,
+    difficulty: bool = False,
+    page_size: Optional[int] = None,
+    dry_run: bool = False,
+    resume: bool = True,
+    diff_file: Optional[TextIO] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    checkpoint_path: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Recompute each table in turn; the checkpoint is removed once all have finished"""
+    results = []
+    for table in tables or list(TABLES):
+        results.append(await recompute_table(
+            table, difficulty, page_size, dry_run, resume, diff_file, on_progress, checkpoint_path
+        ))
+    if not dry_run:
+        RecomputeCheckpoint(checkpoint_path or settings.RECOMPUTE_CHECKPOINT_PATH, {"difficulty": difficulty}).clear()
+    return results
@@ -0,0 +1,50 @@
+"""
+Startup warmup.
+Optionally run in the startup hook, before the worker accepts requests:
+opens the Supabase and Judge0 connection pools, primes the catalog cache
+and sends a token-count request to Gemini (which also loads the SDK), so the
+first learners on a fresh worker don't pay for any of it.
+"""
+import asyncio
+import time
+from app.ai.llm_client import gemini_client
+from app.core.config import settings
+from app.db.supabase_client import supabase_client
+from app.services.judge0_service import judge0_service
+from typing import Any, Awaitable, Callable, Dict
+
+# step -> {"ok", "seconds", "error"}; empty until warmup has run
+warmup_status: Dict[str, Dict[str, Any]] = {}
+
+async def _prime_catalog() -> None:
+    """Courses and every course's topics into the shared catalog cache"""
+    courses = await supabase_client.get_courses()
+    await asyncio.gather(*(supabase_client.get_topics(course["id"]) for course in courses))
+
+async def _open_admin_pool() -> None:
+    await asyncio.to_thread(lambda: supabase_client.admin_client)
+
+STEPS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "supabase": _prime_catalog,
+    "supabase_admin": _open_admin_pool,
+    "judge0": judge0_service.ping,
+    "gemini": gemini_client.ping
+}
+
+async def _run_step(name: str, step: Callable[[], Awaitable[None]]) -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(step(), settings.WARMUP_TIMEOUT_SECONDS)
+        warmup_status[name] = {"ok": True}
+    except Exception as e:
+        # A dependency being down shouldn't stop the worker from starting
+        warmup_status[name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    warmup_status[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+async def run_warmup() -> Dict[str, Dict[str, Any]]:
+    """Run every step concurrently, each bounded by WARMUP_TIMEOUT_SECONDS"""
+    await asyncio.gather(*(_run_step(name, step) for name, step in STEPS.items()))
+    for name, status in warmup_status.items():
+        icon = "✅" if status["ok"] else "⚠️"
+        print(f"{icon} Warmup {name}: {status['seconds']}s" + ("" if status["ok"] else f" ({status['error']})"))
+    return warmup_status
@@ -0,0 +1,179 @@
+"""
+Micro-benchmark of response serialization CPU per request.
+Each endpoint is served twice over the same fixture rows: the original
+path (dict return, response_model validation, stdlib json) and the fast
+path (the app's real routes: FastJSONResponse, row projection and
+pre-encoded bodies). Database calls are replaced with fixture coroutines
+so only the web layer is measured.
+
+Usage:
+    python -m benchmarks.bench_responses [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from fastapi import FastAPI
+from app.api import course, topic, question, progress
+from app.db.supabase_client import supabase_client
+from app.models.schemas import Course, Question
+from typing import List
+
+def _id() -> str:
+    return str(uuid.uuid4())
+
+COURSES = [
+    {
+        "id": _id(), "name": f"Course {i}", "description": "Master fundamental concepts " * 4,
+        "icon": "code", "color": "from-cyan-500 to-blue-600", "total_topics": 15,
+        "estimated_hours": 40, "created_at": "2024-01-01T00:00:00+00:00"
+    }
+    for i in range(20)
+]
+COURSE_ID = COURSES[0]["id"]
+TOPICS = [
+    {
+        "id": _id(), "course_id": COURSE_ID, "name": f"Topic {i}", "description": "Learn the topic " * 5,
+        "order": i, "difficulty": "beginner", "estimated_minutes": 45, "created_at": "2024-01-01T00:00:00+00:00"
+    }
+    for i in range(15)
+]
+TOPIC_ID = TOPICS[0]["id"]
+SUBTOPICS = [
+    {"id": _id(), "topic_id": TOPIC_ID, "name": f"Subtopic {i}", "description": "Details " * 5, "order": i}
+    for i in range(8)
+]
+QUESTION = {
+    "id": _id(), "user_id": _id(), "topic_id": TOPIC_ID, "subtopic_id": SUBTOPICS[0]["id"],
+    "question_type": "mcq", "difficulty": "intermediate",
+    "question_text": "What is the time complexity of binary search on a sorted array of n elements?",
+    "options": [{"id": k, "text": f"O({k} n) option text", "is_correct": k == "b"} for k in "abcd"],
+    "code_snippet": None, "language": None, "test_cases": None, "starter_code": None,
+    "explanation": "Binary search halves the search interval each step. " * 4,
+    "hints": ["Think about halving", "How many times can n be halved?"],
+    "xp_reward": 50, "created_at": "2024-01-01T00:00:00+00:00"
+}
+PROGRESS = [
+    {
+        "topic_id": t["id"], "current_difficulty": "intermediate", "questions_attempted": 40,
+        "questions_correct": 31, "accuracy": 77.5, "total_xp_earned": 1550, "mastery_level": 3,
+        "last_activity": "2024-01-01T00:00:00+00:00"
+    }
+    for t in TOPICS
+]
+ATTEMPTS = [
+    {
+        "id": _id(), "question_id": _id(), "topic_id": TOPIC_ID, "is_correct": i % 2 == 0, "xp_earned": 50,
+        "time_taken": 42, "recommended_action": "continue", "attempted_at": "2024-01-01T00:00:00+00:00"
+    }
+    for i in range(5)
+]
+PROFILE = {
+    "id": _id(), "email": "user@example.com", "full_name": "Bench User", "level": 7, "xp": 4900,
+    "streak": 12, "last_activity_date": "2024-01-01"
+}
+
+def install_fixtures() -> None:
+    """Point the DB layer at the fixture rows"""
+    async def value(v):
+        return v
+    supabase_client.get_courses = lambda: value(COURSES)
+    supabase_client.get_course = lambda course_id: value(COURSES[0])
+    supabase_client.get_topics = lambda course_id: value(TOPICS)
+    supabase_client.get_topic = lambda topic_id: value(TOPICS[0])
+    supabase_client.get_subtopics = lambda topic_id: value(SUBTOPICS)
+    supabase_client.get_question = lambda question_id: value(QUESTION)
+    supabase_client.get_user_profile = lambda user_id: value(PROFILE)
+    supabase_client.get_all_progress = lambda user_id, columns="*": value(PROGRESS)
+    supabase_client.get_attempts_page = lambda user_id, **kwargs: value((ATTEMPTS, None))
+    supabase_client.get_user_rank = lambda user_id: value({"rank": 3, "total_users": 1200, "xp": 4900})
+
+def baseline_app() -> FastAPI:
+    """The routes as they were: dicts validated through response_model and encoded with json"""
+    app = FastAPI()
+
+    @app.get("/api/courses/", response_model=List[Course])
+    async def get_courses():
+        return await supabase_client.get_courses()
+
+    @app.get("/api/courses/{course_id}")
+    async def get_course(course_id: str):
+        return {"course": await supabase_client.get_course(course_id), "topics": await supabase_client.get_topics(course_id)}
+
+    @app.get("/api/topics/{topic_id}")
+    async def get_topic(topic_id: str):
+        return {"topic": await supabase_client.get_topic(topic_id), "subtopics": await supabase_client.get_subtopics(topic_id)}
+
+    @app.get("/api/questions/{question_id}", response_model=Question)
+    async def get_question(question_id: str):
+        return await supabase_client.get_question(question_id)
+
+    @app.get("/api/progress/dashboard/{user_id}")
+    async def get_dashboard(user_id: str):
+        return await progress.build_dashboard(user_id)
+
+    return app
+
+def fast_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(course.router, prefix="/api/courses")
+    app.include_router(topic.router, prefix="/api/topics")
+    app.include_router(question.router, prefix="/api/questions")
+    app.include_router(progress.router, prefix="/api/progress")
+    return app
+
+ENDPOINTS = {
+    "GET /api/courses/": "/api/courses/",
+    "GET /api/courses/{id}": f"/api/courses/{COURSE_ID}",
+    "GET /api/topics/{id}": f"/api/topics/{TOPIC_ID}",
+    "GET /api/questions/{id}": f"/api/questions/{QUESTION['id']}",
+    "GET /api/progress/dashboard/{id}": f"/api/progress/dashboard/{PROFILE['id']}"
+}
+
+async def asgi_get(app: FastAPI, path: str) -> bytes:
+    """Drive one GET through the ASGI app in-process (no sockets, no client library)"""
+    body = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80)
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+async def cpu_per_request(app: FastAPI, path: str, requests: int) -> float:
+    """Average process CPU microseconds per request (after a warm-up)"""
+    for _ in range(50):
+        await asgi_get(app, path)
+    started = time.process_time()
+    for _ in range(requests):
+        await asgi_get(app, path)
+    return (time.process_time() - started) / requests * 1e6
+
+async def main(requests: int) -> None:
+    install_fixtures()
+    baseline = baseline_app()
+    fast = fast_app()
+
+    print(f"CPU per request, µs ({requests} requests per variant)\n")
+    print(f"{'endpoint':36} {'before':>8} {'after':>8} {'change':>8}")
+    for name, path in ENDPOINTS.items():
+        assert json.loads(await asgi_get(baseline, path)) == json.loads(await asgi_get(fast, path)), name
+        before = await cpu_per_request(baseline, path, requests)
+        after = await cpu_per_request(fast, path, requests)
+        print(f"{name:36} {before:8.0f} {after:8.0f} {(after - before) / before * 100:+7.0f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -101,13 +101,33 @@ CREATE TABLE question_attempts (
     attempted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- ============= XP BUCKETS =============
+-- Per-user XP per (period, UTC bucket start, scope) for windowed
+-- leaderboards; incremented at submit time, old buckets pruned daily
+CREATE TABLE xp_buckets (
+    period TEXT NOT NULL CHECK (period IN ('day', 'week')),
+    bucket_start DATE NOT NULL,
+    scope TEXT NOT NULL, -- 'all' or a course id
+    user_id UUID NOT NULL REFERENCES user_profiles(id) ON DELETE CASCADE,
+    xp INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (period, bucket_start, scope, user_id)
+);
+
 -- ============= INDEXES =============
 CREATE INDEX idx_user_progress_user_id ON user_progress(user_id);
 CREATE INDEX idx_user_progress_topic_id ON user_progress(topic_id);
-CREATE INDEX idx_question_attempts_user_id ON question_attempts(user_id);
+-- Attempt history is keyset-paginated newest first on (attempted_at, id)
+CREATE INDEX idx_question_attempts_user_attempted ON question_attempts(user_id, attempted_at DESC, id DESC);
+CREATE INDEX idx_question_attempts_user_topic_attempted ON question_attempts(user_id, topic_id, attempted_at DESC, id DESC);
 CREATE INDEX idx_question_attempts_topic_id ON question_attempts(topic_id);
 CREATE INDEX idx_topics_course_id ON topics(course_id);
 CREATE INDEX idx_subtopics_topic_id ON subtopics(topic_id);
+CREATE INDEX idx_questions_bank ON questions(topic_id, difficulty, question_type, id);
+CREATE INDEX idx_questions_user_id ON questions(user_id);
+CREATE INDEX idx_user_profiles_xp ON user_profiles(xp DESC);
+-- Windowed top-N and rank are range reads on one board's slice of this index
+CREATE INDEX idx_xp_buckets_board ON xp_buckets(period, bucket_start, scope, xp DESC);
 
 -- ============= SEED DATA =============
 
@@ -155,6 +175,7 @@ FROM courses c WHERE c.name = 'HTML & CSS';
 ALTER TABLE user_profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_progress ENABLE ROW LEVEL SECURITY;
 ALTER TABLE question_attempts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE xp_buckets ENABLE ROW LEVEL SECURITY; -- no policies: read and written through the functions below
 
 -- User profiles policies
 CREATE POLICY "Users can view own profile" ON user_profiles
@@ -211,6 +232,118 @@ CREATE TRIGGER update_user_profiles_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Leaderboard position of one user (SECURITY DEFINER: RLS only lets users see their own profile)
+CREATE OR REPLACE FUNCTION public.get_user_rank(p_user_id UUID)
+RETURNS TABLE(rank BIGINT, total_users BIGINT, xp INTEGER)
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    (SELECT COUNT(*) FROM user_profiles p WHERE p.xp > u.xp) + 1,
+    (SELECT COUNT(*) FROM user_profiles),
+    u.xp
+  FROM user_profiles u
+  WHERE u.id = p_user_id;
+$$;
+
+-- Attempt totals and mistake counts by type for one user, aggregated in the
+-- database instead of shipping every attempt (and its mistakes JSON) to the API
+CREATE OR REPLACE FUNCTION public.get_user_attempt_stats(p_user_id UUID)
+RETURNS TABLE(total_attempts BIGINT, correct_attempts BIGINT, total_xp_earned BIGINT, mistake_breakdown JSONB)
+SET search_path = public
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COUNT(*),
+    COUNT(*) FILTER (WHERE a.is_correct),
+    COALESCE(SUM(a.xp_earned), 0),
+    COALESCE((
+      SELECT jsonb_object_agg(t.mistake_type, t.n)
+      FROM (
+        SELECT COALESCE(m->>'mistake_type', 'unknown') AS mistake_type, COUNT(*) AS n
+        FROM question_attempts a2
+        CROSS JOIN LATERAL jsonb_array_elements(COALESCE(a2.mistakes, '[]'::jsonb)) AS m
+        WHERE a2.user_id = p_user_id
+        GROUP BY 1
+      ) t
+    ), '{}'::jsonb)
+  FROM question_attempts a
+  WHERE a.user_id = p_user_id;
+$$;
+
+-- Add XP to the day and week buckets of a user, overall and for a course
+CREATE OR REPLACE FUNCTION public.increment_xp_buckets(p_user_id UUID, p_course_id UUID, p_xp INTEGER, p_at TIMESTAMPTZ DEFAULT NOW())
+RETURNS void
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE sql
+AS $$
+  INSERT INTO xp_buckets AS b (period, bucket_start, scope, user_id, xp)
+  SELECT period, date_trunc(period, p_at AT TIME ZONE 'UTC')::date, scope, p_user_id, p_xp
+  FROM unnest(ARRAY['day', 'week']) AS period,
+       unnest(ARRAY['all'] || CASE WHEN p_course_id IS NULL THEN ARRAY[]::TEXT[] ELSE ARRAY[p_course_id::TEXT] END) AS scope
+  ON CONFLICT (period, bucket_start, scope, user_id)
+  DO UPDATE SET xp = b.xp + EXCLUDED.xp, updated_at = NOW();
+$$;
+
+-- Only the backend (service role) records XP
+REVOKE EXECUTE ON FUNCTION public.increment_xp_buckets(UUID, UUID, INTEGER, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+
+-- Top users of one windowed board
+CREATE OR REPLACE FUNCTION public.get_window_leaderboard(p_period TEXT, p_bucket_start DATE, p_scope TEXT, p_limit INTEGER DEFAULT 10)
+RETURNS TABLE(user_id UUID, full_name TEXT, level INTEGER, xp INTEGER)
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT b.user_id, p.full_name, p.level, b.xp
+  FROM xp_buckets b
+  JOIN user_profiles p ON p.id = b.user_id
+  WHERE b.period = p_period AND b.bucket_start = p_bucket_start AND b.scope = p_scope
+  ORDER BY b.xp DESC, b.user_id
+  LIMIT p_limit;
+$$;
+
+-- Position of one user on a windowed board (rank is NULL if they have no XP in the window)
+CREATE OR REPLACE FUNCTION public.get_window_rank(p_period TEXT, p_bucket_start DATE, p_scope TEXT, p_user_id UUID)
+RETURNS TABLE(rank BIGINT, total_users BIGINT, xp INTEGER)
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE sql
+STABLE
+AS $$
+  WITH board AS (
+    SELECT * FROM xp_buckets WHERE period = p_period AND bucket_start = p_bucket_start AND scope = p_scope
+  ), mine AS (
+    SELECT xp FROM board WHERE user_id = p_user_id
+  )
+  SELECT
+    CASE WHEN EXISTS (SELECT 1 FROM mine) THEN (SELECT COUNT(*) FROM board WHERE board.xp > (SELECT xp FROM mine)) + 1 END,
+    (SELECT COUNT(*) FROM board),
+    COALESCE((SELECT xp FROM mine), 0);
+$$;
+
+-- Drop buckets whose window ended before p_before
+CREATE OR REPLACE FUNCTION public.prune_xp_buckets(p_before DATE)
+RETURNS BIGINT
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE sql
+AS $$
+  WITH deleted AS (
+    DELETE FROM xp_buckets
+    WHERE bucket_start + CASE period WHEN 'day' THEN 1 ELSE 7 END < p_before
+    RETURNING 1
+  )
+  SELECT COUNT(*) FROM deleted;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.prune_xp_buckets(DATE) FROM PUBLIC, anon, authenticated;
+
 -- Function to handle new user registration (creates profile automatically)
 CREATE OR REPLACE FUNCTION public.handle_new_user()
 RETURNS trigger